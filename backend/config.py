@@ -28,6 +28,8 @@ class Limits:
     MAX_CONCURRENCY_RESOLVE = int(os.getenv("MAX_CONCURRENCY_RESOLVE", "5"))
     MAX_CONCURRENCY_DATA = int(os.getenv("MAX_CONCURRENCY_DATA", "10"))
     MAX_CONCURRENCY_METADATA = int(os.getenv("MAX_CONCURRENCY_METADATA", "10"))
+    # Phase B bulk downloads in flight at once (Phase C consumes symbols as they land)
+    MAX_CONCURRENCY_BULK = int(os.getenv("MAX_CONCURRENCY_BULK", "2" if is_render() else "4"))
 
     MAX_FILE_SIZE_MB = int(os.getenv(
         "MAX_FILE_SIZE_MB",
@@ -46,12 +48,123 @@ class Limits:
         "25" if is_render() else "100"
     ))
 
+    # Phase B: symbols share a bulk request while none is fetched more than this
+    # many calendar days beyond its own window
+    FETCH_GROUP_SLACK_DAYS = int(os.getenv("FETCH_GROUP_SLACK_DAYS", "30"))
+
+    # Time the engine allows one Phase B bulk request, and one symbol load in Phase C
+    BULK_FETCH_TIMEOUT_SEC = float(os.getenv("BULK_FETCH_TIMEOUT_SEC", "60"))
+    SYMBOL_FETCH_TIMEOUT_SEC = float(os.getenv("SYMBOL_FETCH_TIMEOUT_SEC", "30"))
+
+    # Longest a request waits on another request's in-flight fetch of the same symbols
+    # before fetching them itself. Half the tightest enclosing timeout, so a waiter
+    # whose leader stalls still has time left for its own fetch
+    SINGLE_FLIGHT_WAIT_SEC = float(os.getenv(
+        "SINGLE_FLIGHT_WAIT_SEC",
+        str(min(BULK_FETCH_TIMEOUT_SEC, SYMBOL_FETCH_TIMEOUT_SEC) / 2)
+    ))
+
     WS_TIMEOUT_SEC = int(os.getenv("WS_TIMEOUT_SEC", "300"))
     HTTP_TIMEOUT_SEC = int(os.getenv("HTTP_TIMEOUT_SEC", "55" if is_render() else "600"))
     KEEPALIVE_INTERVAL_SEC = int(os.getenv("KEEPALIVE_INTERVAL_SEC", "30"))
 
     PROGRESS_THROTTLE_EVERY_N = int(os.getenv("PROGRESS_THROTTLE_EVERY_N", "50"))
 
+    ROW_HASH_BULK_CHUNK = int(os.getenv("ROW_HASH_BULK_CHUNK", "1000"))
+
+    # Byte budget of the per-run in-memory symbol store (Phase C)
+    SYMBOL_STORE_MAX_MB = int(os.getenv("SYMBOL_STORE_MAX_MB", "256"))
+    # Disk budget of the columnar market store (MARKET_DIR); swept at startup and after a warm
+    MARKET_STORE_MAX_MB = int(os.getenv("MARKET_STORE_MAX_MB", "2048"))
+
+
+class Engine:
+    # Phase C implementation: "loop" (per-signal), "vectorized" (per-symbol NumPy pass)
+    # or "process" (vectorized, sharded by symbol across a process pool)
+    PHASE_C = os.getenv("PHASE_C_ENGINE", "loop")
+
+    PROCESS_WORKERS = int(os.getenv("PHASE_C_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    # Below this many uncached signals the pool start-up cost outweighs the gain
+    PROCESS_MIN_SIGNALS = int(os.getenv("PHASE_C_PROCESS_MIN_SIGNALS", "2000"))
+    # Per-symbol compute budget in the vectorized engine, and for symbols a failed
+    # process shard left behind (recomputed in-process, possibly re-reading data)
+    SYMBOL_TIMEOUT_SEC = float(os.getenv("PHASE_C_SYMBOL_TIMEOUT_SEC", str(Limits.SYMBOL_FETCH_TIMEOUT_SEC)))
+    FALLBACK_TIMEOUT_SEC = float(os.getenv("PHASE_C_FALLBACK_TIMEOUT_SEC", "120"))
+
+
+class Horizons:
+    # Forward-return horizons (trading-day lookups from entry, in calendar days).
+    # DEFAULT matches the named return_{h}d fields on SignalResult / BacktestReport.
+    DEFAULT = (7, 14, 30, 45, 60, 90)
+    MAX_DAYS = int(os.getenv("MAX_HORIZON_DAYS", "365"))
+    MAX_COUNT = int(os.getenv("MAX_HORIZONS", "16"))
+
+
+class Stats:
+    # Return histogram used for median / P10 / P90 (percent returns; one bin = max quantile error)
+    SKETCH_MIN = float(os.getenv("RETURN_SKETCH_MIN", "-100"))
+    SKETCH_MAX = float(os.getenv("RETURN_SKETCH_MAX", "1000"))
+    SKETCH_BIN_WIDTH = float(os.getenv("RETURN_SKETCH_BIN_WIDTH", "0.05"))
+
+
+class Incremental:
+    # Re-run only the rows of an edited upload that an earlier report does not cover
+    ENABLED = os.getenv("INCREMENTAL_BACKTEST", "true").lower() in ("true", "1")
+    # Minimum share of the new file's rows the earlier report must already cover
+    MIN_OVERLAP = float(os.getenv("INCREMENTAL_MIN_OVERLAP", "0.5"))
+    # Earlier uploads remembered per user + report mode
+    LINEAGE_DEPTH = int(os.getenv("INCREMENTAL_LINEAGE_DEPTH", "5"))
+
+
+class Adaptive:
+    # AIMD control of yf.download chunk size (per call kind) and downloads in flight (shared)
+    ENABLED = os.getenv("ADAPTIVE_FETCH", "true").lower() in ("true", "1")
+    CHUNK_MIN = int(os.getenv("ADAPTIVE_CHUNK_MIN", "5"))
+    BULK_CHUNK_MAX = int(os.getenv("ADAPTIVE_BULK_CHUNK_MAX", "50" if is_render() else "200"))
+    RESOLVE_CHUNK_MAX = int(os.getenv("ADAPTIVE_RESOLVE_CHUNK_MAX", "100"))
+    CHUNK_STEP = int(os.getenv("ADAPTIVE_CHUNK_STEP", "5"))
+    CONCURRENCY_MAX = int(os.getenv("ADAPTIVE_CONCURRENCY_MAX", "4" if is_render() else "8"))
+    # Clean calls in a row before the in-flight window grows by one
+    CONCURRENCY_STREAK = int(os.getenv("ADAPTIVE_CONCURRENCY_STREAK", "4"))
+    # A call slower than this, or with more than this share of symbols empty, counts as congestion
+    TARGET_LATENCY_SEC = float(os.getenv("ADAPTIVE_TARGET_LATENCY_SEC", "20"))
+    EMPTY_RATE_MAX = float(os.getenv("ADAPTIVE_EMPTY_RATE_MAX", "0.5"))
+
+
+class DataSource:
+    # Where bars and metadata come from: "yfinance" or "local" (per-symbol
+    # CSV/Parquet files under LOCAL_DIR, no network)
+    NAME = os.getenv("MARKET_SOURCE", "yfinance").lower()
+    LOCAL_DIR = os.getenv("MARKET_LOCAL_DIR", str(BACKEND_DIR / "market_data"))
+
+    # "record" wraps RECORD_INNER and saves every response to BUNDLE_DIR;
+    # "replay" serves BUNDLE_DIR with no network
+    RECORD_INNER = os.getenv("MARKET_RECORD_INNER", "yfinance").lower()
+    BUNDLE_DIR = os.getenv("MARKET_BUNDLE_DIR", str(BACKEND_DIR / ".replay"))
+    # Seconds added per replayed call, or "recorded" (recorded latency x REPLAY_LATENCY_SCALE)
+    REPLAY_LATENCY = os.getenv("REPLAY_LATENCY", "recorded")
+    REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
+    REPLAY_FAILURE_RATE = float(os.getenv("REPLAY_FAILURE_RATE", "0"))
+    REPLAY_SEED = int(os.getenv("REPLAY_SEED", "0"))
+
+
+class LatestPrices:
+    # Background refresher (started in the app lifespan): re-prices every symbol
+    # used within ACTIVE_WINDOW_SEC once per REFRESH_INTERVAL_SEC
+    REFRESH_ENABLED = os.getenv("LATEST_REFRESH_ENABLED", "true").lower() in ("true", "1")
+    REFRESH_INTERVAL_SEC = float(os.getenv("LATEST_REFRESH_INTERVAL_SEC", "120"))
+    # Entries older than this are fetched on demand, as if the refresher were off
+    MAX_AGE_SEC = float(os.getenv("LATEST_MAX_AGE_SEC", "300"))
+    ACTIVE_WINDOW_SEC = float(os.getenv("LATEST_ACTIVE_WINDOW_SEC", "21600"))
+    MAX_SYMBOLS = int(os.getenv("LATEST_MAX_SYMBOLS", "1000" if is_render() else "5000"))
+
+    # On-demand fetches: chunks in parallel (downloads in flight stay bounded by the
+    # fetch controller), then a rate-limited per-symbol fallback, all within DEADLINE_SEC
+    FETCH_WORKERS = int(os.getenv("LATEST_FETCH_WORKERS", str(Adaptive.CONCURRENCY_MAX)))
+    FALLBACK_WORKERS = int(os.getenv("LATEST_FALLBACK_WORKERS", "4"))
+    FALLBACK_RATE_PER_SEC = float(os.getenv("LATEST_FALLBACK_RATE_PER_SEC", "5"))
+    DEADLINE_SEC = float(os.getenv("LATEST_DEADLINE_SEC", "20" if is_render() else "45"))
+
 
 class CacheTTL:
     TICKER_DATA_HISTORICAL = int(os.getenv("CACHE_TTL_DATA_HISTORICAL", "2592000"))  # 30 days
@@ -61,24 +174,85 @@ class CacheTTL:
     SYMBOL_RESOLUTION = int(os.getenv("CACHE_TTL_RESOLUTION", "604800"))  # 7 days
     TICKER_INFO = int(os.getenv("CACHE_TTL_INFO", "604800"))  # 7 days
     LATEST_PRICE = int(os.getenv("CACHE_TTL_LATEST", "300"))  # 5 min
+    BAD_SYMBOL = int(os.getenv("CACHE_TTL_BAD_SYMBOL", "21600"))  # 6 hours
 
     FILE_HASH_REPORT = int(os.getenv("CACHE_TTL_REPORT", "2592000"))  # 30 days
     ROW_HASH = int(os.getenv("CACHE_TTL_ROW_HASH", "2592000"))  # 30 days
 
-    DISKCACHE_SIZE_LIMIT_MB = int(os.getenv("DISKCACHE_SIZE_LIMIT_MB", "500"))
-
 
 class Paths:
     CACHE_DIR = os.getenv("CACHE_DIR", str(BACKEND_DIR / ".cache"))
     JOBS_DIR = os.getenv("JOBS_DIR", str(BACKEND_DIR / ".jobs"))
     TEMP_DIR = os.getenv("TEMP_DIR", str(BACKEND_DIR / ".temp"))
+    MARKET_DIR = os.getenv("MARKET_DIR", str(Path(CACHE_DIR) / "market"))
+    # Root of the diskcache namespaces (CacheNamespaces), kept apart from MARKET_DIR
+    # and the other files in CACHE_DIR so a namespace can never share their directory
+    DISKCACHE_DIR = os.getenv("DISKCACHE_DIR", str(Path(CACHE_DIR) / "diskcache"))
 
     @classmethod
     def ensure_dirs(cls):
-        for d in (cls.CACHE_DIR, cls.JOBS_DIR, cls.TEMP_DIR):
+        for d in (cls.CACHE_DIR, cls.JOBS_DIR, cls.TEMP_DIR, cls.MARKET_DIR, cls.DISKCACHE_DIR):
             Path(d).mkdir(parents=True, exist_ok=True)
 
 
+class CacheNamespaces:
+    # One sharded diskcache per data class under DISKCACHE_DIR/<namespace>, each
+    # culled to its own budget so big reports never evict hot symbol entries.
+    # diskcache splits a namespace's size limit evenly across its shards, so the
+    # largest entry must fit in budget / shards. Reports are few, large and written
+    # once per upload: one shard gives a report the whole budget.
+    SHARDS = {
+        "market": int(os.getenv("DISKCACHE_SHARDS", "8")),
+        "resolve": int(os.getenv("DISKCACHE_SHARDS", "8")),
+        "rows": int(os.getenv("DISKCACHE_SHARDS", "8")),
+        "reports": int(os.getenv("DISKCACHE_SHARDS_REPORTS", "1")),
+    }
+    # Seconds a shard waits on a locked SQLite file before the op is dropped (logged)
+    TIMEOUT_SEC = float(os.getenv("DISKCACHE_TIMEOUT_SEC", "1.0"))
+    # namespace -> (size limit MB, eviction policy)
+    BUDGETS = {
+        # latest prices, ticker info, bad-symbol marks, refresh cooldowns
+        "market": (int(os.getenv("CACHE_MB_MARKET", "64")),
+                   os.getenv("CACHE_EVICTION_MARKET", "least-recently-used")),
+        # raw symbol -> Yahoo ticker
+        "resolve": (int(os.getenv("CACHE_MB_RESOLVE", "16")),
+                    os.getenv("CACHE_EVICTION_RESOLVE", "least-recently-used")),
+        # per-signal results keyed by row hash
+        "rows": (int(os.getenv("CACHE_MB_ROWS", "192")),
+                 os.getenv("CACHE_EVICTION_ROWS", "least-recently-stored")),
+        # full reports by file hash + upload lineage
+        "reports": (int(os.getenv("CACHE_MB_REPORTS", "256")),
+                    os.getenv("CACHE_EVICTION_REPORTS", "least-recently-stored")),
+    }
+    # In-process hot tier in front of each namespace: byte budget (MB, 0 disables).
+    # Off for reports: each is read about once per upload, and holding one means
+    # pickling megabytes a second time on every write.
+    MEMORY_MB = {
+        "market": int(os.getenv("CACHE_MEM_MB_MARKET", "32")),
+        "resolve": int(os.getenv("CACHE_MEM_MB_RESOLVE", "8")),
+        "rows": int(os.getenv("CACHE_MEM_MB_ROWS", "64")),
+        "reports": int(os.getenv("CACHE_MEM_MB_REPORTS", "0")),
+    }
+    # Longest a hot entry is served without re-reading disk, so writes from
+    # other processes (uvicorn workers, the warmer) show up within this bound
+    MEMORY_MAX_AGE_SEC = float(os.getenv("CACHE_MEM_MAX_AGE_SEC", "60"))
+
+
+class SymbolMasterConfig:
+    # Local sector / market-cap table that replaces per-symbol .info lookups
+    PATH = os.getenv("SYMBOL_MASTER_PATH", str(Path(Paths.CACHE_DIR) / "symbol_master.csv"))
+    # Rupee market caps at or above these are Largecap / Midcap; below is Smallcap
+    LARGE_CAP_MIN = float(os.getenv("LARGE_CAP_MIN_INR", "200000000000"))  # 20,000 cr
+    MID_CAP_MIN = float(os.getenv("MID_CAP_MIN_INR", "50000000000"))  # 5,000 cr
+
+
+class Warmer:
+    # Nightly prefetch (python -m backend.warm_cache): history start for symbols
+    # without a known first signal, and where a run's progress is kept for --resume
+    HISTORY_YEARS = int(os.getenv("WARM_HISTORY_YEARS", "5"))
+    STATE_FILE = os.getenv("WARM_STATE_FILE", str(Path(Paths.CACHE_DIR) / "warm_state.json"))
+
+
 PERSISTENCE_ENABLED: bool = os.getenv("PERSISTENCE_ENABLED", "false").lower() == "true"
 WORKER_URL: Optional[str] = os.getenv("WORKER_URL")
 DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
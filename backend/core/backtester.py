@@ -1,18 +1,28 @@
 import asyncio
-import hashlib
 import logging
+import multiprocessing
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
 
 from .data_provider import DataProvider
 from .symbol_resolver import SymbolResolver
-from ..utils.date_utils import parse_date, get_next_trading_day, get_future_trading_day
-from ..models.schemas import SignalResult, BacktestReport
-from ..config import Limits
-from ..persistence import PersistenceBackend
+from ..utils.date_utils import parse_date, get_future_trading_day
+from ..utils.horizons import normalize_horizons, horizon_span
+from .vector_engine import SymbolFrame, compute_symbol_signals
+from .result_buffer import ResultBuffer
+from .return_stats import HorizonSketches
+from .symbol_store import SymbolStore
+from .fetch_planner import plan_fetches
+from .symbol_master import symbol_master
+from ..models.schemas import BacktestReport, HorizonStats
+from ..config import Limits, Engine
+from ..persistence import PersistenceBackend, compute_row_hash
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +46,133 @@ def _extract_csv_metadata(signal: dict) -> dict:
     return result
 
 
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Process-wide Phase C worker pool (spawned lazily, reused across runs)."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=Engine.PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the Phase C worker pool, if one was started (app shutdown)."""
+    global _process_pool
+    pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _build_shards(pending_by_symbol: Dict[str, list], num_shards: int) -> List[list]:
+    """Greedy-balance symbols across shards by signal count, keeping each symbol whole."""
+    num_shards = max(1, min(num_shards, len(pending_by_symbol)))
+    shards = [[] for _ in range(num_shards)]
+    loads = [0] * num_shards
+    for sym, items in sorted(pending_by_symbol.items(), key=lambda kv: len(kv[1]), reverse=True):
+        target = loads.index(min(loads))
+        shards[target].append((sym, items))
+        loads[target] += len(items)
+    # Submit shards holding the earliest signals first so in-order streaming starts sooner
+    shards.sort(key=lambda shard: min(item[0] for _, items in shard for item in items))
+    return shards
+
+
+def _compute_shard(shard: List[tuple], entry_mode: str, duration: int, horizons: List[int],
+                   horizon_span: Optional[int] = None) -> dict:
+    """Process-pool entry point: compute every symbol of one shard.
+
+    Runs in a worker process; symbol data is read from the shared on-disk cache
+    by ``DataProvider.get_ticker_data`` rather than pickled across.
+    """
+    out = {}
+    for sym, items in shard:
+        try:
+            out[sym] = Backtester._compute_symbol_vectorized(sym, items, entry_mode, duration, horizons,
+                                                             horizon_span)
+        except Exception:
+            logger.warning("Phase C shard — failed to compute %s", sym, exc_info=True)
+    return out
+
+
 class Backtester:
+    @staticmethod
+    def _compute_symbol_vectorized(
+        symbol: str,
+        items: List[tuple],
+        entry_mode: str,
+        duration: int,
+        horizons: List[int],
+        horizon_span: Optional[int] = None,
+    ) -> tuple:
+        """Load one symbol's data once and compute all its pending signals.
+
+        ``items`` is a list of ``(signal_index, signal_date, start_date, end_date)``.
+        Returns ``(rows, last_date)`` where ``rows`` maps signal_index to the
+        engine dict and ``last_date`` is the last loaded trading day (YYYY-MM-DD).
+        """
+        start = min(item[2] for item in items)
+        end = max(item[3] for item in items)
+        df = DataProvider.get_ticker_data(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        if (df is None or df.empty) and len(items) > 1:
+            # Union window unavailable (e.g. outside cache and yfinance failing):
+            # fall back to per-signal windows like the loop engine would.
+            rows, last_dates = {}, []
+            for item in items:
+                sub_rows, sub_last = Backtester._compute_symbol_vectorized(
+                    symbol, [item], entry_mode, duration, horizons, horizon_span
+                )
+                rows.update(sub_rows)
+                if sub_last:
+                    last_dates.append(sub_last)
+            return rows, max(last_dates) if last_dates else None
+
+        frame = SymbolFrame.from_dataframe(df)
+        computed = compute_symbol_signals(
+            frame,
+            [item[1] for item in items],
+            [item[3] for item in items],
+            entry_mode, duration, horizons,
+            horizon_span=horizon_span,
+        )
+        last_date = str(frame.dates[-1])[:10] if len(frame) else None
+        return {item[0]: row for item, row in zip(items, computed)}, last_date
+
+    @staticmethod
+    def _aggregate_horizons(report: BacktestReport, buffer: ResultBuffer, trades: list) -> None:
+        """Per-horizon averages / win rates and best / worst performers, from the buffer's return matrix."""
+        values, present = buffer.horizon_matrix("return")
+        counts = present.sum(axis=0)
+        masked = np.where(present, values, 0.0)
+        # cumsum accumulates row by row, so totals match a sequential per-trade sum exactly
+        sums = np.cumsum(masked, axis=0)[-1] if len(masked) else np.zeros(len(buffer.horizons))
+        wins = (present & (values > 0)).sum(axis=0)
+
+        avg_returns, win_rates = [], []
+        for j, h in enumerate(buffer.horizons):
+            count = int(counts[j])
+            avg = round(float(sums[j]) / count, 2) if count else None
+            win_rate = round((int(wins[j]) / count) * 100, 2) if count else None
+            avg_returns.append(avg)
+            win_rates.append(win_rate)
+            if f"avg_return_{h}d" in BacktestReport.model_fields:
+                setattr(report, f"avg_return_{h}d", avg)
+                setattr(report, f"win_rate_{h}d", win_rate)
+        report.avg_returns = avg_returns
+        report.win_rates = win_rates
+
+        # Best / worst by the 90-day return (or the longest horizon when 90 is not requested)
+        j = buffer.horizons.index(90) if 90 in buffer.horizons else len(buffer.horizons) - 1
+        if present[:, j].any():
+            col = values[:, j]
+            report.best_performer = trades[int(np.argmax(np.where(present[:, j], col, -np.inf)))]
+            report.worst_performer = trades[int(np.argmin(np.where(present[:, j], col, np.inf)))]
+            report.performer_horizon = buffer.horizons[j]
+
     @staticmethod
     async def run_backtest_async(
         signals: List[Dict[str, str]],
@@ -46,10 +182,14 @@ class Backtester:
         run_id: Optional[str] = None,
         job_store=None,
         persistence_backend: Optional[PersistenceBackend] = None,
+        engine: Optional[str] = None,
+        horizons: Optional[Sequence[int]] = None,
     ) -> BacktestReport:
-        results: List[SignalResult] = []
+        engine = engine or Engine.PHASE_C
         total = len(signals)
         duration = min(max(duration, 7), 180)
+        horizons = normalize_horizons(horizons)
+        span = horizon_span(horizons, duration)
 
         # Progress spans Phase A (resolution) and Phase C (computation)
         total_steps = total * 2
@@ -88,8 +228,8 @@ class Backtester:
         parsed_signals = []
         unique_resolved_symbols = []
         seen_symbols = set()
-        global_start = None
-        global_end = None
+        # Union of each symbol's signal windows: what Phase B fetches and Phase C loads
+        symbol_ranges = {}
 
         for i, signal in enumerate(signals):
             raw_symbol = signal.get("symbol") or signal.get("Symbol")
@@ -115,12 +255,10 @@ class Backtester:
                 continue
 
             start_date = signal_date
-            end_date = signal_date + timedelta(days=duration + 10)
+            end_date = signal_date + timedelta(days=span + 10)
 
-            if global_start is None or start_date < global_start:
-                global_start = start_date
-            if global_end is None or end_date > global_end:
-                global_end = end_date
+            lo, hi = symbol_ranges.get(resolved_symbol, (start_date, end_date))
+            symbol_ranges[resolved_symbol] = (min(lo, start_date), max(hi, end_date))
 
             csv_meta = _extract_csv_metadata(signal)
 
@@ -152,69 +290,106 @@ class Backtester:
             total, valid_count, len(unique_resolved_symbols), status_summary, phase_a_time
         )
 
-        # Recalculate total_steps to include Phase B chunks
-        chunk_size = Limits.BULK_FETCH_CHUNK
-        num_chunks = (len(unique_resolved_symbols) + chunk_size - 1) // chunk_size if unique_resolved_symbols else 0
+        # Row-hash cache: one bulk lookup for the whole upload; new results are
+        # written back in one transaction per flushed batch.
+        row_hashes = {
+            i: compute_row_hash(p_sig["resolved"], p_sig["date_str"], entry_mode, duration, horizons)
+            for i, p_sig in enumerate(parsed_signals) if p_sig["status"] == "Valid"
+        }
+        hash_hits = DataProvider.get_cached_results(list(row_hashes.values()))
+        precached = {i: hash_hits[h] for i, h in row_hashes.items() if h in hash_hits}
+        cache_writes = {}
+        row_hash_lookups = len(row_hashes)
+        row_hash_hits = len(precached)
+        logger.info("Phase C — Row-hash cache: %d/%d hits (%.1f%%)",
+                    row_hash_hits, row_hash_lookups,
+                    (row_hash_hits / row_hash_lookups * 100) if row_hash_lookups else 0.0)
+
+        # Only symbols with signals left to compute need bars or metadata
+        first_row = {}
+        for i in row_hashes:
+            if i not in precached:
+                first_row.setdefault(parsed_signals[i]["resolved"], i)
+        compute_symbols = list(first_row)
+
+        # Plan Phase B against the market store: per-symbol windows, minus what is stored.
+        # Requests holding the earliest file rows go first so in-order streaming starts sooner.
+        fetch_plan, plan_stats = await asyncio.to_thread(
+            plan_fetches, {sym: symbol_ranges[sym] for sym in compute_symbols})
+        fetch_plan.sort(key=lambda request: min(first_row[sym] for sym in request.symbols))
+        num_chunks = len(fetch_plan)
         total_steps = total + num_chunks + total
 
-        # --- Phase B: Bulk Fetching & Enrichment ---
-        total_chunks = 0
+        # --- Phase B: Bulk Fetching & Enrichment (pipelined with Phase C) ---
+        # Downloads run in the background with bounded concurrency; a symbol is
+        # handed to Phase C as soon as every request covering it has landed.
+        total_chunks = num_chunks
         chunks_with_data = 0
+        chunks_done = 0
+        progress_step = 0
+
+        async def _progress(step, message, **kwargs):
+            # Fetch and compute progress interleave; never report a step backwards
+            nonlocal progress_step
+            progress_step = max(progress_step, step)
+            await progress_callback(progress_step, total_steps, message, **kwargs)
+
+        outstanding = {sym: 0 for sym in compute_symbols}
+        for request in fetch_plan:
+            for sym in request.symbols:
+                outstanding[sym] += 1
+        ready = {sym: asyncio.Event() for sym in compute_symbols}
+        ready_queue: asyncio.Queue = asyncio.Queue()
+        for sym in compute_symbols:
+            if not outstanding[sym]:
+                ready[sym].set()
+                ready_queue.put_nowait(sym)
+
+        if fetch_plan:
+            logger.info("Phase B — %d windows for %d symbols in %d requests (%d already stored), "
+                        "%d symbol-days needed / %d fetched, concurrency=%d",
+                        plan_stats["windows"], len(compute_symbols), total_chunks,
+                        plan_stats["symbols_stored"], plan_stats["symbol_days_needed"],
+                        plan_stats["symbol_days_fetched"], Limits.MAX_CONCURRENCY_BULK)
+            if progress_callback:
+                await _progress(total, f"Fetching data in {total_chunks} batches...")
+        elif compute_symbols:
+            logger.info("Phase B — all %d symbols already stored, nothing to fetch", len(compute_symbols))
 
-        if unique_resolved_symbols and global_start and global_end:
-            logger.info("Phase B — Chunked fetch for %d unique symbols from %s to %s (chunk_size=%d)",
-                        len(unique_resolved_symbols),
-                        global_start.strftime("%Y-%m-%d"),
-                        global_end.strftime("%Y-%m-%d"),
-                        Limits.BULK_FETCH_CHUNK)
-
-            chunk_size = Limits.BULK_FETCH_CHUNK
-            syms = unique_resolved_symbols
-            chunks = [syms[i:i + chunk_size] for i in range(0, len(syms), chunk_size)]
-            total_chunks = len(chunks)
+        fetch_sem = asyncio.Semaphore(Limits.MAX_CONCURRENCY_BULK)
 
+        async def _fetch_request(chunk_idx, request):
+            nonlocal chunks_with_data, chunks_done
+            chunk = request.symbols
+            try:
+                async with fetch_sem:
+                    chunk_df = await asyncio.wait_for(asyncio.to_thread(
+                        DataProvider.get_bulk_ticker_data,
+                        chunk,
+                        request.start.strftime("%Y-%m-%d"),
+                        request.end.strftime("%Y-%m-%d")
+                    ), timeout=Limits.BULK_FETCH_TIMEOUT_SEC)
+                    if chunk_df is not None and not chunk_df.empty:
+                        chunks_with_data += 1
+                        await asyncio.to_thread(DataProvider.persist_bulk_slices, chunk, chunk_df,
+                                                f"Phase B chunk {chunk_idx + 1}")
+                    del chunk_df
+            except Exception:
+                # Symbols of a failed request fall back to per-symbol fetches in Phase C
+                logger.warning("Phase B chunk %d — bulk fetch failed for %d symbols",
+                               chunk_idx + 1, len(chunk), exc_info=True)
+            finally:
+                chunks_done += 1
+                for sym in sorted(chunk, key=first_row.get):
+                    outstanding[sym] -= 1
+                    if outstanding[sym] == 0:
+                        ready[sym].set()
+                        ready_queue.put_nowait(sym)
             if progress_callback:
-                await progress_callback(total, total_steps, f"Fetching data in {total_chunks} batches...")
-
-            for chunk_idx, chunk in enumerate(chunks):
-                if progress_callback:
-                    await progress_callback(
-                        total + chunk_idx + 1, total_steps,
-                        f"Fetching batch {chunk_idx + 1}/{total_chunks} ({len(chunk)} symbols)..."
-                    )
+                await _progress(total + chunks_done,
+                                f"Fetched batch {chunks_done}/{total_chunks} ({len(chunk)} symbols)...")
 
-                chunk_df = await asyncio.wait_for(asyncio.to_thread(
-                    DataProvider.get_bulk_ticker_data,
-                    chunk,
-                    global_start.strftime("%Y-%m-%d"),
-                    global_end.strftime("%Y-%m-%d")
-                ), timeout=60)
-
-                if chunk_df is not None and not chunk_df.empty:
-                    chunks_with_data += 1
-                    for sym in chunk:
-                        try:
-                            if isinstance(chunk_df.columns, pd.MultiIndex):
-                                if sym in chunk_df.columns.get_level_values(0):
-                                    slice_df = chunk_df[sym].dropna(how='all')
-                                    if not slice_df.empty:
-                                        DataProvider.persist_symbol_data(sym, slice_df)
-                                else:
-                                    logger.debug("Phase B chunk %d — %s not in data, skipping cache",
-                                                 chunk_idx + 1, sym)
-                            else:
-                                DataProvider.persist_symbol_data(sym, chunk_df.copy())
-                        except Exception:
-                            logger.debug("Phase B chunk %d — Failed to cache slice for %s",
-                                         chunk_idx + 1, sym, exc_info=True)
-
-                del chunk_df
-
-        phase_b_time = time.monotonic() - phase_start
-        logger.info("Phase B — Chunked fetch completed (%d/%d chunks with data), elapsed=%.2fs",
-                    chunks_with_data, total_chunks, phase_b_time)
-
-        # Build metadata from CSV first, then fetch missing from API
+        # Build metadata from CSV first; API lookups run alongside the downloads
         metadata_map = {}
         csv_meta_symbols = set()
         for p in parsed_signals:
@@ -225,72 +400,80 @@ class Backtester:
                     if sym not in metadata_map:
                         metadata_map[sym] = csv_m
                         csv_meta_symbols.add(sym)
+        # Uploaded sector/market-cap columns feed the symbol master for later uploads
+        if csv_meta_symbols:
+            symbol_master.upsert({sym: metadata_map[sym] for sym in csv_meta_symbols}, source="upload")
 
-        symbols_needing_api = [s for s in unique_resolved_symbols if s not in csv_meta_symbols]
+        symbols_needing_api = [s for s in compute_symbols if s not in csv_meta_symbols]
+        sem = asyncio.Semaphore(Limits.MAX_CONCURRENCY_METADATA)
 
-        if symbols_needing_api:
-            if progress_callback:
-                await progress_callback(total, total_steps,
-                                        f"Fetching metadata for {len(symbols_needing_api)} symbols...")
+        async def fetch_meta(sym):
+            async with sem:
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.to_thread(DataProvider.get_ticker_info, sym),
+                        timeout=10
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("Metadata timeout for %s", sym)
+                    return {"sector": None, "marketCap": None}
 
+        if symbols_needing_api:
             logger.info("Phase B — Enriching metadata for %d symbols (CSV provided %d, API needed %d)",
-                        len(unique_resolved_symbols), len(csv_meta_symbols), len(symbols_needing_api))
-            sem = asyncio.Semaphore(Limits.MAX_CONCURRENCY_METADATA)
-
-            async def fetch_meta(sym):
-                async with sem:
-                    try:
-                        result = await asyncio.wait_for(
-                            asyncio.to_thread(DataProvider.get_ticker_info, sym),
-                            timeout=10
-                        )
-                        return sym, result
-                    except asyncio.TimeoutError:
-                        logger.warning("Metadata timeout for %s", sym)
-                        return sym, {"sector": None, "marketCap": None}
-
-            meta_results = await asyncio.gather(*(fetch_meta(s) for s in symbols_needing_api))
-            for sym, meta in meta_results:
-                if sym not in metadata_map:
-                    metadata_map[sym] = meta
+                        len(compute_symbols), len(csv_meta_symbols), len(symbols_needing_api))
+        fetch_tasks = [asyncio.create_task(_fetch_request(i, r)) for i, r in enumerate(fetch_plan)]
+        meta_tasks = {sym: asyncio.create_task(fetch_meta(sym)) for sym in symbols_needing_api}
 
-        meta_time = time.monotonic() - phase_start
-        api_count = len(symbols_needing_api)
-        logger.info("Phase B — Metadata enrichment completed, %d symbols (%d from API), elapsed=%.2fs",
-                    len(metadata_map), api_count, meta_time)
+        async def _meta(sym):
+            if sym not in metadata_map and sym in meta_tasks:
+                metadata_map[sym] = await meta_tasks[sym]
+            return metadata_map.get(sym, {})
 
         # --- Phase C: Calculation Loop ---
         fallback_count = 0
         phase_c_start = time.monotonic()
-        logger.info("Phase C — Computing returns for %d signals", len(parsed_signals))
+        logger.info("Phase C — Computing returns for %d signals (engine=%s)", len(parsed_signals), engine)
 
         batch_num = 0
-        batch_results = []
+        batch_rows: List[int] = []
+        first_batch_at = None
+        buffer = ResultBuffer(horizons)
+        sketches = HorizonSketches(horizons)
 
-        # Online single-pass aggregation accumulators
-        horizons = [7, 14, 30, 45, 60, 90]
-        agg = {h: {"sum": 0.0, "count": 0, "wins": 0} for h in horizons}
-        best_performer = None
-        worst_performer = None
+        # Each symbol's union window is loaded once into the run's symbol store
+        symbol_store = SymbolStore(symbol_ranges)
+        horizon_days = np.asarray(horizons, dtype=np.int64)
+        horizons_in_span = horizon_days <= span
 
         async def _flush_batch():
-            nonlocal batch_num, batch_results, best_performer, worst_performer, num_chunks
-            if not batch_results:
+            nonlocal batch_num, batch_rows, cache_writes, first_batch_at
+            if cache_writes:
+                DataProvider.set_cached_results(cache_writes)
+                cache_writes = {}
+            if not batch_rows:
                 return
+            # Streaming distribution stats: fold this batch into a sketch, merge into the run's
+            values, present = buffer.horizon_matrix("return")
+            batch_sketches = HorizonSketches(horizons)
+            batch_sketches.add_matrix(values[batch_rows], present[batch_rows])
+            sketches.merge(batch_sketches)
+            # Serialize once; the same dicts feed the job store and the trade stream
+            dicts = buffer.to_dicts(batch_rows)
+            if first_batch_at is None:
+                first_batch_at = time.monotonic()
             if job_store:
-                dicts = [r.model_dump() for r in batch_results]
                 job_store.save_batch(batch_num, dicts)
                 batch_num += 1
             if progress_callback:
-                await progress_callback(total + num_chunks + batch_num - 1, total_steps,
-                                        f"Batch {batch_num}: {len(batch_results)} trades",
-                                        trades=[r.model_dump() for r in batch_results])
-            batch_results = []
+                await _progress(total + num_chunks + batch_num - 1,
+                                f"Batch {batch_num}: {len(dicts)} trades",
+                                trades=dicts)
+            batch_rows = []
 
-        for i, p_sig in enumerate(parsed_signals):
+        async def _process_signal(i, p_sig):
             if progress_callback and (i % Limits.PROGRESS_THROTTLE_EVERY_N == 0 or i == len(parsed_signals) - 1):
-                await progress_callback(total + num_chunks + i + 1, total_steps,
-                                        f"Computing: {p_sig.get('raw') or 'Unknown'}")
+                await _progress(total + num_chunks + i + 1,
+                                f"Computing: {p_sig.get('raw') or 'Unknown'}")
 
             if p_sig["status"] != "Valid":
                 # Normalize date to YYYY-MM-DD for failed signals too
@@ -299,56 +482,57 @@ class Backtester:
                     normalized_date = parse_date(raw_date).strftime("%Y-%m-%d") if raw_date != "Unknown" else raw_date
                 except (ValueError, AttributeError):
                     normalized_date = raw_date
-                results.append(SignalResult(
-                    symbol=p_sig.get("raw", "Unknown"),
-                    signal_date=normalized_date,
-                    entry_price=0.0,
-                    status=p_sig["status"]
-                ))
-                continue
-                
+                buffer.append({
+                    "symbol": p_sig.get("raw", "Unknown"),
+                    "signal_date": normalized_date,
+                    "entry_price": 0.0,
+                    "status": p_sig["status"],
+                })
+                return
+
             resolved_symbol = p_sig["resolved"]
             signal_date = p_sig["signal_date"]
             date_str = p_sig["date_str"]
 
             # ── Row-hash cache: skip yfinance + computation if this signal was already computed ──
-            row_hash_input = f"{resolved_symbol}|{date_str}|{entry_mode}|{duration}"
-            row_hash = hashlib.sha256(row_hash_input.encode()).hexdigest()
-            cached_result = DataProvider.get_cached_result(row_hash)
-            horizons = sorted(list(set([7, 14, 30, 45, 60, 90, duration])))
-            horizon_deltas = {h: timedelta(days=h) for h in horizons}
+            row_hash = row_hashes[i]
+            cached_result = precached.get(i)
             duration_delta = timedelta(days=duration)
 
             if cached_result is not None:
-                res = SignalResult(**cached_result)
+                res = cached_result
                 logger.debug("Row-hash HIT for %s (%s)", resolved_symbol, date_str)
+            elif i in vector_results:
+                res = vector_results[i]
+                if res["status"] != "Success":
+                    buffer.append(res)
+                    return
+                cache_writes[row_hash] = res
             else:
-                # Data path: Phase B populated per-symbol cache via persist_symbol_data().
-                # get_ticker_data() checks this cache first (0 API cost on cache hit),
-                # falls back to yfinance API only if cache miss or insufficient range.
-                df = await asyncio.wait_for(asyncio.to_thread(
-                    DataProvider.get_ticker_data,
+                # Data path: Phase B populates the market store via persist_symbol_data();
+                # wait until every request covering this symbol has landed. The run's
+                # symbol store loads each symbol once (get_ticker_data: store first,
+                # yfinance only on a miss) and serves this signal's window from it.
+                await ready[resolved_symbol].wait()
+                frame, lo, hi = await asyncio.wait_for(asyncio.to_thread(
+                    symbol_store.view,
                     resolved_symbol,
                     p_sig["start_date"].strftime("%Y-%m-%d"),
                     p_sig["end_date"].strftime("%Y-%m-%d")
-                ), timeout=30)
-
-                if df is None or df.empty:
-                    results.append(SignalResult(
-                        symbol=resolved_symbol,
-                        signal_date=signal_date.strftime("%Y-%m-%d"),
-                        entry_price=0.0,
-                        status="No Data"
-                    ))
-                    continue
+                ), timeout=Limits.SYMBOL_FETCH_TIMEOUT_SEC)
+
+                if hi <= lo:
+                    buffer.append({
+                        "symbol": resolved_symbol,
+                        "signal_date": signal_date.strftime("%Y-%m-%d"),
+                        "entry_price": 0.0,
+                        "status": "No Data",
+                    })
+                    return
 
                 if persistence_backend is not None:
                     try:
-                        last_date = df.index[-1]
-                        if hasattr(last_date, 'strftime'):
-                            data_recency = last_date.strftime("%Y-%m-%d")
-                        else:
-                            data_recency = str(last_date)
+                        data_recency = pd.Timestamp(frame.dates[hi - 1]).strftime("%Y-%m-%d")
                         await persistence_backend.upsert_symbol_freshness(
                             symbol=resolved_symbol,
                             last_fetched=datetime.now().strftime("%Y-%m-%d"),
@@ -357,184 +541,284 @@ class Backtester:
                     except Exception as e:
                         logger.warning("upsert_symbol_freshness failed for %s: %s", resolved_symbol, e)
 
-                # 4. Calculate Returns
-                # Ensure index is datetime
-                df.index = pd.to_datetime(df.index).tz_localize(None)
+                # 4. Calculate Returns over rows [lo, hi) of the symbol's frame; its
+                # calendar is built once per symbol and shared by all of its signals
+                calendar = frame.calendar
 
                 # Signal Close Price (nearest trading day to signal_date)
-                signal_trading_day = get_next_trading_day(signal_date, df)
-                signal_close_price = (df.loc[signal_trading_day]["Close"]
-                                      if signal_trading_day is not None
-                                      else None)
+                signal_pos = int(calendar.next_on_or_after([signal_date], limit=hi)[0])
+                signal_close_price = frame.close[signal_pos] if signal_pos >= 0 else None
 
                 # Entry Date (always NEXT trading day after signal_date)
-                entry_date = get_future_trading_day(signal_date, df)
+                entry_date = get_future_trading_day(signal_date, calendar, limit=hi)
                 if not entry_date:
-                     results.append(SignalResult(
-                        symbol=resolved_symbol,
-                        signal_date=signal_date.strftime("%Y-%m-%d"),
-                        entry_price=0.0,
-                        entry_mode=entry_mode,
-                        status="No Entry Data"
-                    ))
-                     continue
+                    buffer.append({
+                        "symbol": resolved_symbol,
+                        "signal_date": signal_date.strftime("%Y-%m-%d"),
+                        "entry_price": 0.0,
+                        "entry_mode": entry_mode,
+                        "status": "No Entry Data",
+                    })
+                    return
+                entry_pos = int(calendar.lower_bound(np.datetime64(entry_date, "ns")))
 
                 # Entry Price (mode-dependent)
                 if entry_mode == "next_open":
-                    entry_price = df.loc[entry_date]["Open"]
+                    entry_price = frame.open[entry_pos]
                 else:
-                    entry_price = df.loc[entry_date]["Close"]
-
-                normalized_signal_date = signal_date.strftime("%Y-%m-%d")
-                res = SignalResult(
-                    symbol=resolved_symbol,
-                    signal_date=normalized_signal_date,
-                    signal_close_price=round(signal_close_price, 2) if signal_close_price is not None else None,
-                    entry_date=entry_date.strftime("%Y-%m-%d"),
-                    entry_price=round(entry_price, 2),
-                    entry_mode=entry_mode,
-                    sector=metadata_map.get(resolved_symbol, {}).get("sector"),
-                    market_cap=str(metadata_map.get(resolved_symbol, {}).get("marketCap")) if metadata_map.get(resolved_symbol, {}).get("marketCap") is not None else None,
-                    status="Success"
-                )
-
-                # Calculate forward returns dynamically
-                for h in horizons:
-                    if h > duration: continue
+                    entry_price = frame.close[entry_pos]
+
+                meta = await _meta(resolved_symbol)
+                res = {
+                    "symbol": resolved_symbol,
+                    "signal_date": signal_date.strftime("%Y-%m-%d"),
+                    "signal_close_price": float(round(signal_close_price, 2)) if signal_close_price is not None else None,
+                    "entry_date": entry_date.strftime("%Y-%m-%d"),
+                    "entry_price": float(round(entry_price, 2)),
+                    "entry_mode": entry_mode,
+                    "sector": meta.get("sector"),
+                    "market_cap": str(meta.get("marketCap")) if meta.get("marketCap") is not None else None,
+                    "status": "Success",
+                }
+
+                # Forward returns: every horizon's exit day in one calendar lookup
+                targets = np.datetime64(entry_date, "ns") + horizon_days * np.timedelta64(1, "D")
+                exit_pos = calendar.next_on_or_after(targets, limit=hi)
+                exit_prices = np.where(exit_pos >= 0, frame.close[np.maximum(exit_pos, 0)], np.nan)
+                valid = horizons_in_span & (exit_pos >= 0) & ~np.isnan(exit_prices)
+                if pd.isna(entry_price) or entry_price == 0:
+                    valid[:] = False
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rets = ((exit_prices - entry_price) / entry_price) * 100
+                res["returns"] = np.where(valid, np.round(rets, 2), np.nan).tolist()
+                res["exit_prices"] = np.where(valid, np.round(exit_prices, 2), np.nan).tolist()
+
+                # Max High/Low in Duration: O(1) query on the frame's sparse tables,
+                # built once per symbol and shared by all of its signals
+                window_end = entry_date + duration_delta
+                window_hi = min(int(calendar.upper_bound(np.datetime64(window_end, "ns"))), hi)
+                max_high_pos = int(frame.high_max.query([entry_pos], [window_hi])[0])
+                max_low_pos = int(frame.low_min.query([entry_pos], [window_hi])[0])
+
+                if not np.isnan(frame.high[max_high_pos]):
+                    res["max_high_90d"] = float(round(frame.high[max_high_pos], 2))
+                    res["max_high_date"] = calendar.date_at(max_high_pos).strftime("%Y-%m-%d")
+                if not np.isnan(frame.low[max_low_pos]):
+                    res["max_low_90d"] = float(round(frame.low[max_low_pos], 2))
+                    res["max_low_date"] = calendar.date_at(max_low_pos).strftime("%Y-%m-%d")
+
+                cache_writes[row_hash] = res
+
+            row = buffer.append(res)
+            batch_rows.append(row)
+            if len(batch_rows) >= Limits.BATCH_SIZE:
+                await _flush_batch()
 
-                    target_date = entry_date + horizon_deltas[h]
-                    exit_date = get_next_trading_day(target_date, df)
+        # Vectorized / process engines: compute the signals the row-hash cache missed
+        # per symbol, and emit results in file order as they land.
+        vector_results = {}
+        pending = set()
+        cursor = 0
+
+        async def _drain():
+            """Emit signals in file order up to the first one still being computed."""
+            nonlocal cursor
+            while cursor < len(parsed_signals):
+                if cursor in pending and cursor not in vector_results:
+                    return
+                await _process_signal(cursor, parsed_signals[cursor])
+                cursor += 1
+
+        async def _store_rows(sym, rows, last_date):
+            meta = await _meta(sym)
+            for i, row in rows.items():
+                row["symbol"] = sym
+                row["signal_date"] = parsed_signals[i]["signal_date"].strftime("%Y-%m-%d")
+                if row["status"] != "Success":
+                    row["entry_price"] = 0.0
+                    if row["status"] == "No Entry Data":
+                        row["entry_mode"] = entry_mode
+                else:
+                    row["entry_mode"] = entry_mode
+                    row["sector"] = meta.get("sector")
+                    row["market_cap"] = str(meta.get("marketCap")) if meta.get("marketCap") is not None else None
+                vector_results[i] = row
 
-                    if exit_date:
-                        exit_price = df.loc[exit_date]["Close"]
-                        if pd.notna(exit_price) and pd.notna(entry_price) and entry_price != 0:
-                            ret = ((exit_price - entry_price) / entry_price) * 100
+            if persistence_backend is not None and last_date is not None:
+                try:
+                    await persistence_backend.upsert_symbol_freshness(
+                        symbol=sym,
+                        last_fetched=datetime.now().strftime("%Y-%m-%d"),
+                        data_recency=last_date
+                    )
+                except Exception as e:
+                    logger.warning("upsert_symbol_freshness failed for %s: %s", sym, e)
 
-                            if h in horizons:
-                                setattr(res, f"return_{h}d", round(ret, 2))
-                                setattr(res, f"exit_price_{h}d", round(exit_price, 2))
-                                agg[h]["sum"] += round(ret, 2)
-                                agg[h]["count"] += 1
-                                if ret > 0:
-                                    agg[h]["wins"] += 1
+        if engine != "loop":
+            pending_by_symbol = {}
+            for i, p_sig in enumerate(parsed_signals):
+                if p_sig["status"] != "Valid" or i in precached:
+                    continue
+                pending.add(i)
+                pending_by_symbol.setdefault(p_sig["resolved"], []).append(
+                    (i, p_sig["signal_date"], p_sig["start_date"], p_sig["end_date"])
+                )
 
-                # Max High/Low in Duration
-                window_end = entry_date + duration_delta
-                window_df = df[entry_date:window_end]
-
-                if not window_df.empty:
-                    max_high = window_df["High"].max()
-                    max_low = window_df["Low"].min()
-                    if pd.notna(max_high):
-                        res.max_high_90d = round(max_high, 2)
-                        max_high_idx = window_df["High"].idxmax()
-                        if pd.notna(max_high_idx):
-                            res.max_high_date = max_high_idx.strftime("%Y-%m-%d")
-                    if pd.notna(max_low):
-                        res.max_low_90d = round(max_low, 2)
-                        max_low_idx = window_df["Low"].idxmin()
-                        if pd.notna(max_low_idx):
-                            res.max_low_date = max_low_idx.strftime("%Y-%m-%d")
-
-                DataProvider.set_cached_result(row_hash, res.model_dump())
-
-            # Aggregation for cached results (computed results already updated above)
-            if cached_result is not None:
-                for h in horizons:
-                    ret = getattr(res, f"return_{h}d", None)
-                    if ret is not None:
-                        agg[h]["sum"] += ret
-                        agg[h]["count"] += 1
-                        if ret > 0:
-                            agg[h]["wins"] += 1
-
-            # Online best/worst tracking (shared: both cached and computed)
-            ret_90 = res.return_90d
-            if ret_90 is not None:
-                if best_performer is None or ret_90 > getattr(best_performer, "return_90d", -999):
-                    best_performer = res
-                if worst_performer is None or ret_90 < getattr(worst_performer, "return_90d", 999):
-                    worst_performer = res
-
-            results.append(res)
-            batch_results.append(res)
-            if len(batch_results) >= Limits.BATCH_SIZE:
-                await _flush_batch()
+            engine_horizons = list(horizons)
+            fallback_symbols = set()
+            if engine == "process" and len(pending) >= Engine.PROCESS_MIN_SIGNALS:
+                # Workers read the market store directly: let every download land first
+                await asyncio.gather(*fetch_tasks)
+                shards = _build_shards(pending_by_symbol, Engine.PROCESS_WORKERS * 4)
+                logger.info("Phase C — Sharding %d signals / %d symbols into %d shards (%d workers)",
+                            len(pending), len(pending_by_symbol), len(shards), Engine.PROCESS_WORKERS)
+                loop = asyncio.get_running_loop()
+                pool = _get_process_pool()
+                futures = [
+                    loop.run_in_executor(pool, _compute_shard, shard, entry_mode, duration, engine_horizons, span)
+                    for shard in shards
+                ]
+                for done_shards, fut in enumerate(asyncio.as_completed(futures), start=1):
+                    try:
+                        shard_rows = await fut
+                    except Exception:
+                        # Whatever a failed shard left uncomputed is picked up in-process below
+                        logger.warning("Phase C — shard worker failed", exc_info=True)
+                        shard_rows = {}
+                    for sym, (rows, last_date) in shard_rows.items():
+                        await _store_rows(sym, rows, last_date)
+                    if progress_callback:
+                        await _progress(total + num_chunks + cursor,
+                                        f"Computed shard {done_shards}/{len(shards)}")
+                    await _drain()
+                pending_by_symbol = {
+                    sym: items for sym, items in pending_by_symbol.items()
+                    if any(item[0] not in vector_results for item in items)
+                }
+                fallback_symbols = set(pending_by_symbol)
+
+            # Consume symbols in the order their downloads land (file order within a request)
+            remaining = set(pending_by_symbol)
+            sym_i = 0
+            while remaining:
+                sym = await ready_queue.get()
+                if sym not in remaining:
+                    continue
+                remaining.discard(sym)
+                items = pending_by_symbol[sym]
+                if progress_callback and sym_i % Limits.PROGRESS_THROTTLE_EVERY_N == 0:
+                    await _progress(total + num_chunks + cursor,
+                                    f"Computing {sym} ({len(items)} signals)...")
+                sym_i += 1
+                timeout = Engine.FALLBACK_TIMEOUT_SEC if sym in fallback_symbols else Engine.SYMBOL_TIMEOUT_SEC
+                try:
+                    rows, last_date = await asyncio.wait_for(asyncio.to_thread(
+                        Backtester._compute_symbol_vectorized,
+                        sym, items, entry_mode, duration, engine_horizons, span
+                    ), timeout=timeout)
+                except asyncio.TimeoutError:
+                    # Hand the symbol's signals to the per-signal path instead of failing the run
+                    logger.warning("Phase C — %s timed out after %.0fs, computing its %d signals per signal",
+                                   sym, timeout, len(items))
+                    pending.difference_update(item[0] for item in items)
+                    fallback_count += 1
+                except Exception:
+                    # One symbol's failure must not abort the run; the per-signal path reports it per row
+                    logger.warning("Phase C — vectorized compute failed for %s, computing its %d signals per signal",
+                                   sym, len(items), exc_info=True)
+                    pending.difference_update(item[0] for item in items)
+                    fallback_count += 1
+                else:
+                    await _store_rows(sym, rows, last_date)
+                await _drain()
 
+        await _drain()
         await _flush_batch()
+        await asyncio.gather(*fetch_tasks, *meta_tasks.values(), return_exceptions=True)
+        try:
+            await asyncio.to_thread(symbol_master.save)
+        except Exception:
+            logger.warning("Symbol master save failed (non-blocking)", exc_info=True)
         phase_c_time = time.monotonic() - phase_c_start
-        logger.info("Phase C completed — %d signals computed, %d fallbacks, elapsed=%.2fs",
-                    len(parsed_signals), fallback_count, phase_c_time)
+        logger.info("Phase B — Chunked fetch completed (%d/%d chunks with data), metadata for %d symbols "
+                    "(%d from API)", chunks_with_data, total_chunks, len(metadata_map), len(meta_tasks))
+        logger.info("Phase C completed — %d signals computed, %d fallbacks, elapsed=%.2fs "
+                    "(first trades streamed after %s)",
+                    len(parsed_signals), fallback_count, phase_c_time,
+                    f"{first_batch_at - phase_start:.2f}s" if first_batch_at is not None else "n/a")
+        if symbol_store.stats["loads"]:
+            logger.info("Phase C — symbol store: %d loads, %d hits, %d evictions, %.1f MB resident",
+                        symbol_store.stats["loads"], symbol_store.stats["hits"],
+                        symbol_store.stats["evictions"], symbol_store.nbytes / (1024 * 1024))
 
         # 5. Aggregate Report (single-pass aggregation)
-        successful = [r for r in results if r.status == "Success"]
-
-        report = BacktestReport(
-            total_signals=len(signals),
-            successful_signals=len(successful),
-            failed_signals=len(signals) - len(successful),
-            entry_mode=entry_mode,
-            trades=results
-        )
-
-        if successful:
-            for h in horizons:
-                a = agg[h]
-                if a["count"] > 0:
-                    setattr(report, f"avg_return_{h}d", round(a["sum"] / a["count"], 2))
-                    setattr(report, f"win_rate_{h}d", round((a["wins"] / a["count"]) * 100, 2))
-
-            report.best_performer = best_performer
-            report.worst_performer = worst_performer
+        statuses = buffer.column("status")
+        success_rows = [r for r, status in enumerate(statuses) if status == "Success"]
 
         total_time = time.monotonic() - phase_start
         status_counts = {}
-        for r in results:
-            status_counts[r.status] = status_counts.get(r.status, 0) + 1
+        for status in statuses:
+            status_counts[status] = status_counts.get(status, 0) + 1
         status_summary = ", ".join(f"{k}={v}" for k, v in sorted(status_counts.items()))
         logger.info(
             "Backtest complete — total=%d, successful=%d, failed=%d, elapsed=%.2fs | %s",
-            total, len(successful), total - len(successful), total_time, status_summary
+            total, len(success_rows), total - len(success_rows), total_time, status_summary
         )
 
-        report.cache_stats = DataProvider.get_cache_stats()
-        report.cache_source = "l3_compute"
-
         # ── Latest Price Integration ──────────────────────────────
-        if successful:
+        latest_price_date = None
+        if success_rows:
             try:
-                all_symbols = list(set(r.symbol for r in successful))
+                symbols = buffer.column("symbol")
+                all_symbols = list(set(symbols[r] for r in success_rows))
                 latest_prices = await asyncio.to_thread(DataProvider.get_latest_prices_batch, all_symbols)
                 latest_dates = []
-                for r in results:
-                    if r.status == "Success" and r.symbol in latest_prices:
-                        price, date_str = latest_prices[r.symbol]
-                        r.latest_price = price
-                        r.latest_price_date = date_str
-                        if price is not None and date_str is not None:
-                            latest_dates.append(date_str)
-                            if r.entry_price and r.entry_price > 0:
-                                r.latest_price_return = round(((price - r.entry_price) / r.entry_price) * 100, 2)
-                                logger.debug(
-                                    "[DIAG] latest_price_return for %s: price=%s, entry_price=%s, return=%s",
-                                    r.symbol, price, r.entry_price, r.latest_price_return
-                                )
-                            else:
-                                r.latest_price_return = None
-                                logger.debug(
-                                    "[DIAG] latest_price_return SKIPPED for %s: entry_price=%s (type=%s)",
-                                    r.symbol, r.entry_price, type(r.entry_price).__name__
-                                )
+                for r in success_rows:
+                    if symbols[r] not in latest_prices:
+                        continue
+                    price, date_str = latest_prices[symbols[r]]
+                    buffer.set(r, "latest_price", price)
+                    buffer.set(r, "latest_price_date", date_str)
+                    if price is not None and date_str is not None:
+                        latest_dates.append(date_str)
+                        entry_price = buffer.get(r, "entry_price")
+                        if entry_price and entry_price > 0:
+                            buffer.set(r, "latest_price_return", round(((price - entry_price) / entry_price) * 100, 2))
+                        else:
+                            buffer.set(r, "latest_price_return", None)
+                            logger.debug(
+                                "[DIAG] latest_price_return SKIPPED for %s: entry_price=%s",
+                                symbols[r], entry_price
+                            )
                 if latest_dates:
-                    report.latest_price_date = max(latest_dates)
+                    latest_price_date = max(latest_dates)
             except Exception:
                 logger.exception("Latest price integration failed (non-blocking)")
 
-        return report
-
-
-
-
+        # API boundary: materialize SignalResult objects once, from the columnar buffer
+        trades = buffer.to_models()
+        report = BacktestReport(
+            total_signals=len(signals),
+            successful_signals=len(success_rows),
+            failed_signals=len(signals) - len(success_rows),
+            entry_mode=entry_mode,
+            trades=trades,
+            latest_price_date=latest_price_date,
+        )
 
+        report.horizons = list(horizons)
+        if success_rows:
+            Backtester._aggregate_horizons(report, buffer, trades)
+        report.return_stats = [HorizonStats(**st) if st else None for st in sketches.summaries()]
+        report.return_sketches = sketches.to_dict()
 
+        report.cache_stats = DataProvider.get_cache_stats()
+        report.cache_stats.update({
+            "run_row_hash_lookups": row_hash_lookups,
+            "run_row_hash_hits": row_hash_hits,
+            "run_row_hash_hit_ratio": round(row_hash_hits / row_hash_lookups, 4) if row_hash_lookups else 0.0,
+        })
+        report.cache_stats.update({f"fetch_plan_{k}": v for k, v in plan_stats.items()})
+        report.cache_source = "l3_compute"
 
+        return report
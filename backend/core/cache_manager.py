@@ -0,0 +1,274 @@
+"""Namespaced diskcache shared by the whole backend.
+
+Each data class gets its own ``FanoutCache`` under ``DISKCACHE_DIR/<namespace>``
+with the size budget and eviction policy from ``CacheNamespaces.BUDGETS``.
+Culling one namespace never touches another, and writers from the fetch
+thread pools spread over the shards instead of queueing on one SQLite lock.
+diskcache gives each shard ``budget / shards`` bytes, so namespaces holding
+large entries (reports) use fewer shards (``CacheNamespaces.SHARDS``).
+A shard that stays locked past ``CacheNamespaces.TIMEOUT_SEC`` drops the op
+(a miss on read, no write), which every caller already treats as a cold cache.
+Dropped writes are logged and counted in ``stats()``, and evict the key from
+the hot tier so memory never serves a value disk does not hold.
+
+In front of every namespace sits a byte-bounded in-process LRU
+(``CacheNamespaces.MEMORY_MB``), written through on ``set`` and filled on disk
+hits, so a hot key costs a dict lookup instead of a SQLite read and an unpickle.
+Hot entries expire with their disk TTL, and after ``MEMORY_MAX_AGE_SEC`` at most.
+"""
+import logging
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+from diskcache import FanoutCache
+
+from ..config import CacheNamespaces, Paths
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+_MISSING = object()
+_IMMUTABLE = (str, int, float, bool, bytes, type(None))
+
+
+def _is_immutable(value) -> bool:
+    if isinstance(value, tuple):
+        return all(isinstance(v, _IMMUTABLE) for v in value)
+    return isinstance(value, _IMMUTABLE)
+
+
+def _estimate_size(value) -> int:
+    """In-memory bytes of an immutable value (a scalar or a flat tuple of scalars)."""
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class TieredCache:
+    """A ``FanoutCache`` behind an in-process LRU of at most ``memory_bytes``.
+
+    Immutable values (latest-price tuples, resolved tickers, flags) are kept
+    as objects and sized by estimate, never pickled. Anything else is pickled
+    once into the hot tier and unpickled per hit, so callers that mutate a
+    cached row result cannot change what the next caller reads. Entries
+    bigger than a quarter of the budget stay on disk only.
+    """
+
+    def __init__(self, disk, memory_bytes: int, max_age: float = CacheNamespaces.MEMORY_MAX_AGE_SEC):
+        self.disk = disk
+        self.memory_bytes = memory_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # key -> (value or pickled bytes, pickled?, size, expires_at monotonic)
+        self._hot: "OrderedDict[object, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0,
+                       "dropped_writes": 0}
+
+    def _drop(self, key):
+        entry = self._hot.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _remember(self, key, value, expire_time):
+        """Put ``value`` in the hot tier; ``expire_time`` is the disk expiry (epoch seconds or None)."""
+        if self.memory_bytes <= 0:
+            return
+        immutable = _is_immutable(value)
+        if immutable:
+            stored, size = value, _estimate_size(value)
+        else:
+            try:
+                stored = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                return
+            size = len(stored)
+        ttl = self.max_age if expire_time is None else min(self.max_age, expire_time - time.time())
+        with self._lock:
+            self._drop(key)
+            if size > self.memory_bytes // 4 or ttl <= 0:
+                return
+            self._hot[key] = (stored, not immutable, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.memory_bytes:
+                _, evicted = self._hot.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._stats["memory_evictions"] += 1
+
+    def _lookup(self, key):
+        """Value from the hot tier, then disk; ``_MISSING`` when neither has it."""
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                if time.monotonic() < entry[3]:
+                    self._hot.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    stored, pickled = entry[0], entry[1]
+                    return pickle.loads(stored) if pickled else stored
+                self._drop(key)
+        # (value, expire_time) on a hit or miss; the bare default when the shard timed out
+        found = self.disk.get(key, default=_MISSING, expire_time=True)
+        value, expire_time = (_MISSING, None) if found is _MISSING else found
+        if value is _MISSING:
+            with self._lock:
+                self._stats["misses"] += 1
+            return _MISSING
+        with self._lock:
+            self._stats["disk_hits"] += 1
+        self._remember(key, value, expire_time)
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def set(self, key, value, expire=None) -> bool:
+        """Write through to disk; the hot tier only ever holds what disk holds."""
+        stored = self.disk.set(key, value, expire=expire)
+        if not stored:
+            # A hot-only entry would diverge from disk (and from other processes): forget the key
+            with self._lock:
+                self._drop(key)
+                self._stats["dropped_writes"] += 1
+            logger.warning("Cache write dropped for %r — shard stayed locked past %.2fs",
+                           key, self.disk.timeout)
+            return False
+        self._remember(key, value, None if expire is None else time.time() + expire)
+        return True
+
+    def _shard_of(self, key):
+        return self.disk._shards[self.disk._hash(key) % self.disk._count]
+
+    def get_many(self, keys) -> dict:
+        """``{key: value}`` for the keys found, hot tier first.
+
+        Disk reads are plain per-key selects and take no lock, so a bulk lookup
+        never holds up the writers on other shards.
+        """
+        found = {}
+        for key in keys:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, items: dict, expire=None):
+        """Write ``items`` with one transaction per shard they hash to.
+
+        Each transaction locks only its own shard, unlike ``FanoutCache.transact``
+        which takes all of them for the length of the batch.
+        """
+        by_shard = {}
+        for key, value in items.items():
+            shard = self._shard_of(key)
+            by_shard.setdefault(id(shard), (shard, {}))[1][key] = value
+        expire_time = None if expire is None else time.time() + expire
+        for shard, batch in by_shard.values():
+            with shard.transact(retry=True):
+                stored = [key for key, value in batch.items() if shard.set(key, value, expire=expire)]
+            for key in stored:
+                self._remember(key, batch[key], expire_time)
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            self._drop(key)
+        return self.disk.delete(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._drop(key)
+        del self.disk[key]
+
+    def transact(self):
+        return self.disk.transact()
+
+    def clear(self) -> int:
+        with self._lock:
+            self._hot.clear()
+            self._bytes = 0
+        return self.disk.clear()
+
+    def __iter__(self):
+        return iter(self.disk)
+
+    def __len__(self) -> int:
+        return len(self.disk)
+
+    def volume(self) -> int:
+        return self.disk.volume()
+
+    def close(self):
+        self.disk.close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(memory_entries=len(self._hot), memory_mb=round(self._bytes / _MB, 2))
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        below = lookups - stats["memory_hits"]
+        stats["memory_hit_ratio"] = round(stats["memory_hits"] / lookups, 3) if lookups else None
+        stats["disk_hit_ratio"] = round(stats["disk_hits"] / below, 3) if below else None
+        return stats
+
+
+class CacheManager:
+    def __init__(self, root: str, budgets: Dict[str, Tuple[int, str]],
+                 memory_mb: Dict[str, int] = CacheNamespaces.MEMORY_MB,
+                 shards: Dict[str, int] = CacheNamespaces.SHARDS, timeout: float = CacheNamespaces.TIMEOUT_SEC):
+        self.root = Path(root)
+        self.budgets = dict(budgets)
+        self.memory_mb = dict(memory_mb)
+        self.shards = dict(shards)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._caches: Dict[str, TieredCache] = {}
+
+    def namespace(self, name: str) -> TieredCache:
+        """The cache for ``name``; opened on first use."""
+        if name not in self.budgets:
+            raise KeyError(f"unknown cache namespace {name!r}")
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                size_mb, policy = self.budgets[name]
+                disk = FanoutCache(str(self.root / name), shards=self.shards.get(name, 1),
+                                   timeout=self.timeout, size_limit=size_mb * _MB, eviction_policy=policy)
+                cache = TieredCache(disk, self.memory_mb.get(name, 0) * _MB)
+                self._caches[name] = cache
+        return cache
+
+    def stats(self) -> dict:
+        """Disk use against budget and per-tier hit ratios for every namespace opened so far."""
+        with self._lock:
+            opened = dict(self._caches)
+        return {name: {"size_mb": round(cache.volume() / _MB, 1),
+                       "limit_mb": self.budgets[name][0],
+                       "eviction_policy": self.budgets[name][1],
+                       "shards": self.shards.get(name, 1),
+                       **cache.snapshot()}
+                for name, cache in opened.items()}
+
+    def close(self):
+        """Close every shard's SQLite connection; the next access reopens it."""
+        with self._lock:
+            opened = list(self._caches.values())
+        for cache in opened:
+            cache.close()
+
+
+caches = CacheManager(Paths.DISKCACHE_DIR, CacheNamespaces.BUDGETS)
@@ -1,14 +1,21 @@
 import logging
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
 from typing import Optional
 
-import yfinance as yf
 import pandas as pd
-from diskcache import Cache
 from datetime import datetime, timedelta
 
-from ..config import Paths, CacheTTL, Limits
+from .cache_manager import caches
+from .fetch_controller import yf_controller
+from .latest_prices import LatestPriceRefresher
+from .market_source import get_source
+from .market_store import MarketStore
+from .symbol_master import symbol_master
+from ..utils.single_flight import InFlight
+from ..config import CacheTTL, LatestPrices, Limits
 
 logger = logging.getLogger(__name__)
 
@@ -27,26 +34,108 @@ def _yf_retry(fn, *args, max_retries=3, **kwargs):
             time.sleep(delay)
     return None
 
-cache = Cache(Paths.CACHE_DIR, size_limit=CacheTTL.DISKCACHE_SIZE_LIMIT_MB * 1024 * 1024)
+def _split_bulk(df: pd.DataFrame, symbols: list) -> dict:
+    """Per-symbol tz-naive frames of a ``yf.download(group_by='ticker')`` result."""
+    if df is None or df.empty:
+        return {}
+    if isinstance(df.columns, pd.MultiIndex):
+        present = set(df.columns.get_level_values(0))
+        frames = {sym: df[sym].dropna(how='all') for sym in symbols if sym in present}
+    elif len(symbols) == 1:
+        frames = {symbols[0]: df}
+    else:
+        return {}
+    for sym, frame in frames.items():
+        if frame.index.tz is not None:
+            frames[sym] = frame.tz_localize(None)
+    return frames
+
+
+def _usable_frames(df: pd.DataFrame, symbols: list) -> dict:
+    """``_split_bulk`` limited to symbols that actually have Close data."""
+    return {sym: frame for sym, frame in _split_bulk(df, symbols).items()
+            if not frame.empty and "Close" in frame.columns and frame["Close"].notna().any()}
+
+
+def _last_close(df: Optional[pd.DataFrame]) -> Optional[tuple]:
+    """``(close, date_str)`` of a frame's last row, or None when there is no positive close."""
+    if df is None or df.empty:
+        return None
+    last_row = df.iloc[-1]
+    price = float(last_row.get('Close', last_row.get('close', 0)))
+    last_idx = df.index[-1]
+    date_str = last_idx.strftime('%Y-%m-%d') if hasattr(last_idx, 'strftime') else str(last_idx)[:10]
+    return (price, date_str) if price and price > 0 else None
+
+
+class _RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float) -> bool:
+        """Wait for a slot; False when it would only come after ``deadline``."""
+        with self._lock:
+            slot = max(self._next, time.monotonic())
+            if slot >= deadline:
+                return False
+            self._next = slot + self._interval
+        time.sleep(max(0.0, slot - time.monotonic()))
+        return True
+
+
+def _gather_until(fn, items: list, workers: int, deadline: float) -> dict:
+    """Run ``fn(item)`` (each returning a dict) on a thread pool; merge what finishes by ``deadline``."""
+    merged = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = [pool.submit(fn, item) for item in items]
+        for fut in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            merged.update(fut.result())
+    except FuturesTimeout:
+        pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return merged
+
+
+_inflight = InFlight()
+
+cache = caches.namespace("market")
+_row_cache = caches.namespace("rows")
 
 CACHE_VERSION = "v1"
 
-class DataProvider:
-    _cache_stats = {"bulk_hits": 0, "row_hash_misses": 0}
-    @staticmethod
-    def _data_key(symbol: str) -> str:
-        return f"sd_{CACHE_VERSION}_{symbol}"
+# An all-empty bulk answer over a window this short is a market holiday, not a bad ticker
+_NO_DATA_WINDOW_DAYS = 7
+
+# A persisted slice starting/ending within this many calendar days of the stored
+# range extends it (weekends + a holiday), rather than replacing it.
+_ADJACENT_DAYS = 5
 
+class DataProvider:
+    _cache_stats = {"bulk_hits": 0, "gap_fetches": 0, "coalesced_bars": 0, "coalesced_latest": 0,
+                    "bisected_chunks": 0, "bisect_calls": 0, "bisect_stopped": 0, "bad_symbols_marked": 0, "bad_symbols_skipped": 0,
+                    "latest_deadline_hits": 0, "symbol_master_hits": 0, "symbol_master_misses": 0,
+                    "row_hash_hits": 0, "row_hash_misses": 0}
     @staticmethod
-    def _range_key(symbol: str) -> str:
-        return f"sr_{CACHE_VERSION}_{symbol}"
+    def _ttl_for(end) -> int:
+        end_dt = pd.to_datetime(end)
+        if end_dt.tz is not None:
+            end_dt = end_dt.tz_localize(None)
+        is_recent = (datetime.now() - end_dt).days < CacheTTL.RECENT_CUTOFF_DAYS
+        return CacheTTL.TICKER_DATA_RECENT if is_recent else CacheTTL.TICKER_DATA_HISTORICAL
 
     @staticmethod
     def persist_symbol_data(symbol: str, df: pd.DataFrame):
-        """Cache per-symbol data with date range metadata.
+        """Store per-symbol data in the columnar market store.
 
         Called after bulk fetch to persist each symbol's slice.
-        Skipped if existing cache already covers a wider range.
+        Skipped if the stored file already covers a wider range; merged into
+        it when the slice overlaps or adjoins the stored range.
         """
         if df is None or df.empty:
             return
@@ -54,8 +143,7 @@ class DataProvider:
         if df.index.tz is not None:
             df = df.copy()
             df.index = df.index.tz_localize(None)
-        rkey = DataProvider._range_key(symbol)
-        existing = cache.get(rkey)
+        existing = MarketStore.coverage(symbol)
         actual_start = df.index[0]
         actual_end = df.index[-1]
 
@@ -74,62 +162,119 @@ class DataProvider:
                     cache.set(f"{symbol}_latest_price", (float(last_close), date_str),
                               expire=CacheTTL.LATEST_PRICE)
 
+        ttl = DataProvider._ttl_for(actual_end)
         if existing is not None:
             cached_start, cached_end = existing
-            if hasattr(cached_start, 'tz') and cached_start.tz is not None:
-                cached_start = cached_start.tz_localize(None)
-            if hasattr(cached_end, 'tz') and cached_end.tz is not None:
-                cached_end = cached_end.tz_localize(None)
             if cached_start <= actual_start and cached_end >= actual_end:
                 return
-        dkey = DataProvider._data_key(symbol)
-        end_dt = actual_end if isinstance(actual_end, datetime) else pd.to_datetime(actual_end)
-        if hasattr(end_dt, 'tz') and end_dt.tz is not None:
-            end_dt = end_dt.tz_localize(None)
-        is_recent = (datetime.now() - end_dt).days < CacheTTL.RECENT_CUTOFF_DAYS
-        ttl = CacheTTL.TICKER_DATA_RECENT if is_recent else CacheTTL.TICKER_DATA_HISTORICAL
-        cache.set(dkey, df, expire=ttl)
-        cache.set(rkey, (actual_start, actual_end), expire=ttl)
+            # Overlapping / adjoining slice: extend the stored series instead of replacing it
+            slack = pd.Timedelta(days=_ADJACENT_DAYS)
+            if actual_start <= cached_end + slack and actual_end >= cached_start - slack:
+                ttl = DataProvider._ttl_for(max(actual_end, cached_end))
+                merged_start, merged_end = MarketStore.merge(symbol, df, expire=ttl)
+                logger.debug("persist_symbol_data — extended %s to [%s to %s] ttl=%ds",
+                             symbol, merged_start.date(), merged_end.date(), ttl)
+                return
+        MarketStore.write(symbol, df, expire=ttl)
 
-        logger.debug("persist_symbol_data — cached %s [%s to %s] ttl=%ds",
+        logger.debug("persist_symbol_data — stored %s [%s to %s] ttl=%ds",
                      symbol, actual_start.date(), actual_end.date(), ttl)
 
+    @staticmethod
+    def persist_bulk_slices(symbols: list, bulk_df: pd.DataFrame, label: str = "bulk"):
+        """Persist each symbol's slice of one ``get_bulk_ticker_data`` result.
+
+        ``label`` names the request in debug logs. A slice that fails to store
+        is logged and skipped; the symbol is fetched again on its next miss.
+        """
+        for sym in symbols:
+            try:
+                if isinstance(bulk_df.columns, pd.MultiIndex):
+                    if sym in bulk_df.columns.get_level_values(0):
+                        slice_df = bulk_df[sym].dropna(how='all')
+                        if not slice_df.empty:
+                            DataProvider.persist_symbol_data(sym, slice_df)
+                    else:
+                        logger.debug("persist_bulk_slices — %s: %s not in data, skipping cache", label, sym)
+                else:
+                    DataProvider.persist_symbol_data(sym, bulk_df.copy())
+            except Exception:
+                logger.debug("persist_bulk_slices — %s: failed to cache slice for %s", label, sym, exc_info=True)
+
+    @staticmethod
+    def _fetch_history(symbol: str, start, end) -> pd.DataFrame:
+        df = _yf_retry(lambda: get_source().history(symbol, start=start, end=end))
+        # Normalize tz-aware index (from yfinance) to tz-naive before caching
+        if not df.empty and df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        return df
+
     @staticmethod
     def get_ticker_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """
         Fetches historical data for a symbol with range-aware caching.
-        Checks per-symbol cache first; if cached range covers requested,
-        returns a slice. Otherwise fetches full range and caches it.
+        Checks the symbol's market-store file first; if its range covers the
+        request, returns a slice. If it covers part of the request, only the
+        missing head/tail windows are fetched and merged into the stored
+        series. Otherwise fetches the range and stores it.
         """
-        # Legacy exact-range key (backward compat — versioned to avoid stale adjusted data)
-        legacy_key = f"{symbol}_{start_date}_{end_date}_v{CACHE_VERSION}"
-        if legacy_key in cache:
-            return cache[legacy_key]
-
-        # Per-symbol wide cache with range check
-        rkey = DataProvider._range_key(symbol)
-        range_meta = cache.get(rkey)
-        if range_meta is not None:
-            dkey = DataProvider._data_key(symbol)
-            df_cached = cache.get(dkey)
+        req_start = pd.to_datetime(start_date)
+        req_end = pd.to_datetime(end_date)
+        gaps = MarketStore.gaps(symbol, req_start, req_end)
+        if gaps == []:
+            df_cached = MarketStore.read(symbol, req_start, req_end)
             if df_cached is not None:
-                cached_start, cached_end = range_meta
-                if hasattr(cached_start, 'tz') and cached_start.tz is not None:
-                    cached_start = cached_start.tz_localize(None)
-                if hasattr(cached_end, 'tz') and cached_end.tz is not None:
-                    cached_end = cached_end.tz_localize(None)
-                req_start = pd.to_datetime(start_date)
-                req_end = pd.to_datetime(end_date)
-                if cached_start <= req_start and cached_end >= req_end:
-                    logger.debug("get_ticker_data — cache HIT for %s (range %s to %s)",
-                                 symbol, cached_start.date(), cached_end.date())
-                    DataProvider._cache_stats["bulk_hits"] += 1
-                    return df_cached.loc[str(req_start):str(req_end)]
+                logger.debug("get_ticker_data — cache HIT for %s (%s to %s)",
+                             symbol, req_start.date(), req_end.date())
+                DataProvider._cache_stats["bulk_hits"] += 1
+                return df_cached
+
+        if not DataProvider._skip_bad([symbol]):
+            return pd.DataFrame()
+
+        # Single-flight: another thread fetching this symbol over a covering range serves us too
+        owned, waiting = _inflight.claim("bars", [symbol], req_start, req_end)
+        if waiting:
+            values, timed_out = _inflight.wait(waiting, Limits.SINGLE_FLIGHT_WAIT_SEC)
+            # None: the leader raised, or its bulk download had nothing for us; fetch it ourselves
+            if not timed_out and values[symbol] is not None:
+                DataProvider._cache_stats["coalesced_bars"] += 1
+                df = values[symbol]
+                return df if df.empty else df.loc[str(req_start):str(req_end)]
+        df = None
+        try:
+            df = DataProvider._fetch_and_store(symbol, start_date, end_date, gaps)
+            return df
+        finally:
+            _inflight.release("bars", owned, {symbol: df})
+
+    @staticmethod
+    def _fetch_and_store(symbol: str, start_date: str, end_date: str, gaps) -> pd.DataFrame:
+        req_start = pd.to_datetime(start_date)
+        req_end = pd.to_datetime(end_date)
+        if gaps:
+            logger.debug("get_ticker_data — partial HIT for %s, fetching %d gap(s)", symbol, len(gaps))
+            parts = []
+            for gap_start, gap_end in gaps:
+                try:
+                    parts.append(DataProvider._fetch_history(
+                        symbol, gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d")))
+                except Exception:
+                    # Serve what is stored; the gap is retried on the next request
+                    logger.warning("get_ticker_data — gap fetch failed for %s [%s to %s]",
+                                   symbol, gap_start.date(), gap_end.date(), exc_info=True)
+            DataProvider._cache_stats["gap_fetches"] += len(gaps)
+            parts = [p for p in parts if not p.empty]
+            if parts:
+                MarketStore.merge(symbol, pd.concat(parts), expire=DataProvider._ttl_for(end_date))
+            df_cached = MarketStore.read(symbol, req_start, req_end)
+            if df_cached is not None:
+                return df_cached
 
         # Fetch from yfinance
         logger.debug("Fetching %s from yfinance", symbol)
         try:
-            df = _yf_retry(lambda: yf.Ticker(symbol).history(start=start_date, end=end_date, auto_adjust=False))
+            df = DataProvider._fetch_history(symbol, start_date, end_date)
         except Exception:
             logger.warning("get_ticker_data — yfinance failure for %s after retries", symbol, exc_info=True)
             return pd.DataFrame()
@@ -137,23 +282,7 @@ class DataProvider:
         if df.empty:
             return df
 
-        # Normalize tz-aware index (from yfinance) to tz-naive before caching
-        if df.index.tz is not None:
-            df.index = df.index.tz_localize(None)
-
-        # Cache with range metadata
-        dkey = DataProvider._data_key(symbol)
-        rkey = DataProvider._range_key(symbol)
-        actual_start = df.index[0]
-        actual_end = df.index[-1]
-        cache.set(dkey, df)
-        cache.set(rkey, (actual_start, actual_end))
-        end_dt = end_date if isinstance(end_date, datetime) else pd.to_datetime(end_date)
-        if hasattr(end_dt, 'tz') and end_dt.tz is not None:
-            end_dt = end_dt.tz_localize(None)
-        is_recent = (datetime.now() - end_dt).days < CacheTTL.RECENT_CUTOFF_DAYS
-        ttl = CacheTTL.TICKER_DATA_RECENT if is_recent else CacheTTL.TICKER_DATA_HISTORICAL
-        cache.set(legacy_key, df, expire=ttl)
+        MarketStore.write(symbol, df, expire=DataProvider._ttl_for(end_date))
         return df
 
     @staticmethod
@@ -167,58 +296,206 @@ class DataProvider:
         # Isolates: network errors, rate limiting, bad-symbol batch poisoning,
         #           temporary outages. yf.download may fail entirely if any single
         #           symbol is invalid (depends on yfinance version).
-        # Recovery: return empty DataFrame → caller falls back to per-symbol
-        #           sequential fetch, isolating the bad symbol from the rest.
-        logger.info("Fetching bulk data for %d symbols from yfinance", len(symbols))
+        # Recovery: failed or partially empty chunks are bisected until the bad
+        #           symbol is isolated; confirmed-bad symbols are remembered for
+        #           CacheTTL.BAD_SYMBOL and skipped. Whatever is still missing
+        #           falls back to per-symbol fetches in the caller.
+        symbols = DataProvider._skip_bad(symbols)
+        if not symbols:
+            return pd.DataFrame()
+        # Single-flight: symbols another request is already downloading over a
+        # covering range are taken from that download instead of fetched again.
+        owned, waiting = _inflight.claim("bars", symbols, start_date, end_date)
+        df = pd.DataFrame()
+        frames = {}
         try:
-            df = _yf_retry(lambda: yf.download(
-                tickers=symbols,
-                start=start_date,
-                end=end_date,
-                auto_adjust=False,
-                group_by='ticker',
-                progress=False,
-                threads=True
-            ))
+            if owned:
+                df = DataProvider._download_bars(list(owned), start_date, end_date)
+                frames = _split_bulk(df, list(owned))
+        finally:
+            _inflight.release("bars", owned, frames)
+        if not waiting:
             return df
+
+        values, timed_out = _inflight.wait(waiting, Limits.SINGLE_FLIGHT_WAIT_SEC)
+        DataProvider._cache_stats["coalesced_bars"] += len(values)
+        if timed_out:
+            frames.update(_split_bulk(DataProvider._download_bars(timed_out, start_date, end_date), timed_out))
+        lo, hi = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        for sym, frame in values.items():
+            if frame is not None and not frame.empty:
+                frames[sym] = frame[(frame.index >= lo) & (frame.index < hi)]
+        frames = {sym: frame for sym, frame in frames.items() if frame is not None and not frame.empty}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    @staticmethod
+    def _download_once(symbols: list, start_date: str, end_date: str, max_retries: int = 3) -> tuple:
+        """One (retried) bulk download: ``(df, failed)``."""
+        try:
+            df = _yf_retry(lambda: yf_controller.run(
+                "bulk", symbols, lambda: get_source().download(symbols, start=start_date, end=end_date)),
+                max_retries=max_retries)
+            return df, False
         except Exception:
             logger.warning("get_bulk_ticker_data — yfinance failure for %d symbols after retries", len(symbols), exc_info=True)
-            return pd.DataFrame()
+            return pd.DataFrame(), True
+
+    @staticmethod
+    def _download_bars(symbols: list, start_date: str, end_date: str) -> pd.DataFrame:
+        logger.info("Fetching bulk data for %d symbols from yfinance", len(symbols))
+        df, failed = DataProvider._download_once(symbols, start_date, end_date)
+        frames = _usable_frames(df, symbols)
+        missing = [sym for sym in symbols if sym not in frames]
+        if not missing or len(symbols) == 1:
+            return df
+        # A whole-chunk failure, or a chunk missing only some symbols, usually means one
+        # bad ticker poisoned it. An all-empty answer over a short window is just a
+        # market holiday.
+        short_window = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days <= _NO_DATA_WINDOW_DAYS
+        if not failed and len(missing) == len(symbols) and short_window:
+            return df
+        DataProvider._cache_stats["bisected_chunks"] += 1
+        isolated = []
+        frames.update(DataProvider._isolate(missing, start_date, end_date, isolated))
+        logger.info("get_bulk_ticker_data — bisected chunk of %d: recovered %d/%d missing symbols",
+                    len(symbols), len(missing) - len(isolated), len(missing))
+        # Nothing in the chunk came back at all: an outage, not a bad ticker
+        if frames:
+            for sym in isolated:
+                DataProvider._confirm_bad_symbol(sym)
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    @staticmethod
+    def _isolate(symbols: list, start_date: str, end_date: str, isolated: list) -> dict:
+        """Re-download ``symbols`` in halves until the ones without data are isolated.
+
+        Returns the usable per-symbol frames and appends the isolated symbols to ``isolated``.
+        When neither half returns any data (both raise or come back empty) the
+        endpoint is down rather than poisoned by one ticker: bisection stops there
+        and those symbols are left to the per-symbol fallback, unmarked.
+        """
+        if len(symbols) == 1:
+            isolated.append(symbols[0])
+            return {}
+        mid = len(symbols) // 2
+        halves = []
+        for half in (symbols[:mid], symbols[mid:]):
+            DataProvider._cache_stats["bisect_calls"] += 1
+            df, failed = DataProvider._download_once(half, start_date, end_date, max_retries=1)
+            halves.append((half, {} if failed else _usable_frames(df, half)))
+        if not any(frames for _, frames in halves):
+            DataProvider._cache_stats["bisect_stopped"] += 1
+            return {}
+        out = {}
+        for half, frames in halves:
+            out.update(frames)
+            missing = [sym for sym in half if sym not in frames]
+            if missing:
+                out.update(DataProvider._isolate(missing, start_date, end_date, isolated))
+        return out
+
+    @staticmethod
+    def _confirm_bad_symbol(symbol: str) -> bool:
+        """Probe the last month for an isolated symbol; remember it as bad when that comes back empty too."""
+        try:
+            probe = _yf_retry(lambda: get_source().history(symbol, period="1mo"), max_retries=1)
+        except Exception:
+            # A failing probe says nothing about the symbol
+            return False
+        if probe is not None and not probe.empty:
+            return False
+        cache.set(DataProvider._bad_symbol_key(symbol), True, expire=CacheTTL.BAD_SYMBOL)
+        DataProvider._cache_stats["bad_symbols_marked"] += 1
+        logger.info("Bad symbol %s — no data from Yahoo, skipped for %ds", symbol, CacheTTL.BAD_SYMBOL)
+        return True
+
+    @staticmethod
+    def _bad_symbol_key(symbol: str) -> str:
+        return f"bad_{CACHE_VERSION}_{symbol}"
+
+    @staticmethod
+    def is_bad_symbol(symbol: str) -> bool:
+        return cache.get(DataProvider._bad_symbol_key(symbol)) is not None
+
+    @staticmethod
+    def _skip_bad(symbols: list) -> list:
+        kept = [sym for sym in symbols if not DataProvider.is_bad_symbol(sym)]
+        DataProvider._cache_stats["bad_symbols_skipped"] += len(symbols) - len(kept)
+        return kept
 
     @staticmethod
     def get_ticker_info(symbol: str) -> dict:
         """
-        Fetches sector and market cap metadata for a symbol.
-        Uses a 7-day cache to aggressively minimize rate-limiting from Yahoo's .info endpoint.
+        Fetches sector and market cap (bucket) metadata for a symbol.
+        Answered from the local symbol master when it knows the symbol; otherwise
+        Yahoo's .info (behind a 7-day cache), whose answer then feeds the master.
         """
+        known = symbol_master.get(symbol)
+        if known is not None:
+            DataProvider._cache_stats["symbol_master_hits"] += 1
+            return known
+
         cache_key = f"{symbol}_info"
-        if cache_key in cache:
-            return cache[cache_key]
+        cached = cache.get(cache_key)
+        if cached is not None:
+            symbol_master.upsert({symbol: cached}, source="info")
+            return symbol_master.get(symbol) or cached
             
         logger.debug("Fetching metadata for %s from yfinance", symbol)
         result = {"sector": None, "marketCap": None}
         
         try:
-            info = _yf_retry(lambda: yf.Ticker(symbol).info)
+            info = _yf_retry(lambda: get_source().info(symbol))
             if info:
                 result["sector"] = info.get("sector")
                 result["marketCap"] = info.get("marketCap")
+                result["industry"] = info.get("industry")
             
             cache.set(cache_key, result, expire=CacheTTL.TICKER_INFO)
+            DataProvider._cache_stats["symbol_master_misses"] += 1
             
         except Exception:
             logger.warning("Failed to fetch metadata for %s after retries", symbol, exc_info=True)
             # Do not cache failures so they can be retried later, just return the empty result.
-            
-        return result
+            return result
+
+        symbol_master.upsert({symbol: result}, source="info")
+        return symbol_master.get(symbol) or {"sector": result["sector"], "marketCap": result["marketCap"]}
+
+    @staticmethod
+    def _row_hash_key(row_hash: str) -> str:
+        return f"rh_{CACHE_VERSION}_{row_hash}"
 
     @staticmethod
     def get_cached_result(row_hash: str) -> dict:
-        return cache.get(f"rh_{CACHE_VERSION}_{row_hash}")
+        return _row_cache.get(DataProvider._row_hash_key(row_hash))
 
     @staticmethod
     def set_cached_result(row_hash: str, result: dict):
-        cache.set(f"rh_{CACHE_VERSION}_{row_hash}", result, expire=CacheTTL.ROW_HASH)
+        _row_cache.set(DataProvider._row_hash_key(row_hash), result, expire=CacheTTL.ROW_HASH)
+
+    @staticmethod
+    def get_cached_results(row_hashes: list[str]) -> dict[str, dict]:
+        """Bulk row-hash lookup for a whole upload.
+
+        Duplicate hashes are read once and the reads take no write lock, so a
+        large upload does not stall the fetch threads writing to the same cache.
+        Returns only the hits: {row_hash: result}.
+        """
+        unique = list(dict.fromkeys(row_hashes))
+        keys = {DataProvider._row_hash_key(row_hash): row_hash for row_hash in unique}
+        found = {keys[key]: value for key, value in _row_cache.get_many(keys).items() if value is not None}
+        DataProvider._cache_stats["row_hash_hits"] += len(found)
+        DataProvider._cache_stats["row_hash_misses"] += len(unique) - len(found)
+        return found
+
+    @staticmethod
+    def set_cached_results(results: dict[str, dict]):
+        """Write many row-hash results, one shard transaction per ROW_HASH_BULK_CHUNK rows."""
+        items = [(DataProvider._row_hash_key(row_hash), result) for row_hash, result in results.items()]
+        chunk = Limits.ROW_HASH_BULK_CHUNK
+        for i in range(0, len(items), chunk):
+            _row_cache.set_many(dict(items[i:i + chunk]), expire=CacheTTL.ROW_HASH)
 
     @staticmethod
     def get_latest_price(symbol: str) -> float:
@@ -235,7 +512,7 @@ class DataProvider:
         # marked "Symbol Not Found"), but recovers on next run because symbol
         # resolution cache is per-request.
         try:
-            history = _yf_retry(lambda: yf.Ticker(symbol).history(period="1d"))
+            history = _yf_retry(lambda: get_source().history(symbol, period="1d"))
         except Exception:
             logger.warning("get_latest_price — yfinance failure for %s after retries", symbol, exc_info=True)
             return None
@@ -255,19 +532,29 @@ class DataProvider:
         This naturally handles the mid-day edge case — if market is open intraday,
         today's bar is not yet final so yesterday's close is returned.
         
-        Bulk fetch is chunked to avoid yfinance overload (same chunk size as Phase B).
-        Falls back to per-symbol yf.Ticker(s).history(period="5d") if bulk fails.
+        Bulk fetch is chunked to avoid yfinance overload (adaptive chunk size, see fetch_controller)
+        and chunks run in parallel. Falls back to rate-limited per-symbol
+        yf.Ticker(s).history(period="5d") if bulk fails. Whatever is not priced
+        within LatestPrices.DEADLINE_SEC comes back as (None, None).
         Updates a 5-min diskcache per symbol for fast repeat access.
         
         Returns {symbol: (close_price, date_str)}.
         On failure for any symbol: (None, None) — never throws.
+        A symbol another request is already fetching is awaited, not fetched again.
+        While the background refresher runs, symbols it holds are served from memory.
         """
-        from ..config import Limits
-        
-        result: dict[str, tuple[Optional[float], Optional[str]]] = {}
-        
         if not symbols:
-            return result
+            return {}
+        live, pending = latest_refresher.lookup(symbols)
+        result = DataProvider._latest_prices_uncached(pending) if pending else {}
+        latest_refresher.ingest(result)
+        result.update(live)
+        return result
+
+    @staticmethod
+    def _latest_prices_uncached(symbols: list[str]) -> dict[str, tuple[Optional[float], Optional[str]]]:
+        """get_latest_prices_batch without the live table: diskcache, market store, then yfinance."""
+        result: dict[str, tuple[Optional[float], Optional[str]]] = {}
         
         # Check diskcache first for each symbol (5min TTL)
         uncached = []
@@ -286,14 +573,12 @@ class DataProvider:
         # Handles re-upload (L1 HIT where Phase B was skipped) and cross-entry-mode scenarios.
         still_uncached = []
         for sym in uncached:
-            rkey = DataProvider._range_key(sym)
-            range_meta = cache.get(rkey)
-            if range_meta is not None:
-                _, cached_end = range_meta
+            coverage = MarketStore.coverage(sym)
+            if coverage is not None:
+                _, cached_end = coverage
                 days_since = (datetime.now() - cached_end).days
                 if days_since <= 3:
-                    dkey = DataProvider._data_key(sym)
-                    df_cached = cache.get(dkey)
+                    df_cached = MarketStore.read(sym, cached_end - timedelta(days=10), cached_end)
                     if df_cached is not None and not df_cached.empty and 'Close' in df_cached.columns:
                         valid_closes = df_cached['Close'].dropna()
                         if not valid_closes.empty:
@@ -311,63 +596,22 @@ class DataProvider:
         if not uncached:
             return result
         
-        # Chunked bulk fetch (same chunk size as Phase B)
-        chunk_size = Limits.BULK_FETCH_CHUNK
-        chunks = [uncached[i:i + chunk_size] for i in range(0, len(uncached), chunk_size)]
-        
-        for chunk in chunks:
-            try:
-                df = _yf_retry(lambda: yf.download(
-                    tickers=chunk,
-                    period="5d",
-                    auto_adjust=False,
-                    group_by='ticker',
-                    progress=False,
-                    threads=True
-                ))
-                
-                if df is not None and not df.empty:
-                    if len(chunk) == 1:
-                        sym = chunk[0]
-                        if not df.empty:
-                            last_row = df.iloc[-1]
-                            price = float(last_row.get('Close', last_row.get('close', 0)))
-                            date_str = df.index[-1].strftime('%Y-%m-%d') if hasattr(df.index[-1], 'strftime') else str(df.index[-1])[:10]
-                            if price and price > 0:
-                                entry = (price, date_str)
-                                result[sym] = entry
-                                cache.set(f"{sym}_latest_price", entry, expire=300)
-                    else:
-                        for sym in chunk:
-                            if sym in df.columns.get_level_values(0):
-                                sym_df = df[sym].dropna(how='all')
-                                if not sym_df.empty:
-                                    last_row = sym_df.iloc[-1]
-                                    price = float(last_row.get('Close', last_row.get('close', 0)))
-                                    date_str = sym_df.index[-1].strftime('%Y-%m-%d') if hasattr(sym_df.index[-1], 'strftime') else str(sym_df.index[-1])[:10]
-                                    if price and price > 0:
-                                        entry = (price, date_str)
-                                        result[sym] = entry
-                                        cache.set(f"{sym}_latest_price", entry, expire=300)
-            except Exception:
-                logger.warning("get_latest_prices_batch — bulk yfinance failed for %d symbols in chunk", len(chunk), exc_info=True)
-        
-        # Per-symbol fallback for symbols still uncached
-        still_missing = [s for s in uncached if s not in result or result[s] is None]
-        for sym in still_missing:
-            try:
-                hist = _yf_retry(lambda: yf.Ticker(sym).history(period="5d"))
-                if hist is not None and not hist.empty:
-                    last_row = hist.iloc[-1]
-                    price = float(last_row.get('Close', last_row.get('close', 0)))
-                    date_str = hist.index[-1].strftime('%Y-%m-%d') if hasattr(hist.index[-1], 'strftime') else str(hist.index[-1])[:10]
-                    if price and price > 0:
-                        entry = (price, date_str)
-                        result[sym] = entry
-                        cache.set(f"{sym}_latest_price", entry, expire=300)
-            except Exception:
-                logger.warning("get_latest_prices_batch — fallback failed for %s", sym, exc_info=True)
-        
+        # Single-flight: symbols another request is fetching right now are awaited, not re-fetched
+        owned, waiting = _inflight.claim("latest", DataProvider._skip_bad(uncached))
+        fetched = {}
+        try:
+            if owned:
+                fetched = DataProvider._fetch_latest_prices(list(owned))
+        finally:
+            _inflight.release("latest", owned, fetched)
+        result.update(fetched)
+        if waiting:
+            values, timed_out = _inflight.wait(waiting, Limits.SINGLE_FLIGHT_WAIT_SEC)
+            DataProvider._cache_stats["coalesced_latest"] += len(values)
+            result.update({sym: entry for sym, entry in values.items() if entry is not None})
+            if timed_out:
+                result.update(DataProvider._fetch_latest_prices(timed_out))
+
         # Ensure every input symbol has an entry
         for sym in symbols:
             if sym not in result:
@@ -375,6 +619,74 @@ class DataProvider:
         
         return result
 
+    @staticmethod
+    def _fetch_latest_prices(uncached: list[str], deadline_sec: Optional[float] = None) -> dict[str, tuple[float, str]]:
+        """yfinance part of get_latest_prices_batch: parallel chunked bulk download, then a
+        rate-limited per-symbol fallback. Returns whatever is priced by the deadline;
+        stragglers keep running and still warm the diskcache."""
+        result: dict[str, tuple[float, str]] = {}
+        if not uncached:
+            return result
+        deadline = time.monotonic() + (LatestPrices.DEADLINE_SEC if deadline_sec is None else deadline_sec)
+
+        # Chunk size adapts to how Yahoo is responding; the controller bounds downloads in flight
+        size = yf_controller.chunk_size("latest")
+        chunks = [uncached[i:i + size] for i in range(0, len(uncached), size)]
+        result.update(_gather_until(DataProvider._latest_chunk, chunks,
+                                    min(len(chunks), LatestPrices.FETCH_WORKERS), deadline))
+
+        # Per-symbol fallback for symbols still unpriced
+        still_missing = [s for s in uncached if result.get(s) is None]
+        if still_missing and time.monotonic() < deadline:
+            limiter = _RateLimiter(LatestPrices.FALLBACK_RATE_PER_SEC)
+            fallback = lambda sym: DataProvider._latest_single(sym, limiter, deadline)
+            result.update(_gather_until(fallback, still_missing,
+                                        min(len(still_missing), LatestPrices.FALLBACK_WORKERS), deadline))
+
+        if time.monotonic() >= deadline and len(result) < len(uncached):
+            DataProvider._cache_stats["latest_deadline_hits"] += 1
+            logger.warning("get_latest_prices_batch — deadline reached, %d/%d symbols priced",
+                           len(result), len(uncached))
+        return result
+
+    @staticmethod
+    def _latest_chunk(chunk: list[str]) -> dict[str, tuple[float, str]]:
+        """Bulk ``period="5d"`` download of one chunk: ``{symbol: (close, date_str)}``."""
+        priced = {}
+        try:
+            df = _yf_retry(lambda: yf_controller.run(
+                "latest", chunk, lambda: get_source().download(chunk, period="5d")))
+        except Exception:
+            logger.warning("get_latest_prices_batch — bulk yfinance failed for %d symbols in chunk", len(chunk), exc_info=True)
+            return priced
+        if df is None or df.empty:
+            return priced
+        if len(chunk) == 1:
+            frames = {chunk[0]: df}
+        else:
+            present = set(df.columns.get_level_values(0))
+            frames = {sym: df[sym].dropna(how='all') for sym in chunk if sym in present}
+        for sym, sym_df in frames.items():
+            entry = _last_close(sym_df)
+            if entry is not None:
+                priced[sym] = entry
+                cache.set(f"{sym}_latest_price", entry, expire=CacheTTL.LATEST_PRICE)
+        return priced
+
+    @staticmethod
+    def _latest_single(sym: str, limiter: "_RateLimiter", deadline: float) -> dict[str, tuple[float, str]]:
+        if not limiter.acquire(deadline):
+            return {}
+        try:
+            entry = _last_close(_yf_retry(lambda: get_source().history(sym, period="5d")))
+        except Exception:
+            logger.warning("get_latest_prices_batch — fallback failed for %s", sym, exc_info=True)
+            return {}
+        if entry is None:
+            return {}
+        cache.set(f"{sym}_latest_price", entry, expire=CacheTTL.LATEST_PRICE)
+        return {sym: entry}
+
     @staticmethod
     def check_and_set_refresh(symbol: str, cooldown_minutes: int = 5) -> bool:
         """Check if a symbol is due for refresh and mark it.
@@ -391,4 +703,19 @@ class DataProvider:
 
     @staticmethod
     def get_cache_stats() -> dict:
-        return dict(DataProvider._cache_stats)
+        stats = dict(DataProvider._cache_stats)
+        stats["inflight_fetches"] = _inflight.in_flight()
+        stats["fetch_controller"] = yf_controller.snapshot()
+        source = get_source()
+        stats["market_source"] = source.name
+        if hasattr(source, "snapshot"):
+            stats["replay"] = source.snapshot()
+        stats["latest_refresher"] = latest_refresher.snapshot()
+        stats["symbol_master_size"] = len(symbol_master)
+        stats["cache_namespaces"] = caches.stats()
+        return stats
+
+
+# Background re-pricing of recently used symbols; started and stopped by the app lifespan
+latest_refresher = LatestPriceRefresher(
+    lambda symbols: DataProvider._fetch_latest_prices(DataProvider._skip_bad(symbols)))
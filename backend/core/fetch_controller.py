@@ -0,0 +1,156 @@
+"""Adaptive chunk size and concurrency for yfinance bulk downloads (AIMD).
+
+Every ``yf.download`` call — Phase B bars, latest prices, symbol resolution —
+goes through one shared controller. Each call kind has its own chunk size;
+the number of downloads in flight is a single window shared by all kinds,
+since they all hit the same Yahoo endpoint.
+
+A call that raises, comes back mostly empty (Yahoo's usual answer when it
+throttles) or takes longer than the target latency halves its kind's chunk
+size and the shared window. Symbol resolution probes candidate tickers that
+mostly do not exist, so its empty results are not a throttling signal: only
+its errors and latency count. A clean call adds a fixed step to the chunk size;
+every few clean calls in a row widen the window by one.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List
+
+import pandas as pd
+
+from ..config import Adaptive, Limits
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_fraction(df: pd.DataFrame, symbols: List[str]) -> float:
+    """Share of ``symbols`` with no Close data in a ``yf.download(group_by='ticker')`` result."""
+    if not symbols:
+        return 0.0
+    if df is None or df.empty:
+        return 1.0
+    if not isinstance(df.columns, pd.MultiIndex):
+        return 0.0 if "Close" in df.columns and df["Close"].notna().any() else 1.0
+    present = set(df.columns.get_level_values(0))
+    empty = 0
+    for sym in symbols:
+        if sym not in present or "Close" not in df[sym].columns or not df[sym]["Close"].notna().any():
+            empty += 1
+    return empty / len(symbols)
+
+
+class _ChunkSize:
+    def __init__(self, initial: int, lo: int, hi: int):
+        self.lo, self.hi = lo, max(lo, hi)
+        self.value = min(max(initial, self.lo), self.hi)
+
+
+class FetchController:
+    def __init__(self, chunk_bounds: Dict[str, tuple], concurrency: tuple, enabled: bool = True,
+                 probe_kinds: Iterable[str] = ("resolve",)):
+        self.enabled = enabled
+        # Kinds whose empty answers are expected (existence probes), not a sign of throttling
+        self._probe_kinds = frozenset(probe_kinds)
+        self._chunks = {kind: _ChunkSize(*bounds) for kind, bounds in chunk_bounds.items()}
+        initial, lo, hi = concurrency
+        self._conc_lo, self._conc_hi = lo, max(lo, hi)
+        self._concurrency = min(max(initial, lo), self._conc_hi)
+        self._in_flight = 0
+        self._clean_streak = 0
+        self._cond = threading.Condition()
+        self._stats = {"calls": 0, "errors": 0, "slow": 0, "mostly_empty": 0,
+                       "increases": 0, "decreases": 0}
+        self._latency_ewma = None
+        self._empty_ewma = None
+
+    def chunk_size(self, kind: str) -> int:
+        return self._chunks[kind].value
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @contextmanager
+    def slot(self):
+        """Block until the shared window has room, then hold one place in it."""
+        with self._cond:
+            while self.enabled and self._in_flight >= self._concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record(self, kind: str, latency: float, empty_fraction: float = 0.0, error: bool = False):
+        """Feed back one call's outcome and adjust ``kind``'s chunk size and the shared window."""
+        with self._cond:
+            self._stats["calls"] += 1
+            self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+            probe = kind in self._probe_kinds
+            if not probe:
+                self._empty_ewma = (empty_fraction if self._empty_ewma is None
+                                    else 0.8 * self._empty_ewma + 0.2 * empty_fraction)
+            slow = latency > Adaptive.TARGET_LATENCY_SEC
+            mostly_empty = not probe and empty_fraction > Adaptive.EMPTY_RATE_MAX
+            self._stats["errors"] += error
+            self._stats["slow"] += slow
+            self._stats["mostly_empty"] += mostly_empty
+            if not self.enabled:
+                return
+            chunk = self._chunks[kind]
+            if error or slow or mostly_empty:
+                chunk.value = max(chunk.lo, chunk.value // 2)
+                self._concurrency = max(self._conc_lo, self._concurrency // 2)
+                self._clean_streak = 0
+                self._stats["decreases"] += 1
+                logger.info("Fetch controller — %s call %s: chunk=%d, concurrency=%d",
+                            kind, "failed" if error else ("slow" if slow else "mostly empty"),
+                            chunk.value, self._concurrency)
+                return
+            chunk.value = min(chunk.hi, chunk.value + Adaptive.CHUNK_STEP)
+            self._clean_streak += 1
+            if self._clean_streak >= Adaptive.CONCURRENCY_STREAK and self._concurrency < self._conc_hi:
+                self._concurrency += 1
+                self._clean_streak = 0
+                self._cond.notify_all()
+            self._stats["increases"] += 1
+
+    def run(self, kind: str, symbols: List[str], fn: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Call ``fn`` (one ``yf.download`` for ``symbols``) inside a slot and record its outcome."""
+        with self.slot():
+            start = time.monotonic()
+            try:
+                df = fn()
+            except Exception:
+                self.record(kind, time.monotonic() - start, error=True)
+                raise
+        self.record(kind, time.monotonic() - start, _empty_fraction(df, symbols))
+        return df
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "chunk_sizes": {kind: chunk.value for kind, chunk in self._chunks.items()},
+                "concurrency": self._concurrency,
+                "in_flight": self._in_flight,
+                "latency_ewma_sec": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+                "empty_rate_ewma": round(self._empty_ewma, 3) if self._empty_ewma is not None else None,
+                **self._stats,
+            }
+
+
+yf_controller = FetchController(
+    chunk_bounds={
+        "bulk": (Limits.BULK_FETCH_CHUNK, Adaptive.CHUNK_MIN, Adaptive.BULK_CHUNK_MAX),
+        "latest": (Limits.BULK_FETCH_CHUNK, Adaptive.CHUNK_MIN, Adaptive.BULK_CHUNK_MAX),
+        "resolve": (Limits.BATCH_RESOLVE_CHUNK, Adaptive.CHUNK_MIN, Adaptive.RESOLVE_CHUNK_MAX),
+    },
+    concurrency=(Limits.MAX_CONCURRENCY_BULK, 1, Adaptive.CONCURRENCY_MAX),
+    enabled=Adaptive.ENABLED,
+)
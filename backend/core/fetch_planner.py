@@ -0,0 +1,93 @@
+"""Phase B fetch planning.
+
+Each symbol needs bars only over the union of its own signal windows, and
+only for the part of that interval the market store does not already hold.
+The planner turns those per-symbol intervals into ``yf.download`` requests:
+symbols whose intervals nearly coincide share one request, so a file with a
+long history does not pull every symbol over the whole file's date span.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .fetch_controller import yf_controller
+from .market_store import MarketStore
+from ..config import Limits
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchRequest:
+    """One bulk download: ``symbols`` over ``[start, end)``."""
+    start: datetime
+    end: datetime
+    symbols: List[str] = field(default_factory=list)
+
+
+def _missing_windows(symbol: str, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    gaps = MarketStore.gaps(symbol, start, end)
+    if gaps is None:
+        return [(start, end)]
+    return [(lo.to_pydatetime(), hi.to_pydatetime()) for lo, hi in gaps]
+
+
+def plan_fetches(
+    symbol_ranges: Dict[str, Tuple[datetime, datetime]],
+    chunk_size: Optional[int] = None,
+    slack_days: Optional[int] = None,
+) -> Tuple[List[FetchRequest], Dict[str, int]]:
+    """Group the uncovered part of each symbol's interval into bulk requests.
+
+    Windows are sorted by start and packed greedily: a window joins the most
+    recent open request that has room (``chunk_size``, by default the
+    controller's current bulk chunk size) and where no member would be fetched
+    more than ``slack_days`` beyond its own window (head plus tail overshoot).
+    Returns ``(requests, stats)``.
+    """
+    chunk_size = chunk_size or yf_controller.chunk_size("bulk")
+    slack = timedelta(days=Limits.FETCH_GROUP_SLACK_DAYS if slack_days is None else slack_days)
+
+    windows = []
+    stored = 0
+    for sym, (start, end) in symbol_ranges.items():
+        missing = _missing_windows(sym, start, end)
+        if not missing:
+            stored += 1
+        windows.extend((lo, hi, sym) for lo, hi in missing)
+    windows.sort(key=lambda w: (w[0], w[1]))
+
+    requests: List[FetchRequest] = []
+    # Open requests with their worst member term max(own_start - own_end);
+    # a member's overshoot is (own_start - own_end) + (request end - request start).
+    open_requests: List[list] = []
+    for lo, hi, sym in windows:
+        # Sorted by start: a request starting more than ``slack`` before this
+        # window can take no further members.
+        open_requests = [o for o in open_requests if lo - o[0].start <= slack]
+        for entry in reversed(open_requests):
+            request, worst = entry
+            if len(request.symbols) >= chunk_size or sym in request.symbols:
+                continue
+            end = max(request.end, hi)
+            worst_if = max(worst, lo - hi)
+            if worst_if + (end - request.start) <= slack:
+                request.symbols.append(sym)
+                request.end, entry[1] = end, worst_if
+                break
+        else:
+            request = FetchRequest(lo, hi, [sym])
+            requests.append(request)
+            open_requests.append([request, lo - hi])
+
+    needed_days = sum((hi - lo).days for lo, hi, _ in windows)
+    fetched_days = sum((r.end - r.start).days * len(r.symbols) for r in requests)
+    stats = {
+        "symbols_stored": stored,
+        "windows": len(windows),
+        "requests": len(requests),
+        "symbol_days_needed": needed_days,
+        "symbol_days_fetched": fetched_days,
+    }
+    return requests, stats
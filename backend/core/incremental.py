@@ -0,0 +1,190 @@
+"""Incremental re-backtest of an edited upload.
+
+An edited screener file (typically the previous file plus a few new days) is
+diffed by (symbol, signal date) row key against the closest earlier report of
+the same user and report mode. Only rows the earlier report does not cover go
+through Phases A–C; the rest are reused and spliced back in file order.
+"""
+import asyncio
+import logging
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .backtester import Backtester
+from .data_provider import DataProvider
+from .result_buffer import ResultBuffer
+from .return_stats import HorizonSketches
+from ..config import Limits
+from ..models.schemas import BacktestReport, HorizonStats
+from ..utils.date_utils import parse_date
+from ..utils.horizons import normalize_horizons
+
+logger = logging.getLogger(__name__)
+
+
+def signal_row_key(signal: Dict[str, str]) -> str:
+    """``SYMBOL|YYYY-MM-DD`` identity of an upload row (raw date kept when it does not parse)."""
+    raw_symbol = signal.get("symbol") or signal.get("Symbol") or ""
+    date_str = signal.get("date") or signal.get("Date") or ""
+    try:
+        date_key = parse_date(str(date_str)).strftime("%Y-%m-%d")
+    except ValueError:
+        date_key = str(date_str)
+    return f"{str(raw_symbol).strip().upper()}|{date_key}"
+
+
+def plan_incremental(row_keys: Sequence[str], previous_keys: Sequence[str],
+                     previous_statuses: Sequence[Optional[str]]) -> Tuple[Dict[int, int], List[int]]:
+    """Match rows to an earlier report's rows.
+
+    Returns ``(reuse, new_rows)``: ``reuse`` maps a row index to the earlier
+    row index it can be copied from; ``new_rows`` lists rows that must be
+    computed. Only earlier rows with status "Success" are reused; a row that
+    failed before (no data yet, errors) is computed again. Duplicate keys are
+    matched in order.
+    """
+    available = defaultdict(deque)
+    for j, (key, status) in enumerate(zip(previous_keys, previous_statuses)):
+        if status == "Success":
+            available[key].append(j)
+    reuse, new_rows = {}, []
+    for i, key in enumerate(row_keys):
+        if available[key]:
+            reuse[i] = available[key].popleft()
+        else:
+            new_rows.append(i)
+    return reuse, new_rows
+
+
+class _OffsetJobStore:
+    """Numbers the new-rows run's batches after the reused rows' batches."""
+
+    def __init__(self, job_store, offset: int):
+        self._job_store = job_store
+        self._offset = offset
+
+    def save_batch(self, batch_num: int, results: List[dict]):
+        self._job_store.save_batch(self._offset + batch_num, results)
+
+
+def _scaled_progress(progress_callback, offset: int, share: int, total: int):
+    """Map the new-rows run's own (step, steps) progress onto rows ``offset .. offset + share`` of ``total``."""
+    async def _callback(current, steps, message, **kwargs):
+        done = offset + (min(current, steps) * share // steps if steps else 0)
+        await progress_callback(done, total, message, **kwargs)
+    return _callback
+
+
+async def run_incremental_backtest(
+    signals: List[Dict[str, str]],
+    previous_report: dict,
+    reuse: Dict[int, int],
+    new_rows: List[int],
+    progress_callback=None,
+    entry_mode: str = "next_close",
+    run_id: Optional[str] = None,
+    job_store=None,
+    persistence_backend=None,
+    horizons: Optional[Sequence[int]] = None,
+) -> BacktestReport:
+    """Compute ``new_rows`` only and splice them with the reused rows of ``previous_report``.
+
+    Progress is reported in rows of the whole upload: reused rows count as
+    they stream, and the new-rows run fills the remaining share.
+    """
+    horizons = normalize_horizons(horizons)
+    previous_trades = previous_report.get("trades", [])
+    reused = {i: previous_trades[j] for i, j in reuse.items()}
+    logger.info("Incremental backtest — reusing %d rows, computing %d new rows", len(reused), len(new_rows))
+
+    reused_batches = 0
+    if progress_callback is not None or job_store is not None:
+        ordered = [reused[i] for i in sorted(reused)]
+        for start in range(0, len(ordered), Limits.BATCH_SIZE):
+            batch = ordered[start:start + Limits.BATCH_SIZE]
+            if job_store is not None:
+                job_store.save_batch(reused_batches, batch)
+            reused_batches += 1
+            if progress_callback is not None:
+                await progress_callback(start + len(batch), len(signals),
+                                        f"Loading {start + len(batch)}/{len(ordered)} unchanged trades...",
+                                        trades=batch)
+
+    new_report = None
+    if new_rows:
+        new_report = await Backtester.run_backtest_async(
+            [signals[i] for i in new_rows],
+            progress_callback=(_scaled_progress(progress_callback, len(reused), len(new_rows), len(signals))
+                               if progress_callback is not None else None),
+            entry_mode=entry_mode,
+            run_id=run_id,
+            job_store=_OffsetJobStore(job_store, reused_batches) if job_store is not None else None,
+            persistence_backend=persistence_backend,
+            horizons=horizons,
+        )
+
+    # Reused rows keep their computed returns; only their latest prices are refreshed
+    reused_symbols = list({t.get("symbol") for t in reused.values() if t.get("status") == "Success"})
+    fresh_prices = {}
+    if reused_symbols:
+        try:
+            fresh_prices = await asyncio.to_thread(DataProvider.get_latest_prices_batch, reused_symbols)
+        except Exception:
+            logger.exception("Incremental backtest — latest price refresh failed (non-blocking)")
+
+    buffer = ResultBuffer(horizons)
+    new_trades = iter(new_report.trades) if new_report is not None else iter(())
+    for i in range(len(signals)):
+        if i not in reused:
+            buffer.append(next(new_trades).model_dump())
+            continue
+        row = buffer.append(reused[i])
+        if reused[i].get("status") == "Success" and reused[i].get("symbol") in fresh_prices:
+            price, date_str = fresh_prices[reused[i]["symbol"]]
+            if price is not None:
+                buffer.set(row, "latest_price", price)
+                buffer.set(row, "latest_price_date", date_str)
+                entry_price = buffer.get(row, "entry_price")
+                if entry_price and entry_price > 0:
+                    buffer.set(row, "latest_price_return", round(((price - entry_price) / entry_price) * 100, 2))
+
+    statuses = buffer.column("status")
+    successful = sum(1 for status in statuses if status == "Success")
+    latest_dates = [d for d, status in zip(buffer.column("latest_price_date"), statuses)
+                    if status == "Success" and d]
+    trades = buffer.to_models()
+    report = BacktestReport(
+        total_signals=len(signals),
+        successful_signals=successful,
+        failed_signals=len(signals) - successful,
+        entry_mode=entry_mode,
+        trades=trades,
+        horizons=list(horizons),
+        latest_price_date=max(latest_dates) if latest_dates else None,
+    )
+    if successful:
+        Backtester._aggregate_horizons(report, buffer, trades)
+
+    # Pure append: merge the earlier sketches with the new rows' sketches.
+    # Otherwise (rows dropped or edited) rebuild them from the spliced matrix.
+    sketches = None
+    append_only = len(reuse) == len(previous_trades)
+    if append_only and previous_report.get("return_sketches") is not None:
+        sketches = HorizonSketches.from_dict(previous_report["return_sketches"])
+        if new_report is not None and new_report.return_sketches is not None:
+            sketches.merge(HorizonSketches.from_dict(new_report.return_sketches))
+        if sketches.horizons != tuple(horizons):
+            sketches = None
+    if sketches is None:
+        sketches = HorizonSketches(horizons)
+        sketches.add_matrix(*buffer.horizon_matrix("return"))
+    report.return_stats = [HorizonStats(**st) if st else None for st in sketches.summaries()]
+    report.return_sketches = sketches.to_dict()
+
+    report.cache_stats = dict(new_report.cache_stats or {}) if new_report is not None else DataProvider.get_cache_stats()
+    report.cache_stats.update({
+        "incremental_reused_rows": len(reused),
+        "incremental_new_rows": len(new_rows),
+    })
+    report.cache_source = "l3_incremental"
+    return report
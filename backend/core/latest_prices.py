@@ -0,0 +1,133 @@
+"""In-memory latest-price table kept fresh by a background task.
+
+While the refresher runs (started from the FastAPI lifespan), every symbol a
+request asks for is remembered. Once per interval, all symbols used within
+the active window are re-priced in one bulk fetch. Request paths then read
+from memory and only go to Yahoo for symbols the table has not seen yet.
+When it is not running, ``lookup`` misses everything and callers behave as
+before.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import LatestPrices
+
+logger = logging.getLogger(__name__)
+
+PriceEntry = Tuple[Optional[float], Optional[str]]
+
+
+class LatestPriceRefresher:
+    def __init__(self, fetch: Callable[[List[str]], Dict[str, PriceEntry]],
+                 interval: float = LatestPrices.REFRESH_INTERVAL_SEC,
+                 max_age: float = LatestPrices.MAX_AGE_SEC,
+                 active_window: float = LatestPrices.ACTIVE_WINDOW_SEC,
+                 max_symbols: int = LatestPrices.MAX_SYMBOLS):
+        self._fetch = fetch
+        self.interval = interval
+        self.max_age = max_age
+        self.active_window = active_window
+        self.max_symbols = max_symbols
+        self._lock = threading.Lock()
+        # symbol -> (price, date_str, fetched_at); symbol -> last_used (monotonic)
+        self._prices: Dict[str, tuple] = {}
+        self._used: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0,
+                       "last_refresh_symbols": 0, "last_refresh_sec": None}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def lookup(self, symbols: List[str]) -> Tuple[Dict[str, PriceEntry], List[str]]:
+        """``(fresh entries, symbols to fetch)``; registers ``symbols`` for background refresh."""
+        if not self.running:
+            return {}, list(symbols)
+        now = time.monotonic()
+        hits, misses = {}, []
+        with self._lock:
+            for sym in symbols:
+                self._used[sym] = now
+                entry = self._prices.get(sym)
+                if entry is not None and now - entry[2] <= self.max_age:
+                    hits[sym] = (entry[0], entry[1])
+                else:
+                    misses.append(sym)
+            self._stats["hits"] += len(hits)
+            self._stats["misses"] += len(misses)
+        return hits, misses
+
+    def ingest(self, entries: Dict[str, PriceEntry]):
+        if not self.running:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for sym, (price, date_str) in entries.items():
+                if price is not None:
+                    self._prices[sym] = (price, date_str, now)
+
+    def _active_symbols(self) -> List[str]:
+        cutoff = time.monotonic() - self.active_window
+        with self._lock:
+            for sym in [s for s, used in self._used.items() if used < cutoff]:
+                del self._used[sym]
+                self._prices.pop(sym, None)
+            # Most recently used first, so the cap drops the coldest symbols
+            active = sorted(self._used, key=self._used.get, reverse=True)
+        return active[:self.max_symbols]
+
+    def refresh_once(self) -> int:
+        """Re-price every active symbol in one fetch; returns how many got a price."""
+        symbols = self._active_symbols()
+        if not symbols:
+            return 0
+        began = time.monotonic()
+        fetched = self._fetch(symbols)
+        now = time.monotonic()
+        priced = 0
+        with self._lock:
+            for sym, (price, date_str) in fetched.items():
+                if price is not None:
+                    self._prices[sym] = (price, date_str, now)
+                    priced += 1
+            self._stats["refreshes"] += 1
+            self._stats["last_refresh_symbols"] = len(symbols)
+            self._stats["last_refresh_sec"] = round(now - began, 2)
+        logger.info("Latest prices — refreshed %d/%d active symbols in %.2fs", priced, len(symbols), now - began)
+        return priced
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.refresh_once)
+            except Exception:
+                with self._lock:
+                    self._stats["refresh_failures"] += 1
+                logger.warning("Latest prices — background refresh failed", exc_info=True)
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info("Latest prices — background refresher started (interval=%ss)", self.interval)
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        with self._lock:
+            self._prices.clear()
+            self._used.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"running": self.running, "symbols": len(self._used), "priced": len(self._prices),
+                    **self._stats}
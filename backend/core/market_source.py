@@ -0,0 +1,201 @@
+"""Where daily bars and ticker metadata come from.
+
+DataProvider and the symbol resolver never call a vendor directly; they ask
+the active ``MarketDataSource``. ``YFinanceSource`` is the default. A
+``LocalFileSource`` reads OHLCV from a directory of per-symbol CSV/Parquet
+files, so backtests can run offline at disk speed; ``replay_source`` records
+and replays any source's responses.
+
+Every source returns frames shaped like yfinance's:
+``download`` → ``yf.download(group_by='ticker', auto_adjust=False)`` (one
+column group per symbol, flat columns for a single symbol), ``history`` →
+``yf.Ticker(symbol).history(auto_adjust=False)``.
+"""
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from ..config import DataSource
+
+logger = logging.getLogger(__name__)
+
+_OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+
+class MarketDataSource(ABC):
+    name = "base"
+
+    @abstractmethod
+    def download(self, symbols: List[str], start=None, end=None, period: Optional[str] = None) -> pd.DataFrame:
+        """Daily bars for ``symbols`` over ``[start, end)`` or the trailing ``period`` ("5d", "1mo", ...)."""
+        ...
+
+    @abstractmethod
+    def history(self, symbol: str, start=None, end=None, period: Optional[str] = None) -> pd.DataFrame:
+        """Daily bars for one symbol; same window arguments as ``download``."""
+        ...
+
+    def info(self, symbol: str) -> dict:
+        """Ticker metadata (``sector``, ``marketCap``, ...); empty when unknown."""
+        return {}
+
+
+class YFinanceSource(MarketDataSource):
+    name = "yfinance"
+
+    def download(self, symbols, start=None, end=None, period=None):
+        window = {"start": start, "end": end} if period is None else {"period": period}
+        return yf.download(tickers=symbols, **window, auto_adjust=False,
+                           group_by='ticker', progress=False, threads=True)
+
+    def history(self, symbol, start=None, end=None, period=None):
+        window = {"start": start, "end": end} if period is None else {"period": period}
+        return yf.Ticker(symbol).history(**window, auto_adjust=False)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+
+def _period_start(last: pd.Timestamp, period: str) -> Optional[pd.Timestamp]:
+    """Start of a yfinance-style trailing ``period`` ending at ``last`` (None for "max")."""
+    if period == "max":
+        return None
+    units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            count = int(period[:-len(suffix)])
+            if unit == "days":
+                # "1d" is the last bar, "5d" the last five bars' worth of calendar days
+                return last - pd.offsets.BDay(count - 1)
+            return last - pd.DateOffset(**{unit: count})
+    raise ValueError(f"unsupported period {period!r}")
+
+
+class LocalFileSource(MarketDataSource):
+    """OHLCV from ``<root>/<SYMBOL>.parquet`` or ``<root>/<SYMBOL>.csv``.
+
+    Files need a date column (``Date`` or the first column) and any of the
+    Open/High/Low/Close/Adj Close/Volume columns. A trailing ``period`` is
+    measured back from the file's last bar rather than from today, so a
+    snapshot keeps answering latest-price lookups. Metadata comes from an
+    optional ``<root>/info.json`` of ``{symbol: {"sector": ..., "marketCap": ...}}``.
+    A symbol without a file simply has no data, as with a delisted ticker.
+    """
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # path -> (mtime, frame); files are re-read only when they change
+        self._frames: Dict[Path, tuple] = {}
+        self._info: Optional[dict] = None
+
+    def _path(self, symbol: str) -> Optional[Path]:
+        for ext in (".parquet", ".csv"):
+            path = self.root / f"{symbol}{ext}"
+            if path.is_file():
+                return path
+        return None
+
+    def _load(self, symbol: str) -> pd.DataFrame:
+        path = self._path(symbol)
+        if path is None:
+            return pd.DataFrame()
+        mtime = path.stat().st_mtime
+        with self._lock:
+            cached = self._frames.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+        if not isinstance(df.index, pd.DatetimeIndex):
+            date_col = "Date" if "Date" in df.columns else df.columns[0]
+            df = df.set_index(date_col)
+            df.index = pd.to_datetime(df.index)
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        df.index.name = "Date"
+        df = df[[c for c in _OHLCV_COLUMNS if c in df.columns]].sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        with self._lock:
+            self._frames[path] = (mtime, df)
+        return df
+
+    def _window(self, df: pd.DataFrame, start, end, period) -> pd.DataFrame:
+        if df.empty:
+            return df
+        if period is not None:
+            lo = _period_start(df.index[-1], period)
+            return df if lo is None else df.loc[lo:]
+        lo = pd.Timestamp(start) if start is not None else None
+        hi = pd.Timestamp(end) if end is not None else None
+        if hi is not None:
+            # end is exclusive, as in yfinance
+            df = df.loc[df.index < hi]
+        return df if lo is None else df.loc[lo:]
+
+    def history(self, symbol, start=None, end=None, period=None):
+        return self._window(self._load(symbol), start, end, period).copy()
+
+    def download(self, symbols, start=None, end=None, period=None):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        frames = {}
+        for sym in symbols:
+            df = self._window(self._load(sym), start, end, period)
+            if not df.empty:
+                frames[sym] = df
+        if not frames:
+            return pd.DataFrame()
+        if len(symbols) == 1:
+            return frames[symbols[0]].copy()
+        return pd.concat(frames, axis=1)
+
+    def info(self, symbol):
+        with self._lock:
+            if self._info is None:
+                path = self.root / "info.json"
+                self._info = json.loads(path.read_text()) if path.is_file() else {}
+            return dict(self._info.get(symbol, {}))
+
+
+def build_source(name: str, local_dir: Optional[str] = None) -> MarketDataSource:
+    if name == "yfinance":
+        return YFinanceSource()
+    if name == "local":
+        root = local_dir or DataSource.LOCAL_DIR
+        if not os.path.isdir(root):
+            raise ValueError(f"MARKET_SOURCE=local but {root!r} is not a directory")
+        return LocalFileSource(root)
+    if name == "record":
+        from .replay_source import RecordingSource
+        return RecordingSource(build_source(DataSource.RECORD_INNER, local_dir), DataSource.BUNDLE_DIR)
+    if name == "replay":
+        from .replay_source import ReplaySource
+        return ReplaySource(DataSource.BUNDLE_DIR, latency=DataSource.REPLAY_LATENCY,
+                            latency_scale=DataSource.REPLAY_LATENCY_SCALE,
+                            failure_rate=DataSource.REPLAY_FAILURE_RATE, seed=DataSource.REPLAY_SEED)
+    raise ValueError(f"unknown market data source {name!r}")
+
+
+_source: Optional[MarketDataSource] = None
+
+
+def get_source() -> MarketDataSource:
+    """The process-wide source, built from ``DataSource.NAME`` on first use."""
+    global _source
+    if _source is None:
+        _source = build_source(DataSource.NAME)
+        logger.info("Market data source: %s", _source.name)
+    return _source
+
+
+def set_source(source: Optional[MarketDataSource]):
+    """Swap the process-wide source; None rebuilds it from config on next use."""
+    global _source
+    _source = source
@@ -0,0 +1,322 @@
+"""Columnar on-disk OHLCV store.
+
+One file per symbol under ``Paths.MARKET_DIR``: a fixed 64-byte header (the
+symbol's manifest: row count, covered date range, expiry, which columns are
+present) followed by one contiguous array per column — dates as int64
+nanoseconds, Open/High/Low/Close/Adj Close as float64 and Volume as int64.
+Files are memory-mapped on read, so a date-range read is a binary search plus
+zero-copy slices; nothing is unpickled.
+
+Writers replace a file atomically from a uniquely named temp file, and a
+per-symbol lock serializes read-merge-write cycles within the process.
+``sweep`` deletes expired files and keeps the directory under its byte budget.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .vector_engine import SymbolFrame
+from ..config import Limits, Paths
+from ..utils.date_utils import TradingCalendar
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"BBOHLCV1"
+_VERSION = 1
+# magic, version, column mask, rows, start ns, end ns, written_at, expires_at (0 = never)
+_HEADER = struct.Struct("<8sIIqqqdd")
+_HEADER_SIZE = 64
+_PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+# dates + the price columns + Volume, 8 bytes per row each
+_COLUMNS = 2 + len(_PRICE_COLUMNS)
+_SUFFIX = ".ohlcv"
+# Temp files this old are left over from a crashed writer
+_STALE_TMP_SEC = 3600
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def _symbol_path(symbol: str) -> Path:
+    return Path(Paths.MARKET_DIR) / f"{quote(symbol, safe='')}{_SUFFIX}"
+
+
+def _symbol_lock(symbol: str) -> threading.RLock:
+    with _locks_guard:
+        lock = _locks.get(symbol)
+        if lock is None:
+            lock = _locks[symbol] = threading.RLock()
+        return lock
+
+
+class _StoredSeries:
+    """Memory-mapped view of one symbol file."""
+
+    def __init__(self, path: Path):
+        self.mm = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, self.mask, self.rows, start, end, self.written_at, self.expires_at = \
+            _HEADER.unpack_from(self.mm[:_HEADER.size].tobytes())
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path.name}: not a v{_VERSION} OHLCV file")
+        if len(self.mm) != _HEADER_SIZE + self.rows * 8 * _COLUMNS:
+            raise ValueError(f"{path.name}: {len(self.mm)} bytes does not match {self.rows} rows")
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+
+    @property
+    def expired(self) -> bool:
+        return bool(self.expires_at) and time.time() >= self.expires_at
+
+    def _column(self, slot: int, dtype) -> np.ndarray:
+        offset = _HEADER_SIZE + slot * self.rows * 8
+        return self.mm[offset:offset + self.rows * 8].view(dtype)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._column(0, "datetime64[ns]")
+
+    def price(self, name: str) -> Optional[np.ndarray]:
+        slot = _PRICE_COLUMNS.index(name)
+        if not self.mask & (1 << slot):
+            return None
+        return self._column(1 + slot, np.float64)
+
+    def volume(self) -> Optional[np.ndarray]:
+        if not self.mask & (1 << len(_PRICE_COLUMNS)):
+            return None
+        return self._column(1 + len(_PRICE_COLUMNS), np.int64)
+
+    def bounds(self, start, end) -> Tuple[int, int]:
+        """Row positions ``[lo, hi)`` of ``start <= date <= end`` (either side may be None)."""
+        dates = self.dates
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns"), "left"))
+        hi = self.rows if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns"), "right"))
+        return lo, max(lo, hi)
+
+
+class MarketStore:
+    """Per-symbol columnar OHLCV files with range reads."""
+
+    @staticmethod
+    def _open(symbol: str, include_expired: bool = False) -> Optional[_StoredSeries]:
+        path = _symbol_path(symbol)
+        try:
+            series = _StoredSeries(path)
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error):
+            logger.warning("MarketStore — unreadable file for %s, ignoring", symbol, exc_info=True)
+            return None
+        if series.expired and not include_expired:
+            return None
+        return series
+
+    @staticmethod
+    def coverage(symbol: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(first, last) stored trading day, or None when missing / expired."""
+        series = MarketStore._open(symbol)
+        if series is None or series.rows == 0:
+            return None
+        return series.start, series.end
+
+    @staticmethod
+    def write(symbol: str, df: pd.DataFrame, expire: Optional[int] = None):
+        """Replace the symbol's file with ``df`` (tz-naive, any row order). ``expire`` is a TTL in seconds."""
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        order = np.argsort(index.to_numpy(dtype="datetime64[ns]"), kind="stable")
+        dates = index.to_numpy(dtype="datetime64[ns]")[order]
+
+        mask = 0
+        columns = [dates.view(np.int64)]
+        for slot, name in enumerate(_PRICE_COLUMNS):
+            if name in df.columns:
+                mask |= 1 << slot
+                values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                columns.append(values[order])
+            else:
+                columns.append(np.full(len(dates), np.nan))
+        if "Volume" in df.columns:
+            mask |= 1 << len(_PRICE_COLUMNS)
+            volume = pd.to_numeric(df["Volume"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+            columns.append(volume[order])
+        else:
+            columns.append(np.zeros(len(dates), dtype=np.int64))
+
+        now = time.time()
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, mask, len(dates),
+            int(dates[0].view(np.int64)) if len(dates) else 0,
+            int(dates[-1].view(np.int64)) if len(dates) else 0,
+            now, now + expire if expire else 0.0,
+        ).ljust(_HEADER_SIZE, b"\0")
+
+        path = _symbol_path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(header)
+                for col in columns:
+                    f.write(np.ascontiguousarray(col).tobytes())
+            with _symbol_lock(symbol):
+                os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    @staticmethod
+    def merge(symbol: str, df: pd.DataFrame, expire: Optional[int] = None) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Union ``df`` with the stored rows (``df`` wins on shared dates) and rewrite the file.
+
+        The caller guarantees ``df`` overlaps or adjoins the stored range, so the
+        merged range has no hole. Returns the new (first, last) stored day.
+        """
+        # Held across read and write, so concurrent gap fills of one symbol
+        # (head and tail windows in different requests) cannot drop each other's rows
+        with _symbol_lock(symbol):
+            stored = MarketStore.read(symbol)
+            if stored is not None and not stored.empty:
+                index = pd.DatetimeIndex(df.index)
+                if index.tz is not None:
+                    df = df.copy()
+                    df.index = index.tz_localize(None)
+                df = pd.concat([stored, df])
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+            MarketStore.write(symbol, df, expire=expire)
+        return df.index[0], df.index[-1]
+
+    @staticmethod
+    def gaps(symbol: str, start, end) -> Optional[list]:
+        """Head/tail windows of ``[start, end]`` the stored range does not cover.
+
+        Windows are ``(start, end_exclusive)`` pairs in the form yfinance takes.
+        Returns None when nothing usable is stored (the whole range is missing).
+        """
+        coverage = MarketStore.coverage(symbol)
+        if coverage is None:
+            return None
+        cached_start, cached_end = coverage
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if end < cached_start or start > cached_end:
+            return None
+        # End dates are exclusive on the yfinance side; a window without a
+        # weekday in it cannot hold a bar and is not worth a request.
+        windows = []
+        if np.busday_count(start.date(), cached_start.date()) > 0:
+            windows.append((start, cached_start))
+        tail_start = cached_end.normalize() + pd.Timedelta(days=1)
+        if np.busday_count(tail_start.date(), end.date()) > 0:
+            windows.append((tail_start, end))
+        return windows
+
+    @staticmethod
+    def read_frame(symbol: str, start=None, end=None) -> Optional[SymbolFrame]:
+        """Zero-copy ``SymbolFrame`` over ``start <= date <= end`` (None when missing / expired)."""
+        series = MarketStore._open(symbol)
+        if series is None:
+            return None
+        lo, hi = series.bounds(start, end)
+        nan = np.full(hi - lo, np.nan)
+
+        def col(name):
+            values = series.price(name)
+            return nan if values is None else values[lo:hi]
+
+        return SymbolFrame(TradingCalendar(series.dates[lo:hi]), col("Open"), col("High"), col("Low"), col("Close"))
+
+    @staticmethod
+    def read(symbol: str, start=None, end=None, include_expired: bool = False) -> Optional[pd.DataFrame]:
+        """Stored rows in ``start <= date <= end`` as a DataFrame with the columns that were written."""
+        series = MarketStore._open(symbol, include_expired=include_expired)
+        if series is None:
+            return None
+        lo, hi = series.bounds(start, end)
+        data = {}
+        for name in _PRICE_COLUMNS:
+            values = series.price(name)
+            if values is not None:
+                data[name] = values[lo:hi]
+        volume = series.volume()
+        if volume is not None:
+            data["Volume"] = volume[lo:hi]
+        return pd.DataFrame(data, index=pd.DatetimeIndex(series.dates[lo:hi]))
+
+    @staticmethod
+    def delete(symbol: str):
+        try:
+            _symbol_path(symbol).unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def sweep(max_bytes: Optional[int] = None) -> Dict[str, int]:
+        """Delete expired / unreadable files and leftover temp files, then the
+        oldest-written files until the store fits ``max_bytes``
+        (default ``Limits.MARKET_STORE_MAX_MB``)."""
+        max_bytes = Limits.MARKET_STORE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        root = Path(Paths.MARKET_DIR)
+        swept = {"expired": 0, "evicted": 0, "bytes": 0}
+        if not root.exists():
+            return swept
+        now = time.time()
+        for tmp in root.glob(f"*{_SUFFIX}.*.tmp"):
+            try:
+                if now - tmp.stat().st_mtime > _STALE_TMP_SEC:
+                    tmp.unlink()
+            except FileNotFoundError:
+                pass
+
+        live = []
+        for path in root.glob(f"*{_SUFFIX}"):
+            try:
+                size = path.stat().st_size
+                with open(path, "rb") as f:
+                    magic, version, _, rows, _, _, written_at, expires_at = _HEADER.unpack(f.read(_HEADER.size))
+                usable = (magic == _MAGIC and version == _VERSION
+                          and size == _HEADER_SIZE + rows * 8 * _COLUMNS
+                          and not (expires_at and now >= expires_at))
+            except FileNotFoundError:
+                continue
+            except (OSError, struct.error):
+                usable, size, written_at = False, 0, 0.0
+            if usable:
+                live.append((written_at, size, path))
+                continue
+            try:
+                path.unlink()
+                swept["expired"] += 1
+            except FileNotFoundError:
+                pass
+
+        total = sum(size for _, size, _ in live)
+        for _, size, path in sorted(live):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            swept["evicted"] += 1
+        swept["bytes"] = total
+        if swept["expired"] or swept["evicted"]:
+            logger.info("MarketStore — swept %d expired and %d over-budget files, %.1f MB left",
+                        swept["expired"], swept["evicted"], total / (1024 * 1024))
+        return swept
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        root = Path(Paths.MARKET_DIR)
+        files = list(root.glob(f"*{_SUFFIX}")) if root.exists() else []
+        return {"symbols": len(files), "bytes": sum(f.stat().st_size for f in files)}
@@ -0,0 +1,245 @@
+"""Record-and-replay market data sources for reproducible performance runs.
+
+``RecordingSource`` wraps another source and writes every response it
+returns, failures included, to a bundle directory: ``index.json`` plus one
+pickled frame or JSON file per call. ``ReplaySource`` serves a bundle with no
+network. It can add latency (fixed, or the recorded latency times a scale)
+and fail a fraction of calls. Whether a call fails depends only on the
+seed, the call and how many times that call has been made, so thread
+interleaving cannot change the outcome.
+
+Bar requests are matched exactly first. A ``download`` or ``history`` whose
+exact symbol set and window were never recorded is assembled per symbol from
+any recorded response covering its window. Bisection of a failed chunk and
+adaptive batch sizes therefore replay even though they re-batch symbols
+differently from the recorded run.
+
+For Phase B timings to be comparable, record and replay against empty
+CACHE_DIR / MARKET_DIR, or every stored bar is served without a call.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .market_source import MarketDataSource
+
+logger = logging.getLogger(__name__)
+
+_INDEX = "index.json"
+
+
+class ReplayMiss(LookupError):
+    """The bundle holds no response for this call."""
+
+
+def _day(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(pd.Timestamp(value).date())
+
+
+def _call_key(method: str, symbols, start=None, end=None, period=None) -> str:
+    symbols = [symbols] if isinstance(symbols, str) else sorted(symbols)
+    bound = lambda v: None if v is None else str(_day(v).date())
+    raw = json.dumps([method, symbols, bound(start), bound(end), period])
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _covers(entry: dict, lo: pd.Timestamp, hi: pd.Timestamp) -> bool:
+    """Whether a recorded ``[start, end)`` window contains ``[lo, hi)``."""
+    rec_lo, rec_hi = _day(entry["start"]), _day(entry["end"])
+    return (rec_lo is None or rec_lo <= lo) and (rec_hi is None or hi <= rec_hi)
+
+
+def _symbol_frame(df: pd.DataFrame, symbol: str, recorded_symbols: list) -> pd.DataFrame:
+    """One symbol's bars out of a recorded ``download`` or ``history`` response."""
+    if df.empty:
+        return df
+    if isinstance(df.columns, pd.MultiIndex):
+        if symbol not in set(df.columns.get_level_values(0)):
+            return pd.DataFrame()
+        return df[symbol].dropna(how="all")
+    return df if len(recorded_symbols) == 1 else pd.DataFrame()
+
+
+class RecordingSource(MarketDataSource):
+    def __init__(self, inner: MarketDataSource, bundle_dir: str):
+        self.inner = inner
+        self.name = f"record({inner.name})"
+        self.root = Path(bundle_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        index_path = self.root / _INDEX
+        self._index = json.loads(index_path.read_text()) if index_path.is_file() else {}
+
+    def _record(self, key: str, entry: dict, payload=None):
+        with self._lock:
+            if payload is not None:
+                if isinstance(payload, pd.DataFrame):
+                    entry["file"] = f"{key}.pkl"
+                    payload.to_pickle(self.root / entry["file"])
+                else:
+                    entry["file"] = f"{key}.json"
+                    (self.root / entry["file"]).write_text(json.dumps(payload, default=str))
+            self._index[key] = entry
+            tmp = self.root / f"{_INDEX}.tmp"
+            tmp.write_text(json.dumps(self._index, indent=1, sort_keys=True))
+            os.replace(tmp, self.root / _INDEX)
+
+    def _call(self, method: str, fn, symbols, start=None, end=None, period=None):
+        key = _call_key(method, symbols, start, end, period)
+        entry = {"method": method, "symbols": symbols, "start": None if start is None else str(start),
+                 "end": None if end is None else str(end), "period": period}
+        began = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            entry.update(latency=time.monotonic() - began, error=f"{type(e).__name__}: {e}")
+            self._record(key, entry)
+            raise
+        entry.update(latency=time.monotonic() - began, error=None)
+        self._record(key, entry, result if result is not None else {})
+        return result
+
+    def download(self, symbols, start=None, end=None, period=None):
+        return self._call("download", lambda: self.inner.download(symbols, start=start, end=end, period=period),
+                          list(symbols), start, end, period)
+
+    def history(self, symbol, start=None, end=None, period=None):
+        return self._call("history", lambda: self.inner.history(symbol, start=start, end=end, period=period),
+                          symbol, start, end, period)
+
+    def info(self, symbol):
+        return self._call("info", lambda: self.inner.info(symbol), symbol)
+
+
+class ReplaySource(MarketDataSource):
+    """Serve a recorded bundle.
+
+    ``latency`` is seconds added to every call, or "recorded" to sleep for the
+    recorded latency times ``latency_scale``. ``failure_rate`` is the share of
+    calls that raise ``ConnectionError`` on top of any recorded failures.
+    Calls missing from the bundle raise ``ReplayMiss``.
+    """
+    name = "replay"
+
+    def __init__(self, bundle_dir: str, latency="recorded", latency_scale: float = 1.0,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.root = Path(bundle_dir)
+        index_path = self.root / _INDEX
+        if not index_path.is_file():
+            raise ValueError(f"no replay bundle at {bundle_dir!r}")
+        self._index = json.loads(index_path.read_text())
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "misses": 0, "assembled": 0, "injected_failures": 0, "recorded_failures": 0}
+        # symbol -> recorded bar responses (index entries) that include it
+        self._bars = {}
+        for entry in self._index.values():
+            if entry["method"] in ("download", "history") and entry.get("period") is None:
+                symbols = entry["symbols"]
+                for sym in [symbols] if isinstance(symbols, str) else symbols:
+                    self._bars.setdefault(sym, []).append(entry)
+
+    def _delay(self, latency: float):
+        delay = latency * self.latency_scale if self.latency == "recorded" else float(self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _inject(self, key: str, nth: int, method: str, symbols):
+        if self.failure_rate and random.Random(f"{self.seed}:{key}:{nth}").random() < self.failure_rate:
+            with self._lock:
+                self._stats["injected_failures"] += 1
+            raise ConnectionError(f"injected replay failure for {method} {symbols}")
+
+    def _load(self, entry: dict):
+        path = self.root / entry["file"]
+        if path.suffix == ".pkl":
+            return pd.read_pickle(path)
+        return json.loads(path.read_text())
+
+    def _serve(self, method: str, symbols, start=None, end=None, period=None):
+        key = _call_key(method, symbols, start, end, period)
+        with self._lock:
+            nth = self._calls.get(key, 0)
+            self._calls[key] = nth + 1
+            self._stats["calls"] += 1
+        entry = self._index.get(key)
+        if entry is None:
+            if method in ("download", "history") and period is None and start is not None and end is not None:
+                return self._assemble(key, nth, method, symbols, start, end)
+            with self._lock:
+                self._stats["misses"] += 1
+            raise ReplayMiss(f"{method} {symbols} start={start} end={end} period={period} not in bundle")
+
+        self._delay(entry.get("latency", 0.0))
+        self._inject(key, nth, method, symbols)
+        if entry.get("error"):
+            with self._lock:
+                self._stats["recorded_failures"] += 1
+            raise ConnectionError(f"recorded failure: {entry['error']}")
+        return self._load(entry)
+
+    def _assemble(self, key: str, nth: int, method: str, symbols, start, end):
+        """Answer a re-batched bar request from the recorded responses covering each symbol."""
+        lo, hi = _day(start), _day(end)
+        requested = [symbols] if isinstance(symbols, str) else list(symbols)
+        sources, failed = {}, None
+        for sym in requested:
+            covering = [e for e in self._bars.get(sym, ()) if _covers(e, lo, hi)]
+            served = next((e for e in covering if not e.get("error")), None)
+            if served is not None:
+                sources[sym] = served
+            elif covering:
+                failed = failed or covering[0]
+            else:
+                with self._lock:
+                    self._stats["misses"] += 1
+                raise ReplayMiss(f"{method} {sym} start={start} end={end} not covered by bundle")
+
+        used = list(sources.values()) + ([failed] if failed else [])
+        self._delay(max(e.get("latency", 0.0) for e in used))
+        self._inject(key, nth, method, symbols)
+        if failed is not None:
+            # Every recorded response for this symbol over the window failed
+            with self._lock:
+                self._stats["recorded_failures"] += 1
+            raise ConnectionError(f"recorded failure: {failed['error']}")
+
+        frames = {}
+        for sym, entry in sources.items():
+            recorded = entry["symbols"]
+            df = _symbol_frame(self._load(entry), sym, [recorded] if isinstance(recorded, str) else recorded)
+            if not df.empty:
+                days = pd.DatetimeIndex(df.index.date)
+                df = df[(days >= lo) & (days < hi)]
+            if not df.empty:
+                frames[sym] = df
+        with self._lock:
+            self._stats["assembled"] += 1
+        if method == "history" or len(requested) == 1:
+            return frames[requested[0]].copy() if frames else pd.DataFrame()
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    def download(self, symbols, start=None, end=None, period=None):
+        return self._serve("download", list(symbols), start, end, period)
+
+    def history(self, symbol, start=None, end=None, period=None):
+        return self._serve("history", symbol, start, end, period)
+
+    def info(self, symbol):
+        return self._serve("info", symbol)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"recorded_calls": len(self._index), **self._stats}
@@ -0,0 +1,204 @@
+"""Column-oriented buffer for Phase C trade results.
+
+Holds every trade of a run as NumPy columns (floats with presence masks,
+int32 codes into a shared string table) instead of one pydantic
+``SignalResult`` per trade. Returns and exit prices for the run's horizons
+live in one ``[rows, horizons]`` matrix each. Rows are turned into dicts
+once per streamed batch and into ``SignalResult`` objects only when the
+report is built.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import Horizons
+from ..models.schemas import SignalResult
+
+_STR_FIELDS = frozenset({
+    "symbol", "signal_date", "entry_date", "entry_mode", "max_high_date", "max_low_date",
+    "sector", "market_cap", "status", "latest_price_date",
+})
+_HORIZON_FIELD = re.compile(r"^(return|exit_price)_(\d+)d$")
+# Per-horizon array fields -> matrix they mirror
+_HORIZON_ARRAYS = {"returns": "return", "exit_prices": "exit_price"}
+
+
+class ResultBuffer:
+    """Append-only columnar store of trade rows, in signal order."""
+
+    def __init__(self, horizons: Sequence[int] = Horizons.DEFAULT, capacity: int = 1024):
+        self.horizons = tuple(horizons)
+        self._h_col = {h: j for j, h in enumerate(self.horizons)}
+        self._n = 0
+        self._cap = max(int(capacity), 16)
+
+        # String table: code 0 is None
+        self._strings: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+        # (field name, kind, key) in SignalResult field order
+        self._layout = []
+        float_fields = []
+        for name in SignalResult.model_fields:
+            m = _HORIZON_FIELD.match(name)
+            if m:
+                h = int(m.group(2))
+                if h in self._h_col:
+                    self._layout.append((name, m.group(1), self._h_col[h]))
+                else:
+                    self._layout.append((name, "none", None))
+                continue
+            if name in _HORIZON_ARRAYS:
+                self._layout.append((name, "array", _HORIZON_ARRAYS[name]))
+            elif name in _STR_FIELDS:
+                self._layout.append((name, "str", name))
+            else:
+                self._layout.append((name, "float", name))
+                float_fields.append(name)
+        self._names = [name for name, _, _ in self._layout]
+        self._defaults = {
+            name: (None if field.is_required() else field.default)
+            for name, field in SignalResult.model_fields.items()
+        }
+
+        cap, width = self._cap, len(self.horizons)
+        self._str = {name: np.zeros(cap, dtype=np.int32) for name in _STR_FIELDS}
+        self._float = {name: np.full(cap, np.nan) for name in float_fields}
+        self._float_set = {name: np.zeros(cap, dtype=bool) for name in float_fields}
+        self._matrix = {
+            "return": np.full((cap, width), np.nan),
+            "exit_price": np.full((cap, width), np.nan),
+        }
+        self._matrix_set = {
+            "return": np.zeros((cap, width), dtype=bool),
+            "exit_price": np.zeros((cap, width), dtype=bool),
+        }
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def nbytes(self) -> int:
+        arrays = list(self._str.values()) + list(self._float.values()) + list(self._float_set.values())
+        arrays += list(self._matrix.values()) + list(self._matrix_set.values())
+        return sum(a.nbytes for a in arrays)
+
+    def _code(self, value) -> int:
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def _grow(self):
+        new_cap = self._cap * 2
+
+        def grow(a, fill):
+            out = np.full((new_cap,) + a.shape[1:], fill, dtype=a.dtype)
+            out[:self._cap] = a
+            return out
+
+        self._str = {k: grow(v, 0) for k, v in self._str.items()}
+        self._float = {k: grow(v, np.nan) for k, v in self._float.items()}
+        self._float_set = {k: grow(v, False) for k, v in self._float_set.items()}
+        self._matrix = {k: grow(v, np.nan) for k, v in self._matrix.items()}
+        self._matrix_set = {k: grow(v, False) for k, v in self._matrix_set.items()}
+        self._cap = new_cap
+
+    def append(self, row: dict) -> int:
+        """Append one trade (SignalResult-shaped dict; unknown keys ignored). Returns its row index.
+
+        Horizon values may come as ``returns`` / ``exit_prices`` arrays aligned
+        with ``horizons`` or as named ``return_{h}d`` fields (older cached rows).
+        """
+        if self._n == self._cap:
+            self._grow()
+        i = self._n
+        self._n += 1
+        for name, kind, key in self._layout:
+            value = row.get(name, self._defaults[name])
+            if kind == "str":
+                self._str[key][i] = self._code(value)
+            elif value is None or kind == "none":
+                continue
+            elif kind == "float":
+                self._float[key][i] = value
+                self._float_set[key][i] = True
+            elif kind == "array":
+                values = np.array(value, dtype=np.float64)
+                self._matrix[key][i] = values
+                self._matrix_set[key][i] = ~np.isnan(values)
+            else:
+                self._matrix[kind][i, key] = value
+                self._matrix_set[kind][i, key] = True
+        return i
+
+    def set(self, i: int, field: str, value):
+        """Overwrite one scalar field of an existing row."""
+        if field in self._str:
+            self._str[field][i] = self._code(value)
+        else:
+            self._float[field][i] = np.nan if value is None else value
+            self._float_set[field][i] = value is not None
+
+    def get(self, i: int, field: str):
+        if field in self._str:
+            return self._strings[self._str[field][i]]
+        if field in _HORIZON_ARRAYS:
+            kind = _HORIZON_ARRAYS[field]
+            return [v if p else None
+                    for v, p in zip(self._matrix[kind][i].tolist(), self._matrix_set[kind][i].tolist())]
+        m = _HORIZON_FIELD.match(field)
+        if m:
+            kind, j = m.group(1), self._h_col.get(int(m.group(2)))
+            if j is None or not self._matrix_set[kind][i, j]:
+                return None
+            return float(self._matrix[kind][i, j])
+        return float(self._float[field][i]) if self._float_set[field][i] else None
+
+    def horizon_matrix(self, kind: str = "return"):
+        """``(values, present)`` arrays of shape ``[rows, horizons]`` for "return" or "exit_price"."""
+        return self._matrix[kind][:self._n], self._matrix_set[kind][:self._n]
+
+    def column(self, field: str) -> list:
+        """All values of one field as a Python list (None where unset)."""
+        if field in self._str:
+            return [self._strings[c] for c in self._str[field][:self._n].tolist()]
+        return [self.get(i, field) for i in range(self._n)]
+
+    def to_dicts(self, rows: Optional[Iterable[int]] = None) -> List[dict]:
+        """Serialize rows (default: all) to ``SignalResult.model_dump()``-shaped dicts."""
+        idx = np.arange(self._n) if rows is None else np.asarray(list(rows), dtype=np.int64)
+        if len(idx) == 0:
+            return []
+        strings = self._strings
+        cols = []
+        for name, kind, key in self._layout:
+            if kind == "str":
+                cols.append([strings[c] for c in self._str[key][idx].tolist()])
+                continue
+            if kind == "none":
+                cols.append([None] * len(idx))
+                continue
+            if kind == "array":
+                values, present = self._matrix[key][idx], self._matrix_set[key][idx]
+                cols.append([
+                    [v if p else None for v, p in zip(vals, pres)]
+                    for vals, pres in zip(values.tolist(), present.tolist())
+                ])
+                continue
+            if kind == "float":
+                values, present = self._float[key][idx], self._float_set[key][idx]
+            else:
+                values, present = self._matrix[kind][idx, key], self._matrix_set[kind][idx, key]
+            cols.append([v if p else None for v, p in zip(values.tolist(), present.tolist())])
+        names = self._names
+        return [dict(zip(names, values)) for values in zip(*cols)]
+
+    def to_models(self, rows: Optional[Iterable[int]] = None) -> List[SignalResult]:
+        """Materialize rows as SignalResult objects (API boundary only)."""
+        return [SignalResult.model_construct(**d) for d in self.to_dicts(rows)]
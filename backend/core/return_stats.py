@@ -0,0 +1,152 @@
+"""Mergeable streaming statistics for per-horizon trade returns.
+
+Each horizon keeps a fixed-bin histogram of returns (in percent) plus exact
+count / mean / M2 / min / max. Two sketches with the same binning merge by
+adding counts, so partial results from batches, shards or a cached report
+combine into the same statistics as a single pass. Quantiles are read off the
+histogram and are accurate to one bin width.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import Stats
+
+
+class ReturnSketch:
+    """Fixed-bin histogram + exact moments for one stream of returns."""
+
+    def __init__(self, lo: float = Stats.SKETCH_MIN, hi: float = Stats.SKETCH_MAX,
+                 width: float = Stats.SKETCH_BIN_WIDTH):
+        self.lo, self.hi, self.width = float(lo), float(hi), float(width)
+        self.bins = np.zeros(int(round((self.hi - self.lo) / self.width)), dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _compatible(self, other: "ReturnSketch") -> bool:
+        return (self.lo, self.hi, self.width) == (other.lo, other.hi, other.width)
+
+    def _merge_moments(self, count: int, mean: float, m2: float, lo: float, hi: float):
+        # Chan et al. parallel variance update
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    def add(self, values) -> None:
+        """Add a batch of returns (NaNs are skipped)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        # Returns are rounded to 0.01, so snap before flooring to keep bin edges stable
+        idx = np.floor(np.round((values - self.lo) / self.width, 6)).astype(np.int64)
+        np.clip(idx, 0, len(self.bins) - 1, out=idx)
+        self.bins += np.bincount(idx, minlength=len(self.bins))
+        mean = float(values.mean())
+        self._merge_moments(len(values), mean, float(((values - mean) ** 2).sum()),
+                            float(values.min()), float(values.max()))
+
+    def merge(self, other: "ReturnSketch") -> "ReturnSketch":
+        if not self._compatible(other):
+            raise ValueError("Cannot merge sketches with different binning")
+        if other.count:
+            self.bins += other.bins
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cum = np.cumsum(self.bins)
+        b = int(np.searchsorted(cum, rank, side="left"))
+        b = min(b, len(self.bins) - 1)
+        before = cum[b - 1] if b > 0 else 0
+        in_bin = self.bins[b]
+        frac = (rank - before) / in_bin if in_bin else 0.0
+        value = self.lo + (b + frac) * self.width
+        return float(min(max(value, self.min), self.max))
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1)."""
+        if self.count < 2:
+            return None
+        return float(np.sqrt(self.m2 / (self.count - 1)))
+
+    def summary(self) -> Optional[dict]:
+        if self.count == 0:
+            return None
+        std = self.std
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 2),
+            "std": round(std, 2) if std is not None else None,
+            "min": round(self.min, 2),
+            "p10": round(self.quantile(0.10), 2),
+            "median": round(self.quantile(0.50), 2),
+            "p90": round(self.quantile(0.90), 2),
+            "max": round(self.max, 2),
+        }
+
+    def to_dict(self) -> dict:
+        """Compact (sparse) form for caching alongside a report."""
+        nz = np.flatnonzero(self.bins)
+        return {
+            "lo": self.lo, "hi": self.hi, "width": self.width,
+            "idx": nz.tolist(), "counts": self.bins[nz].tolist(),
+            "count": self.count, "mean": self.mean, "m2": self.m2,
+            "min": self.min, "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReturnSketch":
+        sketch = cls(data["lo"], data["hi"], data["width"])
+        sketch.bins[np.asarray(data["idx"], dtype=np.int64)] = np.asarray(data["counts"], dtype=np.int64)
+        sketch.count = int(data["count"])
+        sketch.mean = float(data["mean"])
+        sketch.m2 = float(data["m2"])
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+class HorizonSketches:
+    """One ReturnSketch per horizon, fed from ResultBuffer return-matrix rows."""
+
+    def __init__(self, horizons: Sequence[int]):
+        self.horizons = tuple(horizons)
+        self.sketches = [ReturnSketch() for _ in self.horizons]
+
+    def add_matrix(self, values: np.ndarray, present: np.ndarray) -> None:
+        """Add a ``[rows, horizons]`` block of returns, using only the present cells."""
+        for j, sketch in enumerate(self.sketches):
+            sketch.add(values[present[:, j], j])
+
+    def merge(self, other: "HorizonSketches") -> "HorizonSketches":
+        """Merge another run's sketches; horizons missing from ``other`` are left as they are."""
+        theirs = dict(zip(other.horizons, other.sketches))
+        for h, sketch in zip(self.horizons, self.sketches):
+            if h in theirs:
+                sketch.merge(theirs[h])
+        return self
+
+    def summaries(self) -> List[Optional[dict]]:
+        return [sketch.summary() for sketch in self.sketches]
+
+    def to_dict(self) -> Dict[str, dict]:
+        return {str(h): sketch.to_dict() for h, sketch in zip(self.horizons, self.sketches)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, dict]) -> "HorizonSketches":
+        horizons = sorted(int(h) for h in data)
+        out = cls(horizons)
+        out.sketches = [ReturnSketch.from_dict(data[str(h)]) for h in horizons]
+        return out
@@ -0,0 +1,163 @@
+"""Local symbol master: exchange, sector, industry and market-cap bucket per symbol.
+
+Held in memory and backed by one CSV (``SymbolMasterConfig.PATH``), loaded
+at startup. ``DataProvider.get_ticker_info`` answers from it, so Phase B
+enrichment is a dictionary lookup instead of a Yahoo ``.info`` call. It is
+fed by the sector/market-cap columns of uploaded ChartInk CSVs, by the
+nightly warmer, and by any ``.info`` lookup that still has to happen.
+Market caps are kept as ChartInk-style buckets (Largecap / Midcap / Smallcap).
+"""
+import csv
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import SymbolMasterConfig
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("symbol", "exchange", "sector", "industry", "market_cap", "source", "updated_at")
+
+_BUCKETS = {"largecap": "Largecap", "large cap": "Largecap", "midcap": "Midcap", "mid cap": "Midcap",
+            "smallcap": "Smallcap", "small cap": "Smallcap", "microcap": "Smallcap", "micro cap": "Smallcap"}
+
+
+def market_cap_bucket(value) -> Optional[str]:
+    """Bucket a market cap given as a ChartInk name ("Smallcap") or a number in rupees."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    bucket = _BUCKETS.get(text.lower())
+    if bucket:
+        return bucket
+    try:
+        cap = float(text)
+    except ValueError:
+        return text
+    if cap != cap or cap <= 0:
+        return None
+    if cap >= SymbolMasterConfig.LARGE_CAP_MIN:
+        return "Largecap"
+    if cap >= SymbolMasterConfig.MID_CAP_MIN:
+        return "Midcap"
+    return "Smallcap"
+
+
+def exchange_of(symbol: str) -> Optional[str]:
+    if symbol.endswith(".NS"):
+        return "NSE"
+    if symbol.endswith(".BO"):
+        return "BSE"
+    return None
+
+
+class SymbolMaster:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Serializes save() so the file always ends up with the newest snapshot
+        self._save_lock = threading.Lock()
+        self._rows: Dict[str, dict] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def load(self) -> int:
+        """(Re)read the backing CSV; returns the number of symbols."""
+        rows = {}
+        if self.path.is_file():
+            with open(self.path, newline="") as f:
+                for row in csv.DictReader(f):
+                    if row.get("symbol"):
+                        rows[row["symbol"]] = {k: (row.get(k) or None) for k in FIELDS}
+        with self._lock:
+            self._rows = rows
+            self._loaded = True
+            self._dirty = False
+        logger.info("Symbol master — loaded %d symbols from %s", len(rows), self.path)
+        return len(rows)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """``{"sector", "marketCap"}`` in ``get_ticker_info`` form, or None when unknown."""
+        self._ensure_loaded()
+        row = self._rows.get(symbol)
+        if row is None or not (row["sector"] or row["market_cap"]):
+            return None
+        return {"sector": row["sector"], "marketCap": row["market_cap"]}
+
+    def row(self, symbol: str) -> Optional[dict]:
+        self._ensure_loaded()
+        row = self._rows.get(symbol)
+        return dict(row) if row else None
+
+    def upsert(self, records: Dict[str, dict], source: str) -> int:
+        """Merge ``{symbol: {"sector", "marketCap", "industry"}}``; non-empty values win. Returns rows changed."""
+        self._ensure_loaded()
+        changed = 0
+        now = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            for sym, meta in records.items():
+                update = {
+                    "sector": (str(meta.get("sector")).strip() or None) if meta.get("sector") else None,
+                    "industry": (str(meta.get("industry")).strip() or None) if meta.get("industry") else None,
+                    "market_cap": market_cap_bucket(meta.get("marketCap")),
+                }
+                update = {k: v for k, v in update.items() if v}
+                if not update:
+                    continue
+                current = self._rows.get(sym)
+                if current is None:
+                    current = {k: None for k in FIELDS}
+                    current.update(symbol=sym, exchange=exchange_of(sym))
+                elif all(current.get(k) == v for k, v in update.items()):
+                    continue
+                current.update(update, source=source, updated_at=now)
+                self._rows[sym] = current
+                changed += 1
+            if changed:
+                self._dirty = True
+        return changed
+
+    def save(self) -> bool:
+        """Write the table back if it changed since the last load/save (atomic replace).
+
+        The temp file is unique per writer, so a warmer process and the app
+        saving at once cannot interleave their rows in one file.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                rows = [dict(r) for r in self._rows.values()]
+                self._dirty = False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp")
+            try:
+                with open(tmp, "w", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=FIELDS)
+                    writer.writeheader()
+                    for row in sorted(rows, key=lambda r: r["symbol"]):
+                        writer.writerow(row)
+                os.replace(tmp, self.path)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                with self._lock:
+                    self._dirty = True
+                raise
+        return True
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._rows)
+
+
+symbol_master = SymbolMaster(SymbolMasterConfig.PATH)
@@ -1,17 +1,18 @@
 import logging
 
 import pandas as pd
-import yfinance as yf
-from diskcache import Cache
 
+from .cache_manager import caches
 from .data_provider import DataProvider, _yf_retry
-from ..config import Paths, CacheTTL, Limits
+from .fetch_controller import yf_controller
+from .market_source import get_source
+from ..config import CacheTTL
 
 logger = logging.getLogger(__name__)
 
 _NOT_CACHED = object()
 
-_disk_cache = Cache(Paths.CACHE_DIR, size_limit=CacheTTL.DISKCACHE_SIZE_LIMIT_MB * 1024 * 1024)
+_disk_cache = caches.namespace("resolve")
 
 class SymbolResolver:
     _mem_cache = {}
@@ -62,18 +63,16 @@ class SymbolResolver:
         if not uncached_keys and not pre_suffixed:
             return result
 
-        batch_size = Limits.BATCH_RESOLVE_CHUNK
-
         def _batch_check(suffix: str, keys: list) -> set:
             valid = set()
             suffixed = [f"{k}{suffix}" for k in keys]
-            for i in range(0, len(suffixed), batch_size):
-                chunk = suffixed[i:i + batch_size]
+            offset = 0
+            while offset < len(suffixed):
+                chunk = suffixed[offset:offset + yf_controller.chunk_size("resolve")]
+                offset += len(chunk)
                 try:
-                    data = _yf_retry(lambda: yf.download(
-                        tickers=chunk, period="1d",
-                        group_by='ticker', progress=False, threads=True
-                    ))
+                    data = _yf_retry(lambda: yf_controller.run(
+                        "resolve", chunk, lambda: get_source().download(chunk, period="1d")))
                     if data is None or data.empty:
                         continue
                     if isinstance(data.columns, pd.MultiIndex):
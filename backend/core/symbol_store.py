@@ -0,0 +1,106 @@
+"""Run-scoped in-memory store of per-symbol price frames.
+
+Phase C used to call ``DataProvider.get_ticker_data`` once per signal, which
+unpickles the symbol's whole cached DataFrame and then re-normalizes its index.
+The store loads each symbol once for the union of its signals' windows, keeps
+it as tz-naive NumPy arrays (``SymbolFrame``) and serves every signal window
+by binary search. Frames are evicted least-recently-used once the run's byte
+budget is exceeded; a frame's range tables count against the budget from the
+moment they are built.
+"""
+import logging
+from collections import OrderedDict
+from functools import partial
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_provider import DataProvider
+from .vector_engine import SymbolFrame
+from ..config import Limits
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolStore:
+    """LRU, byte-bounded cache of ``SymbolFrame`` objects for one backtest run.
+
+    ``ranges`` maps each symbol to the (start, end) union of the windows the
+    run will ask for; a symbol is loaded for that whole range on first use.
+    """
+
+    def __init__(self, ranges: Dict[str, Tuple[datetime, datetime]], max_bytes: Optional[int] = None):
+        self.ranges = ranges
+        self.max_bytes = Limits.SYMBOL_STORE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._frames: "OrderedDict[str, Optional[SymbolFrame]]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _load(self, symbol: str) -> Optional[SymbolFrame]:
+        start, end = self.ranges[symbol]
+        df = DataProvider.get_ticker_data(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        self.stats["loads"] += 1
+        if df is None or df.empty:
+            # Union range unavailable: the caller falls back to per-signal windows
+            return None
+        return SymbolFrame.from_dataframe(df)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            _, frame = self._frames.popitem(last=False)
+            self._bytes -= frame.nbytes if frame is not None else 0
+            self.stats["evictions"] += 1
+
+    def _grew(self, symbol: str, frame: SymbolFrame, added: int):
+        """A stored frame built a range table: count it and re-check the budget."""
+        if self._frames.get(symbol) is not frame:
+            return      # already evicted; nothing of ours to account
+        self._bytes += added
+        self._frames.move_to_end(symbol)
+        self._evict()
+
+    def frame(self, symbol: str) -> Optional[SymbolFrame]:
+        """The symbol's frame for its whole run range (None when no data could be loaded)."""
+        if symbol in self._frames:
+            self._frames.move_to_end(symbol)
+            self.stats["hits"] += 1
+            return self._frames[symbol]
+        frame = self._load(symbol)
+        self._frames[symbol] = frame
+        if frame is not None:
+            self._bytes += frame.nbytes
+            frame.on_grow = partial(self._grew, symbol)
+        self._evict()
+        return frame
+
+    def view(self, symbol: str, start_date: str, end_date: str) -> Tuple[SymbolFrame, int, int]:
+        """``(frame, lo, hi)``: rows ``[lo, hi)`` of ``frame`` are ``start_date <= date <= end_date``.
+
+        ``frame`` is the symbol's run-wide frame, so its calendar is shared by
+        every signal of the symbol. Symbols outside the run's ranges, or whose
+        union range could not be loaded, get a frame over just this window.
+        """
+        frame = self.frame(symbol) if symbol in self.ranges else None
+        if frame is None:
+            frame = SymbolFrame.from_dataframe(DataProvider.get_ticker_data(symbol, start_date, end_date))
+            return frame, 0, len(frame)
+        lo = int(frame.calendar.lower_bound(np.datetime64(pd.Timestamp(start_date), "ns")))
+        hi = int(frame.calendar.upper_bound(np.datetime64(pd.Timestamp(end_date), "ns")))
+        return frame, lo, hi
+
+    def window(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Rows with ``start_date <= date <= end_date`` as a tz-naive, date-sorted DataFrame.
+
+        Same rows as ``get_ticker_data(symbol, start_date, end_date)`` on a cache hit.
+        """
+        frame, lo, hi = self.view(symbol, start_date, end_date)
+        return frame.to_dataframe(lo, hi)
@@ -0,0 +1,202 @@
+"""Vectorized per-symbol Phase C engine.
+
+Loads a symbol's OHLCV once as NumPy arrays and computes signal-day close,
+entry price, every horizon exit and the max high/low window for all signals
+of that symbol in one batched pass. All horizons are resolved together as a
+``[signals, horizons]`` gather over the close array. Mirrors the per-signal loop in
+``Backtester.run_backtest_async`` value for value, so the two can be diffed.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..utils.date_utils import TradingCalendar
+from ..utils.range_query import SparseTable
+
+_DAY = np.timedelta64(1, "D")
+
+
+@dataclass
+class SymbolFrame:
+    """tz-naive, date-sorted OHLC arrays for one symbol."""
+    calendar: TradingCalendar
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    _high_max: Optional[SparseTable] = field(default=None, init=False, repr=False)
+    _low_min: Optional[SparseTable] = field(default=None, init=False, repr=False)
+    # Called with (frame, added_bytes) when a range table is built, so a byte budget can re-check
+    on_grow: Optional[Callable[["SymbolFrame", int], None]] = field(default=None, init=False, repr=False)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.calendar.dates
+
+    @property
+    def high_max(self) -> SparseTable:
+        """Range-max index over High, built on first use and reused for every signal."""
+        if self._high_max is None:
+            self._high_max = SparseTable(self.high, "max")
+            self._grew(self._high_max.nbytes)
+        return self._high_max
+
+    @property
+    def low_min(self) -> SparseTable:
+        if self._low_min is None:
+            self._low_min = SparseTable(self.low, "min")
+            self._grew(self._low_min.nbytes)
+        return self._low_min
+
+    def _grew(self, added: int):
+        if self.on_grow is not None:
+            self.on_grow(self, added)
+
+    def __len__(self) -> int:
+        return len(self.calendar)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the OHLC arrays plus whichever range tables have been built."""
+        arrays = self.dates.nbytes + self.open.nbytes + self.high.nbytes + self.low.nbytes + self.close.nbytes
+        return arrays + sum(t.nbytes for t in (self._high_max, self._low_min) if t is not None)
+
+    def to_dataframe(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """OHLC rows ``[start, stop)`` as a tz-naive DataFrame (views onto the arrays)."""
+        sl = slice(start, stop)
+        return pd.DataFrame(
+            {"Open": self.open[sl], "High": self.high[sl], "Low": self.low[sl], "Close": self.close[sl]},
+            index=pd.DatetimeIndex(self.dates[sl]),
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: Optional[pd.DataFrame]) -> "SymbolFrame":
+        if df is None or df.empty:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(TradingCalendar(np.empty(0, dtype="datetime64[ns]")), empty, empty, empty, empty)
+
+        index = pd.to_datetime(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        dates = index.to_numpy(dtype="datetime64[ns]")
+        order = None if index.is_monotonic_increasing else np.argsort(dates, kind="stable")
+
+        def col(name):
+            if name not in df.columns:
+                return np.full(len(df), np.nan)
+            values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            return values if order is None else values[order]
+
+        if order is not None:
+            dates = dates[order]
+        return cls(TradingCalendar(dates), col("Open"), col("High"), col("Low"), col("Close"))
+
+
+def _day_str(value: np.datetime64) -> str:
+    return str(np.datetime_as_string(value, unit="D"))
+
+
+def compute_symbol_signals(
+    frame: SymbolFrame,
+    signal_dates: List,
+    end_dates: List,
+    entry_mode: str,
+    duration: int,
+    horizons: List[int],
+    max_lookahead: int = 5,
+    horizon_span: Optional[int] = None,
+) -> List[dict]:
+    """Compute Phase C fields for every signal of one symbol.
+
+    ``signal_dates`` / ``end_dates`` bound each signal's data window exactly like
+    the per-signal ``get_ticker_data(symbol, start, end)`` slice. Returns one dict
+    per signal with a ``status`` key ("Success", "No Data", "No Entry Data") and,
+    on success, the SignalResult price fields plus ``returns`` / ``exit_prices``
+    lists aligned with ``horizons`` (NaN where a horizon has no exit). Horizons
+    past ``horizon_span`` (default ``duration``) are left empty.
+    """
+    n = len(signal_dates)
+    if n == 0:
+        return []
+    if len(frame) == 0:
+        return [{"status": "No Data"} for _ in range(n)]
+
+    cal = frame.calendar
+    dates = frame.dates
+    sig = np.asarray(signal_dates, dtype="datetime64[ns]")
+
+    lo = cal.lower_bound(sig)
+    hi = cal.upper_bound(end_dates)
+    has_data = lo < hi
+
+    sig_idx = cal.next_on_or_after(sig, max_lookahead, limit=hi)
+    entry_idx = cal.next_after(sig, max_lookahead, limit=hi)
+    has_entry = has_data & (entry_idx >= 0)
+
+    safe_entry = np.where(has_entry, entry_idx, 0)
+    entry_dates = dates[safe_entry]
+    price_col = frame.open if entry_mode == "next_open" else frame.close
+    entry_price = price_col[safe_entry]
+    signal_close = np.where(sig_idx >= 0, frame.close[np.maximum(sig_idx, 0)], np.nan)
+
+    # Every horizon exit in one [signals, horizons] lookup + gather
+    span = duration if horizon_span is None else horizon_span
+    h_days = np.asarray(horizons, dtype=np.int64)
+    width = len(h_days)
+    targets = entry_dates[:, None] + h_days[None, :] * _DAY
+    exit_idx = cal.next_on_or_after(targets.ravel(), max_lookahead, limit=np.repeat(hi, width)).reshape(n, width)
+    exit_price = np.where(exit_idx >= 0, frame.close[np.maximum(exit_idx, 0)], np.nan)
+    entry_ok = has_entry & ~np.isnan(entry_price) & (entry_price != 0)
+    valid = (entry_ok[:, None] & (exit_idx >= 0) & ~np.isnan(exit_price)) & (h_days <= span)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = ((exit_price - entry_price[:, None]) / entry_price[:, None]) * 100
+    returns = np.where(valid, np.round(ret, 2), np.nan).tolist()
+    exits = np.where(valid, np.round(exit_price, 2), np.nan).tolist()
+
+    # Max High / min Low over [entry, entry + duration]: O(1) sparse-table query per signal
+    window_hi = np.minimum(cal.upper_bound(entry_dates + duration * _DAY), hi)
+    in_window = has_entry & (window_hi > entry_idx)
+    high_pos = np.full(n, -1, dtype=np.int64)
+    low_pos = np.full(n, -1, dtype=np.int64)
+    if in_window.any():
+        starts = entry_idx[in_window]
+        stops = window_hi[in_window]
+        high_pos[in_window] = frame.high_max.query(starts, stops)
+        low_pos[in_window] = frame.low_min.query(starts, stops)
+    max_high = np.where(high_pos >= 0, frame.high[np.maximum(high_pos, 0)], np.nan)
+    max_low = np.where(low_pos >= 0, frame.low[np.maximum(low_pos, 0)], np.nan)
+    max_high_r = np.round(max_high, 2).tolist()
+    max_low_r = np.round(max_low, 2).tolist()
+
+    entry_price_r = np.round(entry_price, 2).tolist()
+    signal_close_r = np.round(signal_close, 2).tolist()
+
+    out = []
+    for i in range(n):
+        if not has_data[i]:
+            out.append({"status": "No Data"})
+            continue
+        if not has_entry[i]:
+            out.append({"status": "No Entry Data"})
+            continue
+
+        e = int(entry_idx[i])
+        row = {
+            "status": "Success",
+            "signal_close_price": signal_close_r[i] if sig_idx[i] >= 0 else None,
+            "entry_date": _day_str(dates[e]),
+            "entry_price": entry_price_r[i],
+            "returns": returns[i],
+            "exit_prices": exits[i],
+        }
+
+        if not np.isnan(max_high[i]):
+            row["max_high_90d"] = max_high_r[i]
+            row["max_high_date"] = _day_str(dates[high_pos[i]])
+        if not np.isnan(max_low[i]):
+            row["max_low_90d"] = max_low_r[i]
+            row["max_low_date"] = _day_str(dates[low_pos[i]])
+        out.append(row)
+    return out
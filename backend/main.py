@@ -17,11 +17,16 @@ import io
 from typing import List, Dict, Optional
 
 from backend.logging_config import setup_logging
-from backend.core.backtester import Backtester
-from backend.core.data_provider import DataProvider
-from backend.models.schemas import BacktestReport
-from backend.config import Limits, Paths, is_render, PERSISTENCE_ENABLED, WORKER_URL, DATABASE_URL, PERSISTENCE_TIMEOUT
-from backend.storage import FileHashCache, JobStorage, compute_file_hash, generate_run_id
+from backend.core.backtester import Backtester, shutdown_process_pool
+from backend.core.cache_manager import caches
+from backend.core.data_provider import DataProvider, latest_refresher
+from backend.core.market_store import MarketStore
+from backend.core.symbol_master import symbol_master
+from backend.models.schemas import BacktestReport, SignalResult
+from backend.config import Limits, Paths, Incremental, LatestPrices, is_render, PERSISTENCE_ENABLED, WORKER_URL, DATABASE_URL, PERSISTENCE_TIMEOUT
+from backend.storage import FileHashCache, JobStorage, ReportLineage, compute_file_hash, generate_run_id
+from backend.core.incremental import plan_incremental, run_incremental_backtest, signal_row_key
+from backend.utils.horizons import normalize_horizons, report_mode
 from backend.persistence import (
     D1WorkerBackend, PostgresBackend, NullBackend, PersistenceBackend,
     UploadRecord, TradeRecord, compute_row_hash, _build_results_json,
@@ -47,7 +52,18 @@ async def lifespan(app: FastAPI):
                 logger.info("Schema migration executed (new tables created if not exist)")
     except Exception:
         logger.warning("Schema migration failed (non-blocking, tables may already exist)")
+    await asyncio.to_thread(symbol_master.load)
+    try:
+        await asyncio.to_thread(MarketStore.sweep)
+    except Exception:
+        logger.warning("Market store sweep failed (non-blocking)", exc_info=True)
+    if LatestPrices.REFRESH_ENABLED:
+        latest_refresher.start()
     yield
+    await latest_refresher.stop()
+    await asyncio.to_thread(shutdown_process_pool)
+    await asyncio.to_thread(symbol_master.save)
+    caches.close()
     await persistence_backend.close()
 
 
@@ -197,7 +213,8 @@ async def get_symbol_prices(symbol: str, start: str = None, end: str = None):
         candidates = [f"{symbol}.NS", f"{symbol}.BO"]
 
     for s in candidates:
-        df = await asyncio.wait_for(asyncio.to_thread(DataProvider.get_ticker_data, s, start, end), timeout=30)
+        df = await asyncio.wait_for(asyncio.to_thread(DataProvider.get_ticker_data, s, start, end),
+                                    timeout=Limits.SYMBOL_FETCH_TIMEOUT_SEC)
         if df is not None and not df.empty:
             prices = []
             for idx, row in df.iterrows():
@@ -232,7 +249,9 @@ async def _persist_upload(
     ingestion_id: str,
     user_id: Optional[str] = None,
     duration: int = 90,
+    horizons: Optional[tuple] = None,
 ) -> None:
+    horizons = normalize_horizons(horizons)
     try:
         record = UploadRecord(file_hash, filename, entry_mode, len(report.trades), user_id=user_id or "")
         upload_id = await persistence_backend.save_upload(record)
@@ -242,21 +261,23 @@ async def _persist_upload(
 
         if user_id and user_id != "anonymous":
             try:
-                await persistence_backend.set_file_upload_map(user_id, file_hash, entry_mode, upload_id)
+                await persistence_backend.set_file_upload_map(
+                    user_id, file_hash, report_mode(entry_mode, horizons), upload_id
+                )
             except Exception:
                 logger.exception("file_upload_map insert failed (non-blocking)")
 
         trade_records = []
         for t in report.trades:
             trade_records.append(TradeRecord(
-                row_hash=compute_row_hash(t.symbol, t.signal_date, entry_mode, duration),
+                row_hash=compute_row_hash(t.symbol, t.signal_date, entry_mode, duration, horizons),
                 symbol=t.symbol,
                 signal_date=t.signal_date,
                 entry_date=t.entry_date,
                 entry_price=t.entry_price,
                 entry_mode=entry_mode,
                 status=t.status,
-                results_json=_build_results_json(t),
+                results_json=_build_results_json(t, horizons),
             ))
 
         result = await persistence_backend.save_signals(upload_id, trade_records, user_id=user_id)
@@ -272,7 +293,7 @@ async def _persist_upload(
                     signal_data.append({
                         "id": str(uuid.uuid4()),
                         "user_id": user_id,
-                        "row_hash": compute_row_hash(t.symbol, t.signal_date, entry_mode, duration),
+                        "row_hash": compute_row_hash(t.symbol, t.signal_date, entry_mode, duration, horizons),
                         "upload_id": upload_id,
                         "symbol": t.symbol,
                         "signal_date": t.signal_date,
@@ -280,7 +301,7 @@ async def _persist_upload(
                         "entry_price": t.entry_price,
                         "entry_mode": entry_mode,
                         "duration": duration,
-                        "results_json": _build_results_json(t),
+                        "results_json": _build_results_json(t, horizons),
                         "max_high_90d": t.max_high_90d,
                         "max_low_90d": t.max_low_90d,
                         "sector": t.sector,
@@ -303,19 +324,43 @@ async def _persist_upload(
         logger.exception("Failed to update ingestion status (non-blocking)")
 
 
+def _find_incremental_base(file_hash: str, mode_key: str, row_keys: List[str], user_id: Optional[str]):
+    """Closest earlier report of this user's lineage, as ``(report_dict, reuse, new_rows)``, or None."""
+    try:
+        base = ReportLineage.closest(user_id, mode_key, row_keys)
+        if base is None or base["file_hash"] == file_hash:
+            return None
+        if base["overlap"] < Incremental.MIN_OVERLAP * len(row_keys):
+            return None
+        previous = FileHashCache.get(base["file_hash"], mode_key)
+        if previous is None or len(previous.get("trades", [])) != len(base["row_keys"]):
+            return None
+        reuse, new_rows = plan_incremental(row_keys, base["row_keys"],
+                                           [t.get("status") for t in previous["trades"]])
+        logger.info("Incremental base %s: %d/%d rows reusable", base["file_hash"][:12], len(reuse), len(row_keys))
+        return previous, reuse, new_rows
+    except Exception:
+        logger.exception("Incremental base lookup failed (non-blocking, running full L3)")
+        return None
+
+
 async def _handle_backtest(
     data: bytes,
     entry_mode: str,
     progress_callback=None,
     filename: str = "upload",
     user_id: Optional[str] = None,
+    horizons: Optional[str] = None,
 ):
     """Shared backtest logic for WS and HTTP endpoints."""
     _check_file_size(data)
+    horizons = normalize_horizons(horizons)
+    # Reports for a non-default horizon set are cached separately from the entry mode's default report
+    mode_key = report_mode(entry_mode, horizons)
 
     file_hash = compute_file_hash(data)
 
-    cached = FileHashCache.get(file_hash, entry_mode)
+    cached = FileHashCache.get(file_hash, mode_key)
     if cached is not None:
         logger.info("Returning cached report for file_hash=%s", file_hash[:12])
 
@@ -352,7 +397,7 @@ async def _handle_backtest(
                     if latest_dates:
                         cached["latest_price_date"] = max(latest_dates)
                     cached["cache_source"] = "l1_diskcache"
-                    FileHashCache.set(file_hash, entry_mode, cached)
+                    FileHashCache.set(file_hash, mode_key, cached)
         except Exception:
             logger.exception("L1 freshness check failed (non-blocking)")
         cached["cache_source"] = cached.get("cache_source", "l1_diskcache")
@@ -372,7 +417,7 @@ async def _handle_backtest(
     # ── L2 cache check (DB) ─────────────────────────────────
     if PERSISTENCE_ENABLED and user_id and user_id != "anonymous":
         try:
-            upload_data = await persistence_backend.get_upload_by_user_and_hash(user_id, file_hash, entry_mode)
+            upload_data = await persistence_backend.get_upload_by_user_and_hash(user_id, file_hash, mode_key)
             if upload_data and upload_data.get("status") == "completed":
                 upload_id = upload_data["id"]
                 logger.info("L2 cache HIT for file_hash=%s user=%s", file_hash[:12], user_id[:8])
@@ -404,13 +449,12 @@ async def _handle_backtest(
                             "latest_price_return": None,
                         }
                         # Set horizon returns from results_json
-                        for h in (7, 14, 30, 45, 60, 90):
-                            ret_key = f"return_{h}d"
-                            exit_key = f"exit_price_{h}d"
-                            if ret_key in results:
-                                trade[ret_key] = results[ret_key]
-                            if exit_key in results:
-                                trade[exit_key] = results[exit_key]
+                        trade["returns"] = [results.get(f"return_{h}d") for h in horizons]
+                        trade["exit_prices"] = [results.get(f"exit_price_{h}d") for h in horizons]
+                        for h, ret, exit_price in zip(horizons, trade["returns"], trade["exit_prices"]):
+                            if f"return_{h}d" in SignalResult.model_fields:
+                                trade[f"return_{h}d"] = ret
+                                trade[f"exit_price_{h}d"] = exit_price
                         # Extract additional stored fields
                         for field in ("signal_close_price", "max_high_date", "max_low_date"):
                             if field in results:
@@ -443,7 +487,6 @@ async def _handle_backtest(
                     report_trades = []
                     for t in trades:
                         try:
-                            from backend.models.schemas import SignalResult
                             report_trades.append(SignalResult(**t))
                         except Exception as e:
                             logger.warning("Trade %s failed validation in L2 reconstruction: %s", t.get("symbol", "?"), e)
@@ -454,14 +497,15 @@ async def _handle_backtest(
                         failed_signals=failed_count,
                         entry_mode=entry_mode,
                         trades=report_trades,
+                        horizons=list(horizons),
                         latest_price_date=max(latest_dates) if latest_dates else None,
                         cache_source="l2_db",
                         cache_stats=DataProvider.get_cache_stats(),
                     )
 
                     # Invalidate + rewrite L1 cache
-                    FileHashCache.delete(file_hash, entry_mode)
-                    FileHashCache.set(file_hash, entry_mode, report.model_dump())
+                    FileHashCache.delete(file_hash, mode_key)
+                    FileHashCache.set(file_hash, mode_key, report.model_dump())
 
                     if progress_callback is not None:
                         batch_size = Limits.BATCH_SIZE
@@ -498,31 +542,56 @@ async def _handle_backtest(
         except Exception:
             logger.warning("Ingestion log write failed (non-blocking)")
 
-    run_id = generate_run_id(file_hash, entry_mode)
+    # ── L3 incremental: splice onto the closest earlier report of this lineage ──
+    row_keys = [signal_row_key(s) for s in signals]
+    report = None
+    base = _find_incremental_base(file_hash, mode_key, row_keys, user_id) if Incremental.ENABLED else None
+    run_id = generate_run_id(file_hash, mode_key)
     job_store = JobStorage(run_id)
     job_store.save_metadata({
         "file_hash": file_hash,
         "entry_mode": entry_mode,
+        "horizons": list(horizons),
         "signal_count": len(signals),
+        "incremental": base is not None,
     })
+    if base is not None:
+        previous, reuse, new_rows = base
+        report = await run_incremental_backtest(
+            signals, previous, reuse, new_rows,
+            progress_callback=progress_callback,
+            entry_mode=entry_mode,
+            run_id=run_id,
+            job_store=job_store,
+            persistence_backend=persistence_backend if PERSISTENCE_ENABLED else None,
+            horizons=horizons,
+        )
+        FileHashCache.set(file_hash, mode_key, report.model_dump())
+    else:
+        report = await Backtester.run_backtest_async(
+            signals,
+            progress_callback=progress_callback,
+            entry_mode=entry_mode,
+            run_id=run_id,
+            job_store=job_store,
+            persistence_backend=persistence_backend if PERSISTENCE_ENABLED else None,
+            horizons=horizons,
+        )
 
-    report = await Backtester.run_backtest_async(
-        signals,
-        progress_callback=progress_callback,
-        entry_mode=entry_mode,
-        run_id=run_id,
-        job_store=job_store,
-        persistence_backend=persistence_backend if PERSISTENCE_ENABLED else None,
-    )
-
-    report_dict = report.model_dump()
-    report.cache_source = "l3_compute"
-    FileHashCache.set(file_hash, entry_mode, report_dict)
+        report_dict = report.model_dump()
+        report.cache_source = "l3_compute"
+        FileHashCache.set(file_hash, mode_key, report_dict)
     job_store.cleanup()
 
+    try:
+        ReportLineage.record(user_id, mode_key, file_hash, row_keys)
+    except Exception:
+        logger.exception("Report lineage write failed (non-blocking)")
+
     if PERSISTENCE_ENABLED and ingestion_id:
         try:
-            await _persist_upload(file_hash, filename, entry_mode, report, ingestion_id, user_id=user_id)
+            await _persist_upload(file_hash, filename, entry_mode, report, ingestion_id, user_id=user_id,
+                                  horizons=horizons)
         except Exception:
             logger.exception("Persistence failed after backtest (non-blocking)")
 
@@ -530,7 +599,7 @@ async def _handle_backtest(
 
 
 @app.websocket("/ws/backtest")
-async def websocket_endpoint(websocket: WebSocket, entry_mode: str = "next_close"):
+async def websocket_endpoint(websocket: WebSocket, entry_mode: str = "next_close", horizons: Optional[str] = None):
     await websocket.accept()
     stop_event = asyncio.Event()
 
@@ -579,7 +648,8 @@ async def websocket_endpoint(websocket: WebSocket, entry_mode: str = "next_close
                 pass
 
         try:
-            report = await _handle_backtest(data, entry_mode, progress_callback=on_progress, filename="websocket_upload", user_id=user_id)
+            report = await _handle_backtest(data, entry_mode, progress_callback=on_progress, filename="websocket_upload",
+                                            user_id=user_id, horizons=horizons)
             report_dict = report.model_dump()
 
             # Build compact per-symbol latest_price map (3 fields per symbol, ~175KB for 1168 symbols)
@@ -615,7 +685,8 @@ async def websocket_endpoint(websocket: WebSocket, entry_mode: str = "next_close
 
 
 @app.post("/api/backtest", response_model=BacktestReport)
-async def run_backtest_endpoint(file: UploadFile = File(...), entry_mode: str = Form("next_close"), authorization: str = Header(None)):
+async def run_backtest_endpoint(file: UploadFile = File(...), entry_mode: str = Form("next_close"),
+                                horizons: Optional[str] = Form(None), authorization: str = Header(None)):
     """REST endpoint for backtest — no progress updates, returns full report."""
     try:
         contents = await file.read()
@@ -626,7 +697,8 @@ async def run_backtest_endpoint(file: UploadFile = File(...), entry_mode: str =
             user = await _validate_token(token)
             if user is not None:
                 user_id = user.get("id", "anonymous")
-        report = await _handle_backtest(contents, entry_mode, filename=file.filename or "upload", user_id=user_id)
+        report = await _handle_backtest(contents, entry_mode, filename=file.filename or "upload", user_id=user_id,
+                                        horizons=horizons)
         return report
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
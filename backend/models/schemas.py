@@ -33,6 +33,10 @@ class SignalResult(BaseModel):
     
     return_90d: Optional[float] = None
     exit_price_90d: Optional[float] = None
+
+    # Per-horizon values aligned with BacktestReport.horizons (any horizon set)
+    returns: Optional[List[Optional[float]]] = None
+    exit_prices: Optional[List[Optional[float]]] = None
     
     # Max High/Low in 90d
     max_high_90d: Optional[float] = None
@@ -47,6 +51,17 @@ class SignalResult(BaseModel):
     latest_price: Optional[float] = None
     latest_price_date: Optional[str] = None
 
+class HorizonStats(BaseModel):
+    """Distribution of one horizon's returns, from the run's streaming sketch."""
+    count: int
+    mean: float
+    std: Optional[float] = None
+    min: float
+    p10: float
+    median: float
+    p90: float
+    max: float
+
 class BacktestReport(BaseModel):
     total_signals: int
     successful_signals: int
@@ -71,9 +86,21 @@ class BacktestReport(BaseModel):
     
     avg_return_90d: Optional[float] = None
     win_rate_90d: Optional[float] = None
-    
+
+    # Horizons evaluated for this report; avg_returns / win_rates and each
+    # trade's returns / exit_prices are aligned with it
+    horizons: List[int] = [7, 14, 30, 45, 60, 90]
+    avg_returns: Optional[List[Optional[float]]] = None
+    win_rates: Optional[List[Optional[float]]] = None
+    return_stats: Optional[List[Optional[HorizonStats]]] = None
+    # Serialized per-horizon sketches (HorizonSketches.to_dict) so cached reports can be merged
+    return_sketches: Optional[Dict[str, Any]] = None
+    
+    # Ranked by the 90-day return; when 90 is not among ``horizons``, by the
+    # longest requested horizon instead. performer_horizon says which one was used.
     best_performer: Optional[SignalResult] = None
     worst_performer: Optional[SignalResult] = None
+    performer_horizon: Optional[int] = None
     
     trades: List[SignalResult]
 
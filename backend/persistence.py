@@ -8,13 +8,19 @@ import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
+
+from .config import Horizons
+from .utils.horizons import is_default
 
 logger = logging.getLogger(__name__)
 
 
-def compute_row_hash(symbol: str, signal_date: str, entry_mode: str, duration: int = 90) -> str:
+def compute_row_hash(symbol: str, signal_date: str, entry_mode: str, duration: int = 90,
+                     horizons: Optional[Sequence[int]] = None) -> str:
     raw = f"{symbol}|{signal_date}|{entry_mode}|{duration}"
+    if horizons is not None and not is_default(horizons):
+        raw += "|" + ",".join(str(h) for h in horizons)
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
@@ -22,11 +28,19 @@ def _is_nan(value) -> bool:
     return isinstance(value, float) and math.isnan(value)
 
 
-def _build_results_json(trade) -> str:
+def _trade_horizon_values(trade, horizons: Sequence[int]):
+    """(horizon, return, exit_price) triples, from the per-horizon arrays when present."""
+    returns = getattr(trade, "returns", None)
+    exit_prices = getattr(trade, "exit_prices", None)
+    if returns is not None and exit_prices is not None:
+        return zip(horizons, returns, exit_prices)
+    return ((h, getattr(trade, f"return_{h}d", None), getattr(trade, f"exit_price_{h}d", None))
+            for h in horizons)
+
+
+def _build_results_json(trade, horizons: Sequence[int] = Horizons.DEFAULT) -> str:
     data = {}
-    for horizon in (7, 14, 30, 45, 60, 90):
-        ret = getattr(trade, f"return_{horizon}d", None)
-        exit_price = getattr(trade, f"exit_price_{horizon}d", None)
+    for horizon, ret, exit_price in _trade_horizon_values(trade, horizons):
         if ret is not None and not _is_nan(ret):
             data[f"return_{horizon}d"] = round(float(ret), 4)
         if exit_price is not None and not _is_nan(exit_price):
@@ -180,6 +194,11 @@ class PersistenceBackend(ABC):
     async def get_upload_status(self, upload_id: str) -> Optional[str]:
         ...
 
+    @abstractmethod
+    async def get_signal_universe(self) -> dict[str, str]:
+        """Every symbol in signal_results with its earliest signal_date."""
+        ...
+
     @abstractmethod
     async def set_ingestion_user(self, ingestion_id: str, user_id: str) -> bool:
         ...
@@ -283,6 +302,9 @@ class NullBackend(PersistenceBackend):
     async def get_upload_status(self, upload_id: str) -> Optional[str]:
         return None
 
+    async def get_signal_universe(self) -> dict[str, str]:
+        return {}
+
     async def set_ingestion_user(self, ingestion_id: str, user_id: str) -> bool:
         return False
 
@@ -457,6 +479,9 @@ class D1WorkerBackend(PersistenceBackend):
     async def get_upload_status(self, upload_id: str) -> Optional[str]:
         return None
 
+    async def get_signal_universe(self) -> dict[str, str]:
+        return {}
+
     async def set_ingestion_user(self, ingestion_id: str, user_id: str) -> bool:
         return False
 
@@ -885,6 +910,16 @@ class PostgresBackend(PersistenceBackend):
         )
         return row["status"] if row else None
 
+    async def get_signal_universe(self) -> dict[str, str]:
+        row = await self._fetchrow(
+            "SELECT json_object_agg(symbol, first_date) AS results FROM ("
+            "SELECT symbol, MIN(signal_date) AS first_date FROM signal_results GROUP BY symbol) s"
+        )
+        if row and row.get("results"):
+            results = row["results"]
+            return json.loads(results) if isinstance(results, str) else dict(results)
+        return {}
+
     async def set_ingestion_user(self, ingestion_id: str, user_id: str) -> bool:
         result = await self._execute(
             "UPDATE ingestion_log SET user_id = $1 WHERE id = $2",
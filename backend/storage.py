@@ -7,13 +7,12 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 
-from diskcache import Cache
-
-from backend.config import Paths, CacheTTL, Limits
+from backend.config import Paths, CacheTTL, Limits, Incremental
+from backend.core.cache_manager import caches
 
 logger = logging.getLogger(__name__)
 
-_cache = Cache(Paths.CACHE_DIR, size_limit=CacheTTL.DISKCACHE_SIZE_LIMIT_MB * 1024 * 1024)
+_cache = caches.namespace("reports")
 
 
 def generate_run_id(file_hash: str, entry_mode: str) -> str:
@@ -55,6 +54,46 @@ class FileHashCache:
             logger.info("File hash cache DELETED: %s", key[:40])
 
 
+class ReportLineage:
+    """Recent uploads per user + report mode, with the row keys of each.
+
+    Lets an edited upload find the earlier report it overlaps most, so only
+    its new rows need computing. Only signed-in users have a lineage: anonymous
+    uploads share no identity, so one could otherwise pick up another's report.
+    """
+
+    @staticmethod
+    def _key(user_id: Optional[str], entry_mode: str) -> Optional[str]:
+        if not user_id or user_id == "anonymous":
+            return None
+        return f"lineage_{user_id}_{entry_mode}"
+
+    @staticmethod
+    def record(user_id: Optional[str], entry_mode: str, file_hash: str, row_keys: List[str]):
+        key = ReportLineage._key(user_id, entry_mode)
+        if key is None:
+            return
+        entries = [e for e in _cache.get(key, []) if e["file_hash"] != file_hash]
+        entries.insert(0, {"file_hash": file_hash, "row_keys": list(row_keys)})
+        _cache.set(key, entries[:Incremental.LINEAGE_DEPTH], expire=CacheTTL.FILE_HASH_REPORT)
+
+    @staticmethod
+    def closest(user_id: Optional[str], entry_mode: str, row_keys: List[str]) -> Optional[Dict[str, Any]]:
+        """Earlier upload sharing the most row keys with ``row_keys`` (most recent wins ties)."""
+        key = ReportLineage._key(user_id, entry_mode)
+        if key is None:
+            return None
+        wanted = set(row_keys)
+        best, best_overlap = None, 0
+        for entry in _cache.get(key, []):
+            overlap = len(wanted.intersection(entry["row_keys"]))
+            if overlap > best_overlap:
+                best, best_overlap = entry, overlap
+        if best is None:
+            return None
+        return {**best, "overlap": best_overlap}
+
+
 class JobStorage:
     """Manages per-run temp files for batch processing results."""
 
@@ -0,0 +1,96 @@
+"""Shared fixtures and synthetic bar builders for the backend tests."""
+import atexit
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+
+# The module-level caches, the symbol master and the warm state file take their
+# paths from CACHE_DIR at import time: point it away from backend/.cache before
+# any backend module is imported
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="backend-tests-")
+atexit.register(shutil.rmtree, os.environ["CACHE_DIR"], True)
+
+from backend.config import CacheNamespaces, Paths  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def market_dir(tmp_path, monkeypatch):
+    """Point the columnar market store at a per-test directory so no test
+    reads or writes the real backend/.cache/market."""
+    path = tmp_path / "market"
+    monkeypatch.setattr(Paths, "MARKET_DIR", str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Give every test empty diskcache namespaces and symbol master on ``tmp_path``.
+
+    Modules hold their namespace objects from import time, so the shared
+    ``caches`` keeps those objects and each one is pointed at the matching
+    namespace of a fresh per-test ``CacheManager`` with an empty hot tier.
+    """
+    from backend.core import cache_manager
+    from backend.core.symbol_master import symbol_master
+
+    path = tmp_path / "cache"
+    # One shard per namespace: opening 8 SQLite files per namespace per test dominates the suite
+    fresh = cache_manager.CacheManager(str(path / "diskcache"), CacheNamespaces.BUDGETS,
+                                       shards={name: 1 for name in CacheNamespaces.BUDGETS})
+    shared = cache_manager.caches
+    monkeypatch.setattr(shared, "root", fresh.root)
+    monkeypatch.setattr(shared, "_caches", dict(shared._caches))
+    for name, tiered in shared._caches.items():
+        monkeypatch.setattr(tiered, "disk", fresh.namespace(name).disk)
+        monkeypatch.setattr(tiered, "_hot", OrderedDict())
+        monkeypatch.setattr(tiered, "_bytes", 0)
+    monkeypatch.setattr(symbol_master, "path", path / "symbol_master.csv")
+    monkeypatch.setattr(symbol_master, "_rows", {})
+    monkeypatch.setattr(symbol_master, "_loaded", False)
+    yield path
+    shared.close()
+    fresh.close()
+
+
+def bars(symbols, start, end):
+    """Flat multi-symbol frame shaped like a yfinance bulk download (end exclusive)."""
+    dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+    frames = {s: pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5}, index=dates) for s in symbols}
+    return pd.concat(frames, axis=1)
+
+
+def symbol_bars(start="2023-01-02", periods=60, base=100.0):
+    """Single-symbol frame whose close rises by one each business day."""
+    dates = pd.bdate_range(start, periods=periods)
+    close = [base + i for i in range(periods)]
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Adj Close": close, "Volume": 1000}, index=pd.Index(dates, name="Date"))
+
+
+@pytest.fixture
+def offline_engine(monkeypatch):
+    """Stub every network and cache boundary a backtest run crosses.
+
+    Symbols resolve to ``<SYMBOL>.NS``, bulk downloads, metadata and latest
+    prices come back empty and the row-hash cache always misses. Returns
+    ``serve(frame)``, which answers ``get_ticker_data`` from ``frame``; tests
+    override any other boundary with their own ``monkeypatch.setattr``.
+    """
+    from backend.core.data_provider import DataProvider
+    from backend.core.symbol_resolver import SymbolResolver
+
+    monkeypatch.setattr(DataProvider, "get_bulk_ticker_data", lambda symbols, start, end: pd.DataFrame())
+    monkeypatch.setattr(DataProvider, "get_cached_results", lambda row_hashes: {})
+    monkeypatch.setattr(DataProvider, "set_cached_results", lambda results: None)
+    monkeypatch.setattr(DataProvider, "get_ticker_info", lambda symbol: {"sector": None, "marketCap": None})
+    monkeypatch.setattr(DataProvider, "get_latest_prices_batch", lambda symbols: {s: (None, None) for s in symbols})
+    monkeypatch.setattr(SymbolResolver, "batch_resolve", lambda symbols: {s: f"{s}.NS" for s in symbols})
+
+    def serve(frame):
+        monkeypatch.setattr(DataProvider, "get_ticker_data",
+                            lambda symbol, start, end: frame.loc[str(pd.to_datetime(start)):str(pd.to_datetime(end))])
+    return serve
@@ -175,7 +175,7 @@ async def test_cache_hit_empty_trades(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_nattype_max_high_low_guard(monkeypatch):
+async def test_nattype_max_high_low_guard(monkeypatch, offline_engine):
     """Regression: idxmax/idxmin returning NaT must not crash strftime.
     Simulate a window_df where High column has values but index is NaT."""
     from backend.core.backtester import Backtester
@@ -189,8 +189,6 @@ async def test_nattype_max_high_low_guard(monkeypatch):
         return data
 
     monkeypatch.setattr(DataProvider, "get_ticker_data", mock_get_ticker_data_nat)
-    monkeypatch.setattr(DataProvider, "get_bulk_ticker_data", lambda symbols, start, end: pd.DataFrame())
-    monkeypatch.setattr(SymbolResolver, "batch_resolve", lambda symbols: {s: f"{s}.NS" for s in symbols})
 
     signals = [{"symbol": "RELIANCE", "date": "2023-01-01"}]
     # This should not raise TypeError: NaTType does not support strftime
@@ -270,3 +268,295 @@ async def test_cache_hit_sends_progress_before_freshness_check(monkeypatch):
     assert isinstance(report, BacktestReport)
     assert report.trades[0].latest_price == 150.0
     assert report.trades[0].latest_price_date == datetime.now().strftime("%Y-%m-%d")
+
+
+def _synthetic_frame():
+    """Business-day OHLC with holidays and NaN gaps, ending 2023-06-30."""
+    dates = pd.date_range("2022-12-01", "2023-06-30", freq="B")
+    dates = dates.drop([pd.Timestamp("2023-01-26"), pd.Timestamp("2023-03-07")])
+    n = len(dates)
+    close = [100 + (i % 17) * 1.37 - (i % 5) * 0.91 for i in range(n)]
+    data = pd.DataFrame(index=dates)
+    data["Open"] = [c - 0.55 for c in close]
+    data["Close"] = close
+    data["High"] = [c + 2.345 for c in close]
+    data["Low"] = [c - 1.915 for c in close]
+    data.iloc[40, data.columns.get_loc("Close")] = float("nan")
+    data.iloc[55, data.columns.get_loc("High")] = float("nan")
+    return data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry_mode", ["next_close", "next_open"])
+async def test_vectorized_engine_matches_loop(monkeypatch, offline_engine, entry_mode):
+    """The vectorized Phase C engine must reproduce the per-signal loop exactly."""
+    frame = _synthetic_frame()
+
+    def sliced_ticker_data(symbol, start, end):
+        if symbol == "EMPTY.NS":
+            return pd.DataFrame()
+        return frame.loc[str(pd.to_datetime(start)):str(pd.to_datetime(end))]
+
+    monkeypatch.setattr(DataProvider, "get_ticker_data", sliced_ticker_data)
+    monkeypatch.setattr(SymbolResolver, "batch_resolve",
+                        lambda symbols: {s: (None if s == "BAD" else f"{s}.NS") for s in symbols})
+
+    signals = [
+        {"symbol": "RELIANCE", "date": "2023-01-01"},   # Sunday
+        {"symbol": "RELIANCE", "date": "2023-01-25"},   # day before a holiday
+        {"symbol": "TCS", "date": "2023-03-03"},
+        {"symbol": "TCS", "date": "2023-04-20"},        # horizons run past data end
+        {"symbol": "RELIANCE", "date": "2023-06-30"},   # no entry day in data
+        {"symbol": "EMPTY", "date": "2023-02-01"},
+        {"symbol": "BAD", "date": "2023-02-01"},
+        {"symbol": "TCS", "date": "not-a-date"},
+        {"symbol": "INFY", "date": "2023-01-26"},       # signal on a holiday
+    ]
+
+    loop_report = await Backtester.run_backtest_async(signals, entry_mode=entry_mode, engine="loop")
+    vec_report = await Backtester.run_backtest_async(signals, entry_mode=entry_mode, engine="vectorized")
+
+    assert [t.status for t in loop_report.trades] == [t.status for t in vec_report.trades]
+    assert loop_report.successful_signals == 5
+    for loop_trade, vec_trade in zip(loop_report.trades, vec_report.trades):
+        assert loop_trade.model_dump() == pytest.approx(vec_trade.model_dump(), nan_ok=True)
+    loop_dict = loop_report.model_dump(exclude={"trades", "best_performer", "worst_performer", "cache_stats"})
+    vec_dict = vec_report.model_dump(exclude={"trades", "best_performer", "worst_performer", "cache_stats"})
+    assert loop_dict == vec_dict
+
+
+@pytest.mark.asyncio
+async def test_process_engine_matches_loop(monkeypatch, offline_engine, tmp_path):
+    """Process-pool shards read symbol data from the on-disk cache and must
+    reproduce the loop's trades, aggregates and streaming order."""
+    from backend.config import Engine, Paths
+    from backend.core.backtester import shutdown_process_pool
+
+    # Spawned workers read MARKET_DIR from the environment at import
+    market_dir = str(tmp_path / "market")
+    monkeypatch.setattr(Paths, "MARKET_DIR", market_dir)
+    monkeypatch.setenv("MARKET_DIR", market_dir)
+    shutdown_process_pool()
+
+    frame = _synthetic_frame()
+    symbols = [f"__PSHARD{i}__.NS" for i in range(3)]
+    for sym in symbols:
+        DataProvider.persist_symbol_data(sym, frame)
+
+    monkeypatch.setattr(Engine, "PROCESS_MIN_SIGNALS", 0)
+    monkeypatch.setattr(Engine, "PROCESS_WORKERS", 2)
+
+    signals = [{"symbol": f"__PSHARD{i % 3}__", "date": d}
+               for i, d in enumerate(["2023-01-02", "2023-01-20", "2023-02-14", "2023-03-01",
+                                      "2023-03-06", "2023-04-03", "2023-04-21"])]
+
+    streamed = {"loop": [], "process": []}
+
+    def spy(engine):
+        async def _cb(current, total, symbol, **kwargs):
+            streamed[engine].extend(t["signal_date"] + t["symbol"] for t in kwargs.get("trades", []))
+        return _cb
+
+    loop_report = await Backtester.run_backtest_async(signals, progress_callback=spy("loop"), engine="loop")
+    try:
+        proc_report = await Backtester.run_backtest_async(signals, progress_callback=spy("process"), engine="process")
+    finally:
+        shutdown_process_pool()
+
+    assert streamed["process"] == streamed["loop"]
+    assert [t.model_dump() for t in proc_report.trades] == [t.model_dump() for t in loop_report.trades]
+    assert proc_report.best_performer == loop_report.best_performer
+    assert proc_report.avg_return_30d == loop_report.avg_return_30d
+
+
+@pytest.mark.asyncio
+async def test_slow_symbol_falls_back_to_per_signal_path(monkeypatch, offline_engine):
+    """A symbol whose batched compute overruns its budget is computed per signal, not failed."""
+    import time as _time
+    from backend.config import Engine
+
+    frame = _synthetic_frame()
+    monkeypatch.setattr(Engine, "SYMBOL_TIMEOUT_SEC", 0.05)
+    offline_engine(frame)
+    slow = Backtester._compute_symbol_vectorized
+    monkeypatch.setattr(Backtester, "_compute_symbol_vectorized",
+                        staticmethod(lambda *args: _time.sleep(0.3) or slow(*args)))
+
+    signals = [{"symbol": "SLOW", "date": d} for d in ("2023-01-02", "2023-02-14", "2023-04-03")]
+    loop_report = await Backtester.run_backtest_async(signals, engine="loop")
+    vec_report = await Backtester.run_backtest_async(signals, engine="vectorized")
+    assert [t.status for t in vec_report.trades] == ["Success"] * 3
+    assert [t.model_dump() for t in vec_report.trades] == [t.model_dump() for t in loop_report.trades]
+
+
+@pytest.mark.asyncio
+async def test_failing_symbol_falls_back_to_per_signal_path(monkeypatch, offline_engine, caplog):
+    """An exception in one symbol's batched compute is contained to that symbol."""
+    offline_engine(_synthetic_frame())
+    vectorized = Backtester._compute_symbol_vectorized
+
+    def flaky(symbol, *args):
+        if symbol == "BROKEN.NS":
+            raise ValueError("corrupt frame")
+        return vectorized(symbol, *args)
+
+    monkeypatch.setattr(Backtester, "_compute_symbol_vectorized", staticmethod(flaky))
+    signals = [{"symbol": "BROKEN", "date": "2023-01-02"}, {"symbol": "TCS", "date": "2023-02-14"}]
+    loop_report = await Backtester.run_backtest_async(signals, engine="loop")
+    with caplog.at_level("INFO", logger="backend.core.backtester"):
+        vec_report = await Backtester.run_backtest_async(signals, engine="vectorized")
+    assert [t.model_dump() for t in vec_report.trades] == [t.model_dump() for t in loop_report.trades]
+    assert "1 fallbacks" in caplog.text
+
+
+def test_build_shards_keeps_symbols_whole():
+    from backend.core.backtester import _build_shards
+    pending = {"A": [(0,), (3,), (4,)], "B": [(1,)], "C": [(2,), (5,)]}
+    shards = _build_shards(pending, 2)
+    assert len(shards) == 2
+    assigned = sorted(sym for shard in shards for sym, _ in shard)
+    assert assigned == ["A", "B", "C"]
+    assert shards[0][0][0] == "A"  # earliest signal's shard is submitted first
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+async def test_row_hash_bulk_lookup_and_hit_ratio(monkeypatch, offline_engine, engine):
+    """A rerun is served entirely from the row-hash cache via one bulk lookup,
+    and the per-run hit ratio is reported in cache_stats."""
+    frame = _synthetic_frame()
+    store = {}
+    lookups = []
+
+    def get_cached_results(row_hashes):
+        lookups.append(len(row_hashes))
+        return {h: dict(store[h]) for h in row_hashes if h in store}
+
+    monkeypatch.setattr(DataProvider, "get_cached_results", get_cached_results)
+    monkeypatch.setattr(DataProvider, "set_cached_results", lambda results: store.update(results))
+    offline_engine(frame)
+
+    signals = [{"symbol": "TCS", "date": "2023-01-02"}, {"symbol": "INFY", "date": "2023-02-14"},
+               {"symbol": "TCS", "date": "2023-03-01"}]
+
+    first = await Backtester.run_backtest_async(signals, engine=engine)
+    assert first.cache_stats["run_row_hash_hits"] == 0
+    assert first.cache_stats["run_row_hash_hit_ratio"] == 0.0
+    assert len(store) == 3
+
+    def no_fetch(*args):
+        raise AssertionError("row-hash hit must not load price data")
+
+    monkeypatch.setattr(DataProvider, "get_ticker_data", no_fetch)
+    second = await Backtester.run_backtest_async(signals, engine=engine)
+    assert lookups == [3, 3]
+    assert second.cache_stats["run_row_hash_lookups"] == 3
+    assert second.cache_stats["run_row_hash_hit_ratio"] == 1.0
+    assert [t.model_dump() for t in second.trades] == [t.model_dump() for t in first.trades]
+
+
+def test_row_hash_bulk_cache_roundtrip(monkeypatch):
+    from backend.config import Limits
+    monkeypatch.setattr(Limits, "ROW_HASH_BULK_CHUNK", 2)
+    hashes = [f"__bulk_test_{i}__" for i in range(5)]
+    DataProvider.set_cached_results({h: {"status": "Success", "n": i} for i, h in enumerate(hashes[:3])})
+
+    before = DataProvider.get_cache_stats()
+    found = DataProvider.get_cached_results(hashes + hashes[:1])
+    after = DataProvider.get_cache_stats()
+
+    assert found == {h: {"status": "Success", "n": i} for i, h in enumerate(hashes[:3])}
+    assert DataProvider.get_cached_result(hashes[1]) == {"status": "Success", "n": 1}
+    assert after["row_hash_hits"] - before["row_hash_hits"] == 3
+    assert after["row_hash_misses"] - before["row_hash_misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_custom_horizons(monkeypatch, offline_engine):
+    """A request-level horizon list is evaluated by both engines into the per-horizon arrays."""
+    frame = _synthetic_frame()
+    offline_engine(frame)
+
+    signals = [{"symbol": "TCS", "date": "2023-01-02"}, {"symbol": "TCS", "date": "2023-02-10"},
+               {"symbol": "INFY", "date": "2023-03-01"}]
+    horizons = [120, 1, 3, 7, 5]
+
+    loop_report = await Backtester.run_backtest_async(signals, engine="loop", horizons=horizons)
+    vec_report = await Backtester.run_backtest_async(signals, engine="vectorized", horizons=horizons)
+
+    assert loop_report.horizons == [1, 3, 5, 7, 120]
+    assert [t.model_dump() for t in vec_report.trades] == [t.model_dump() for t in loop_report.trades]
+    assert vec_report.avg_returns == loop_report.avg_returns
+
+    trade = loop_report.trades[0]
+    assert trade.entry_date == "2023-01-03"
+    assert trade.exit_prices[0] == round(frame.loc["2023-01-04", "Close"], 2)
+    assert trade.return_7d == trade.returns[3]      # named field kept for horizons that have one
+    assert trade.return_90d is None
+    assert trade.returns[4] is not None             # 120d is past the default 90-day duration
+    assert loop_report.avg_return_7d == loop_report.avg_returns[3]
+    assert loop_report.avg_return_30d is None
+    # No 90d horizon: best / worst are ranked by the longest one, and say so
+    assert loop_report.performer_horizon == 120
+    assert loop_report.best_performer.returns[4] == max(t.returns[4] for t in loop_report.trades
+                                                        if t.returns[4] is not None)
+    assert vec_report.return_stats == loop_report.return_stats
+    assert loop_report.return_stats[3].count == sum(t.return_7d is not None for t in loop_report.trades)
+    assert loop_report.return_stats[3].mean == loop_report.avg_returns[3]
+
+
+def test_normalize_horizons():
+    from backend.utils.horizons import normalize_horizons, report_mode
+    assert normalize_horizons(None) == (7, 14, 30, 45, 60, 90)
+    assert normalize_horizons(" 5,1, 3,5 ") == (1, 3, 5)
+    assert report_mode("next_open", (1, 3)) == "next_open@1,3"
+    assert report_mode("next_open", normalize_horizons("")) == "next_open"
+    with pytest.raises(ValueError):
+        normalize_horizons("1,x")
+    with pytest.raises(ValueError):
+        normalize_horizons([0, 7])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+async def test_phase_c_consumes_symbols_as_downloads_land(monkeypatch, offline_engine, engine):
+    """A slow bulk request must not hold back symbols whose request already landed,
+    and trades still stream in file order."""
+    import time
+
+    frame = _synthetic_frame()
+    landed = []
+
+    def bulk(symbols, start, end):
+        if "SLOW.NS" in symbols:
+            time.sleep(0.3)
+        landed.extend(symbols)
+        return pd.concat({s: frame.loc[start:end] for s in symbols}, axis=1)
+
+    computed = []
+    original = Backtester._compute_symbol_vectorized
+
+    def spy(symbol, *args, **kwargs):
+        computed.append(symbol)
+        return original(symbol, *args, **kwargs)
+
+    monkeypatch.setattr(DataProvider, "get_bulk_ticker_data", bulk)
+    monkeypatch.setattr(Backtester, "_compute_symbol_vectorized", staticmethod(spy))
+    monkeypatch.setattr(DataProvider, "get_ticker_info", lambda symbol: {"sector": "IT", "marketCap": 1})
+
+    # Windows months apart: the planner puts SLOW and FAST in separate requests
+    signals = [{"symbol": "SLOW", "date": "2023-01-02"}, {"symbol": "FAST", "date": "2023-03-01"}]
+    streamed = []
+
+    async def on_progress(current, total, message, **kwargs):
+        streamed.extend(t["symbol"] for t in kwargs.get("trades", []))
+
+    report = await Backtester.run_backtest_async(signals, progress_callback=on_progress, engine=engine)
+
+    assert landed == ["FAST.NS", "SLOW.NS"]
+    if engine == "vectorized":
+        assert computed == ["FAST.NS", "SLOW.NS"]
+    assert streamed == ["SLOW.NS", "FAST.NS"]
+    assert [t.status for t in report.trades] == ["Success", "Success"]
+    assert report.trades[0].sector == "IT"
+    assert report.cache_stats["fetch_plan_requests"] == 2
@@ -0,0 +1,112 @@
+"""Tests for bisecting poisoned bulk downloads and remembering bad symbols."""
+import pandas as pd
+import pytest
+
+from backend.core import data_provider, market_source
+from backend.core.data_provider import DataProvider, cache, yf_controller
+from conftest import bars
+
+BAD = "__POISON__.NS"
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(data_provider, "_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(yf_controller, "enabled", False)
+    cache.delete(DataProvider._bad_symbol_key(BAD))
+    yield
+    cache.delete(DataProvider._bad_symbol_key(BAD))
+
+
+class _EmptyTicker:
+    def __init__(self, symbol):
+        pass
+
+    def history(self, **kwargs):
+        return pd.DataFrame()
+
+
+def _poisoned(calls):
+    def download(tickers, start, end, **kwargs):
+        calls.append(list(tickers))
+        if BAD in tickers:
+            raise ValueError("No timezone found, symbol may be delisted")
+        return bars(tickers, start, end)
+    return download
+
+
+def test_poisoned_chunk_is_bisected_and_bad_symbol_remembered(monkeypatch):
+    calls = []
+    monkeypatch.setattr(market_source.yf, "download", _poisoned(calls))
+    monkeypatch.setattr(market_source.yf, "Ticker", _EmptyTicker)
+    good = [f"__GOOD{i}__.NS" for i in range(15)]
+    before = DataProvider.get_cache_stats()
+
+    df = DataProvider.get_bulk_ticker_data(good + [BAD], "2023-01-02", "2023-03-01")
+
+    assert set(df.columns.get_level_values(0)) == set(good)
+    # Three attempts on the full chunk, then two calls per bisection level
+    assert len(calls) - 3 <= 2 * 4
+    assert DataProvider.is_bad_symbol(BAD)
+    after = DataProvider.get_cache_stats()
+    assert after["bisected_chunks"] - before["bisected_chunks"] == 1
+    assert after["bad_symbols_marked"] - before["bad_symbols_marked"] == 1
+
+    calls.clear()
+    df = DataProvider.get_bulk_ticker_data(good[:3] + [BAD], "2023-01-02", "2023-03-01")
+    assert calls == [good[:3]]
+    assert set(df.columns.get_level_values(0)) == set(good[:3])
+    assert DataProvider.get_ticker_data(BAD, "2023-01-02", "2023-03-01").empty
+    assert DataProvider.get_latest_prices_batch([BAD]) == {BAD: (None, None)}
+
+
+def test_symbol_with_recent_history_is_not_marked_bad(monkeypatch):
+    class _LiveTicker(_EmptyTicker):
+        def history(self, **kwargs):
+            return bars(["X"], "2023-06-01", "2023-06-10")["X"]
+
+    calls = []
+    monkeypatch.setattr(market_source.yf, "download", _poisoned(calls))
+    monkeypatch.setattr(market_source.yf, "Ticker", _LiveTicker)
+
+    df = DataProvider.get_bulk_ticker_data(["__GOOD0__.NS", BAD], "2023-01-02", "2023-03-01")
+    assert set(df.columns.get_level_values(0)) == {"__GOOD0__.NS"}
+    assert not DataProvider.is_bad_symbol(BAD)
+
+
+def test_empty_short_window_is_not_bisected(monkeypatch):
+    calls = []
+    monkeypatch.setattr(market_source.yf, "download",
+                        lambda tickers, **kwargs: calls.append(tickers) or pd.DataFrame())
+    df = DataProvider.get_bulk_ticker_data(["__GOOD0__.NS", "__GOOD1__.NS"], "2023-12-25", "2023-12-26")
+    assert df.empty and len(calls) == 1
+
+
+def test_outage_does_not_mark_symbols_bad(monkeypatch):
+    def down(tickers, **kwargs):
+        raise ConnectionError("network unreachable")
+
+    monkeypatch.setattr(market_source.yf, "download", down)
+    monkeypatch.setattr(market_source.yf, "Ticker", _EmptyTicker)
+    df = DataProvider.get_bulk_ticker_data(["__GOOD0__.NS", BAD], "2023-01-02", "2023-03-01")
+    assert df.empty
+    assert not DataProvider.is_bad_symbol(BAD) and not DataProvider.is_bad_symbol("__GOOD0__.NS")
+
+
+def test_outage_stops_bisecting_after_one_level(monkeypatch):
+    calls = []
+
+    def down(tickers, **kwargs):
+        calls.append(list(tickers))
+        raise ConnectionError("network unreachable")
+
+    monkeypatch.setattr(market_source.yf, "download", down)
+    monkeypatch.setattr(market_source.yf, "Ticker", _EmptyTicker)
+    symbols = [f"__GOOD{i}__.NS" for i in range(16)]
+    before = DataProvider.get_cache_stats()["bisect_stopped"]
+
+    assert DataProvider.get_bulk_ticker_data(symbols, "2023-01-02", "2023-03-01").empty
+    # Three attempts on the full chunk, then one call per half before giving up
+    assert len(calls) == 3 + 2
+    assert DataProvider.get_cache_stats()["bisect_stopped"] - before == 1
+    assert not any(DataProvider.is_bad_symbol(sym) for sym in symbols)
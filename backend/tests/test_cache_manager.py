@@ -0,0 +1,156 @@
+"""Tests for the namespaced diskcache manager."""
+import pickle
+import time
+
+import pytest
+
+from backend.core import cache_manager
+from backend.core.cache_manager import CacheManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = CacheManager(str(tmp_path), {"market": (1, "least-recently-used"),
+                                       "reports": (1, "least-recently-stored")},
+                       memory_mb={"market": 1, "reports": 1}, shards={"market": 2, "reports": 1})
+    yield mgr
+    mgr.close()
+
+
+def test_namespaces_are_separate_caches(manager, tmp_path):
+    market, reports = manager.namespace("market"), manager.namespace("reports")
+    assert manager.namespace("market") is market
+    market.set("k", "symbol")
+    reports.set("k", "report")
+    assert market.get("k") == "symbol" and reports.get("k") == "report"
+    assert (tmp_path / "market").is_dir() and (tmp_path / "reports").is_dir()
+    with pytest.raises(KeyError):
+        manager.namespace("nope")
+
+
+def test_big_reports_do_not_evict_symbol_entries(manager):
+    market, reports = manager.namespace("market"), manager.namespace("reports")
+    for i in range(20):
+        market.set(f"RELIANCE{i}.NS_latest_price", (2500.0, "2024-01-02"))
+    for i in range(20):
+        reports.set(f"report_{i}", "x" * 300_000)
+
+    assert len(reports) < 20
+    assert all(market.get(f"RELIANCE{i}.NS_latest_price") is not None for i in range(20))
+    stats = manager.stats()
+    assert stats["reports"]["limit_mb"] == 1 and stats["reports"]["eviction_policy"] == "least-recently-stored"
+    assert stats["market"]["shards"] == 2 and stats["reports"]["shards"] == 1
+    assert set(stats) == {"market", "reports"}
+
+
+def test_hot_tier_serves_repeat_reads_from_memory(manager):
+    market = manager.namespace("market")
+    market.set("TCS.NS_latest_price", (3500.0, "2024-01-02"), expire=300)
+    market.set("resolve_GONE", None)
+    for _ in range(5):
+        assert market.get("TCS.NS_latest_price") == (3500.0, "2024-01-02")
+    assert "resolve_GONE" in market and market["resolve_GONE"] is None
+    assert market.get("absent", "dflt") == "dflt"
+
+    stats = market.snapshot()
+    assert stats["memory_hits"] == 7 and stats["disk_hits"] == 0 and stats["misses"] == 1
+    assert stats["memory_hit_ratio"] == 0.875 and stats["disk_hit_ratio"] == 0.0
+
+    market.delete("TCS.NS_latest_price")
+    assert market.get("TCS.NS_latest_price") is None
+
+
+def test_hot_tier_fills_from_disk_and_copies_mutable_values(manager):
+    reports = manager.namespace("reports")
+    reports.disk.set("report_a", {"trades": [1, 2]})
+    first = reports.get("report_a")
+    first["trades"].append(3)
+    assert reports.get("report_a") == {"trades": [1, 2]}
+    stats = reports.snapshot()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_hot_tier_respects_ttl_and_byte_budget(manager):
+    market = manager.namespace("market")
+    market.set("short", "v", expire=0.05)
+    assert market.get("short") == "v"
+    time.sleep(0.1)
+    assert market.get("short") is None
+
+    for i in range(40):
+        market.set(f"big{i}", "x" * 100_000)
+    stats = market.snapshot()
+    assert stats["memory_evictions"] > 0 and stats["memory_mb"] <= 1
+    assert stats["memory_entries"] < 40 and market.get("big39") == "x" * 100_000
+
+
+def test_report_may_use_the_whole_budget(manager):
+    """diskcache splits size_limit across shards; a single-shard namespace keeps
+    an entry larger than budget / 2."""
+    reports = manager.namespace("reports")
+    reports.set("big_report", "x" * 700_000)
+    for i in range(5):
+        reports.set(f"small_{i}", "y")
+    assert reports.disk.get("big_report") == "x" * 700_000
+
+
+def test_dropped_writes_are_logged_and_counted(manager, monkeypatch, caplog):
+    market = manager.namespace("market")
+    monkeypatch.setattr(market.disk, "set", lambda key, value, expire=None: False)
+    with caplog.at_level("WARNING", logger="backend.core.cache_manager"):
+        assert market.set("TCS.NS_latest_price", (3500.0, "2024-01-02")) is False
+    assert market.snapshot()["dropped_writes"] == 1
+    assert "TCS.NS_latest_price" in caplog.text
+
+
+def test_dropped_write_leaves_no_hot_entry(manager, monkeypatch):
+    market = manager.namespace("market")
+    market.set("TCS.NS_latest_price", (3400.0, "2024-01-01"))
+    monkeypatch.setattr(market.disk, "set", lambda key, value, expire=None: False)
+    market.set("TCS.NS_latest_price", (3500.0, "2024-01-02"))
+    assert market.snapshot()["memory_entries"] == 0
+    # Served from disk, as every other process sees it, not the value that never landed
+    assert market.get("TCS.NS_latest_price") == (3400.0, "2024-01-01")
+
+
+def test_hot_tier_pickles_only_mutable_values(manager, monkeypatch):
+    dumped = []
+
+    class _CountingPickle:
+        HIGHEST_PROTOCOL = pickle.HIGHEST_PROTOCOL
+        loads = staticmethod(pickle.loads)
+
+        @staticmethod
+        def dumps(value, protocol=None):
+            dumped.append(value)
+            return pickle.dumps(value, protocol)
+
+    monkeypatch.setattr(cache_manager, "pickle", _CountingPickle)
+    market = manager.namespace("market")
+    market.set("TCS.NS_latest_price", (3500.0, "2024-01-02"))
+    market.disk.set("INFY.NS_latest_price", (1500.0, "2024-01-02"))
+    assert market.get("INFY.NS_latest_price") == (1500.0, "2024-01-02")   # filled from disk
+    assert dumped == [] and market.snapshot()["memory_entries"] == 2
+
+    market.set("row", {"status": "Success"})
+    assert dumped == [{"status": "Success"}]
+
+
+def test_bulk_rows_lock_only_their_own_shards(manager, monkeypatch):
+    market = manager.namespace("market")
+    monkeypatch.setattr(market.disk, "transact", lambda: pytest.fail("bulk ops must not lock every shard"))
+    locked = []
+    for shard in market.disk._shards:
+        real = shard.transact
+        monkeypatch.setattr(shard, "transact", lambda retry=False, s=shard, real=real: locked.append(s) or real(retry))
+
+    rows = {f"row{i}": {"n": i} for i in range(8)}
+    market.set_many(rows, expire=60)
+    assert len(locked) == len({id(market._shard_of(k)) for k in rows})
+
+    market.clear()
+    for key, value in rows.items():
+        market.disk.set(key, value)
+    locked.clear()
+    assert market.get_many(list(rows) + ["missing"]) == rows
+    assert locked == []
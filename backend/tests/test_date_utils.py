@@ -0,0 +1,60 @@
+"""Tests for TradingCalendar searchsorted lookups."""
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+
+from backend.utils.date_utils import TradingCalendar, get_next_trading_day, get_future_trading_day
+
+
+def _probe(date, index, start, max_lookahead=5):
+    """Reference: the original day-by-day `target in data.index` probe."""
+    for i in range(start, max_lookahead + 1):
+        target = date + timedelta(days=i)
+        if target in index:
+            return target
+    return None
+
+
+@pytest.fixture
+def index():
+    dates = pd.date_range("2023-01-01", "2023-03-31", freq="B")
+    # Long closure: 8 calendar days without trading
+    return dates[(dates < "2023-02-10") | (dates > "2023-02-17")]
+
+
+def test_calendar_matches_probe(index):
+    cal = TradingCalendar.from_index(index)
+    queries = [datetime(2022, 12, 25) + timedelta(days=i) for i in range(110)]
+    on_or_after = cal.next_on_or_after(queries)
+    after = cal.next_after(queries)
+    for q, a, b in zip(queries, on_or_after, after):
+        assert cal.date_at(int(a)) == _probe(q, index, 0)
+        assert cal.date_at(int(b)) == _probe(q, index, 1)
+
+
+def test_calendar_limit_caps_lookup(index):
+    cal = TradingCalendar.from_index(index)
+    q = [datetime(2023, 1, 6)]  # Friday
+    limit = cal.upper_bound([datetime(2023, 1, 6)])
+    assert cal.next_after(q)[0] >= 0
+    assert cal.next_after(q, limit=limit)[0] == -1
+    assert cal.next_on_or_after(q, limit=limit)[0] >= 0
+
+
+def test_calendar_empty_and_intraday_index():
+    empty = TradingCalendar(np.empty(0, dtype="datetime64[ns]"))
+    assert empty.next_on_or_after([datetime(2023, 1, 2)])[0] == -1
+
+    # Probe semantics require whole-day offsets from the query date
+    intraday = pd.DatetimeIndex([datetime(2023, 1, 2, 9, 15)])
+    assert get_next_trading_day(datetime(2023, 1, 2), TradingCalendar.from_index(intraday)) is None
+
+
+def test_scalar_helpers_take_a_calendar(index):
+    cal = TradingCalendar.from_index(index)
+    assert get_next_trading_day(datetime(2023, 1, 7), cal) == pd.Timestamp("2023-01-09")
+    assert get_future_trading_day(datetime(2023, 1, 9), cal) == pd.Timestamp("2023-01-10")
+    assert get_future_trading_day(datetime(2023, 2, 9), cal) is None
+    # limit ends the search at the window's last row
+    assert get_future_trading_day(datetime(2023, 1, 9), cal, limit=int(cal.upper_bound([datetime(2023, 1, 9)])[0])) is None
@@ -0,0 +1,99 @@
+"""Tests for the adaptive (AIMD) yfinance fetch controller."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from backend.config import Adaptive
+from backend.core.data_provider import DataProvider
+from backend.core.fetch_controller import FetchController, _empty_fraction
+
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(Adaptive, "CHUNK_STEP", 10)
+    monkeypatch.setattr(Adaptive, "CONCURRENCY_STREAK", 2)
+    monkeypatch.setattr(Adaptive, "TARGET_LATENCY_SEC", 5.0)
+    monkeypatch.setattr(Adaptive, "EMPTY_RATE_MAX", 0.5)
+
+
+def _controller(enabled=True):
+    return FetchController({"bulk": (40, 10, 60), "resolve": (50, 10, 100)}, concurrency=(2, 1, 3), enabled=enabled)
+
+
+def test_additive_increase_multiplicative_decrease():
+    ctl = _controller()
+    ctl.record("bulk", latency=1.0)
+    ctl.record("bulk", latency=1.0)
+    assert ctl.chunk_size("bulk") == 60 and ctl.concurrency == 3
+    ctl.record("bulk", latency=1.0)
+    assert ctl.chunk_size("bulk") == 60 and ctl.concurrency == 3   # capped
+
+    ctl.record("bulk", latency=9.0)                                 # slow
+    assert ctl.chunk_size("bulk") == 30 and ctl.concurrency == 1
+    ctl.record("bulk", latency=1.0, empty_fraction=0.8)             # throttled: mostly empty
+    ctl.record("bulk", latency=1.0, error=True)
+    assert ctl.chunk_size("bulk") == 10 and ctl.concurrency == 1    # floors
+    assert ctl.chunk_size("resolve") == 50                          # per-kind chunk sizes
+
+    snap = ctl.snapshot()
+    assert snap["decreases"] == 3 and snap["errors"] == 1 and snap["calls"] == 6
+    assert snap["chunk_sizes"] == {"bulk": 10, "resolve": 50}
+
+
+def test_resolver_misses_do_not_shrink_the_window():
+    ctl = _controller()
+    ctl.record("resolve", latency=1.0, empty_fraction=0.9)          # most candidate tickers do not exist
+    assert ctl.chunk_size("resolve") == 60 and ctl.concurrency == 2
+    snap = ctl.snapshot()
+    assert snap["mostly_empty"] == 0 and snap["empty_rate_ewma"] is None
+
+    ctl.record("resolve", latency=9.0)                              # slow still counts
+    assert ctl.chunk_size("resolve") == 30 and ctl.concurrency == 1
+
+
+def test_disabled_keeps_static_limits():
+    ctl = _controller(enabled=False)
+    ctl.record("bulk", latency=1.0, error=True)
+    assert ctl.chunk_size("bulk") == 40 and ctl.concurrency == 2
+    assert ctl.snapshot()["errors"] == 1
+
+
+def test_slot_bounds_downloads_in_flight():
+    ctl = _controller()
+    peak, active, lock = [0], [0], threading.Lock()
+
+    def call():
+        def download():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return pd.DataFrame({"Close": [1.0]})
+        ctl.run("bulk", ["A"], download)
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] <= 3 and ctl.snapshot()["in_flight"] == 0
+
+
+def test_empty_fraction_of_grouped_download():
+    dates = pd.bdate_range("2023-01-02", periods=3)
+    df = pd.concat({
+        "A.NS": pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=dates),
+        "B.NS": pd.DataFrame({"Close": [float("nan")] * 3}, index=dates),
+    }, axis=1)
+    assert _empty_fraction(df, ["A.NS", "B.NS", "C.NS", "D.NS"]) == 0.75
+    assert _empty_fraction(pd.DataFrame(), ["A.NS"]) == 1.0
+
+
+def test_state_visible_in_cache_stats():
+    stats = DataProvider.get_cache_stats()["fetch_controller"]
+    assert set(stats["chunk_sizes"]) == {"bulk", "latest", "resolve"}
+    assert stats["concurrency"] >= 1
@@ -0,0 +1,48 @@
+"""Tests for the Phase B fetch planner."""
+from datetime import datetime
+
+import pandas as pd
+
+from backend.core.fetch_planner import plan_fetches
+from backend.core.market_store import MarketStore
+
+
+def test_groups_only_similar_windows():
+    ranges = {
+        "A": (datetime(2016, 1, 4), datetime(2016, 4, 14)),
+        "B": (datetime(2016, 1, 11), datetime(2016, 4, 21)),
+        "C": (datetime(2024, 6, 3), datetime(2024, 9, 11)),
+        "D": (datetime(2016, 1, 4), datetime(2024, 9, 11)),   # signals in both years
+    }
+    requests, stats = plan_fetches(ranges, chunk_size=10, slack_days=30)
+
+    got = sorted((r.start.date(), r.end.date(), tuple(sorted(r.symbols))) for r in requests)
+    assert got == [
+        (datetime(2016, 1, 4).date(), datetime(2016, 4, 21).date(), ("A", "B")),
+        (datetime(2016, 1, 4).date(), datetime(2024, 9, 11).date(), ("D",)),
+        (datetime(2024, 6, 3).date(), datetime(2024, 9, 11).date(), ("C",)),
+    ]
+    assert stats["requests"] == 3 and stats["symbols_stored"] == 0
+    assert stats["symbol_days_fetched"] - stats["symbol_days_needed"] == 14  # A's 7-day tail + B's 7-day head
+
+
+def test_chunk_size_caps_group():
+    ranges = {f"S{i}": (datetime(2023, 1, 2), datetime(2023, 4, 12)) for i in range(5)}
+    requests, _ = plan_fetches(ranges, chunk_size=2, slack_days=30)
+    assert [len(r.symbols) for r in requests] == [2, 2, 1]
+
+
+def test_skips_stored_and_fetches_only_gaps():
+    dates = pd.bdate_range("2023-01-02", "2023-03-31")
+    MarketStore.write("HAVE", pd.DataFrame({"Close": 1.0}, index=dates))
+    MarketStore.write("PART", pd.DataFrame({"Close": 1.0}, index=dates))
+
+    requests, stats = plan_fetches({
+        "HAVE": (datetime(2023, 1, 2), datetime(2023, 3, 31)),
+        "PART": (datetime(2023, 1, 2), datetime(2023, 4, 28)),
+    }, chunk_size=10, slack_days=30)
+
+    assert stats["symbols_stored"] == 1
+    assert [(r.start, r.end, r.symbols) for r in requests] == [
+        (datetime(2023, 4, 1), datetime(2023, 4, 28), ["PART"]),
+    ]
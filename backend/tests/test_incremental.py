@@ -0,0 +1,124 @@
+"""Tests for incremental re-backtesting of edited uploads."""
+import pandas as pd
+import pytest
+
+from backend.config import Paths
+from backend.core.backtester import Backtester
+from backend.core.data_provider import DataProvider
+from backend.core.incremental import plan_incremental, run_incremental_backtest, signal_row_key
+from backend.core.symbol_resolver import SymbolResolver
+from backend.storage import JobStorage, ReportLineage
+
+
+def _frame():
+    dates = pd.bdate_range("2022-12-01", "2023-08-31")
+    close = [100 + (i % 13) * 1.9 - (i % 4) * 1.1 for i in range(len(dates))]
+    data = pd.DataFrame(index=dates)
+    data["Open"] = [c - 0.4 for c in close]
+    data["Close"] = close
+    data["High"] = [c + 1.5 for c in close]
+    data["Low"] = [c - 1.5 for c in close]
+    return data
+
+
+@pytest.fixture
+def mocked_market(monkeypatch, offline_engine):
+    offline_engine(_frame())
+    monkeypatch.setattr(DataProvider, "get_ticker_info", lambda symbol: {"sector": "IT", "marketCap": 10})
+    monkeypatch.setattr(DataProvider, "get_latest_prices_batch",
+                        lambda symbols: {s: (150.0, "2023-09-01") for s in symbols})
+    monkeypatch.setattr(SymbolResolver, "batch_resolve",
+                        lambda symbols: {s: (None if s == "BAD" else f"{s}.NS") for s in symbols})
+
+    calls = []
+    original = Backtester.run_backtest_async
+
+    async def spy(signals, **kwargs):
+        calls.append(len(signals))
+        return await original(signals, **kwargs)
+
+    monkeypatch.setattr(Backtester, "run_backtest_async", spy)
+    return calls
+
+
+BASE = [
+    {"symbol": "TCS", "date": "2023-01-02"},
+    {"symbol": "INFY", "date": "2023-01-16"},
+    {"symbol": "BAD", "date": "2023-01-16"},
+    {"symbol": "TCS", "date": "2023-02-01"},
+    {"symbol": "INFY", "date": "2023-03-01"},
+]
+
+
+def test_plan_incremental_matches_duplicates_in_order():
+    reuse, new_rows = plan_incremental(["A|1", "B|1", "A|1", "C|1"], ["A|1", "B|1", "D|1"], ["Success"] * 3)
+    assert reuse == {0: 0, 1: 1}
+    assert new_rows == [2, 3]
+
+
+def test_plan_incremental_recomputes_failed_rows():
+    reuse, new_rows = plan_incremental(["A|1", "B|1", "C|1"], ["A|1", "B|1", "C|1"],
+                                       ["Success", "No Entry Data", "Error"])
+    assert reuse == {0: 0}
+    assert new_rows == [1, 2]
+
+
+def test_signal_row_key_normalizes_symbol_and_date():
+    assert signal_row_key({"symbol": " tcs ", "date": "02-01-2023"}) == "TCS|2023-01-02"
+    assert signal_row_key({"Symbol": "TCS", "Date": "garbage"}) == "TCS|garbage"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("edited", [
+    BASE + [{"symbol": "TCS", "date": "2023-04-03"}, {"symbol": "WIPRO", "date": "2023-04-04"}],  # appended
+    BASE[:2] + BASE[3:] + [{"symbol": "TCS", "date": "2023-04-03"}],                                # row dropped
+])
+async def test_incremental_matches_full_run(mocked_market, edited, tmp_path, monkeypatch):
+    monkeypatch.setattr(Paths, "JOBS_DIR", str(tmp_path / "jobs"))
+    previous = (await Backtester.run_backtest_async(BASE)).model_dump()
+    full_store = JobStorage("full_test")
+    full = await Backtester.run_backtest_async(edited, job_store=full_store)
+    mocked_market.clear()
+
+    reuse, new_rows = plan_incremental([signal_row_key(s) for s in edited], [signal_row_key(s) for s in BASE],
+                                       [t["status"] for t in previous["trades"]])
+    progress = []
+
+    async def on_progress(current, total, message, **kwargs):
+        progress.append((current, total))
+
+    job_store = JobStorage("incremental_test")
+    report = await run_incremental_backtest(edited, previous, reuse, new_rows,
+                                            progress_callback=on_progress, job_store=job_store)
+
+    assert mocked_market == [len(new_rows)]  # only the new rows went through Phases A–C
+    # the unresolved BAD row is retried, not carried forward
+    assert [edited[i]["symbol"] for i in new_rows].count("BAD") == [s["symbol"] for s in edited].count("BAD")
+    assert {total for _, total in progress} == {len(edited)}
+    assert all(0 <= current <= len(edited) for current, _ in progress)
+    assert len(job_store.merge_results()) == len(full_store.merge_results())
+    assert [t.model_dump() for t in report.trades] == [t.model_dump() for t in full.trades]
+    assert report.successful_signals == full.successful_signals
+    assert report.avg_returns == full.avg_returns
+    assert report.win_rates == full.win_rates
+    assert report.return_stats == full.return_stats
+    assert report.best_performer == full.best_performer
+    assert report.cache_source == "l3_incremental"
+    assert report.cache_stats["incremental_new_rows"] == len(new_rows)
+
+
+def test_report_lineage_picks_largest_overlap():
+    user = "__lineage_test__"
+    ReportLineage.record(user, "next_close", "hash_a", ["A|1", "B|1"])
+    ReportLineage.record(user, "next_close", "hash_b", ["A|1", "B|1", "C|1"])
+    ReportLineage.record(user, "next_close", "hash_c", ["Z|1"])
+
+    best = ReportLineage.closest(user, "next_close", ["A|1", "B|1", "C|1", "D|1"])
+    assert best["file_hash"] == "hash_b" and best["overlap"] == 3
+    assert ReportLineage.closest(user, "next_open", ["A|1"]) is None
+
+
+def test_report_lineage_is_off_for_anonymous_users():
+    for user in (None, "anonymous"):
+        ReportLineage.record(user, "next_close", "hash_anon", ["A|1"])
+        assert ReportLineage.closest(user, "next_close", ["A|1"]) is None
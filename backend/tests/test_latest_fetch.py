@@ -0,0 +1,97 @@
+"""Tests for parallel, deadline-bounded latest-price fetching."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from backend.config import CacheTTL, LatestPrices
+from backend.core import data_provider, market_source
+from backend.core.data_provider import DataProvider, _RateLimiter, yf_controller
+
+
+def _five_days(symbols, close=100.0):
+    dates = pd.bdate_range("2023-06-26", periods=5)
+    frames = {s: pd.DataFrame({"Close": close}, index=dates) for s in symbols}
+    return frames[symbols[0]] if len(symbols) == 1 else pd.concat(frames, axis=1)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(yf_controller, "enabled", False)
+    monkeypatch.setattr(yf_controller._chunks["latest"], "value", 2)
+    monkeypatch.setattr(LatestPrices, "FETCH_WORKERS", 4)
+    monkeypatch.setattr("backend.core.data_provider._RETRY_BASE_DELAY", 0)
+
+
+def test_chunks_download_concurrently(monkeypatch):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def download(tickers, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return _five_days(list(tickers))
+
+    monkeypatch.setattr(market_source.yf, "download", download)
+    symbols = [f"__PAR{i}__.NS" for i in range(8)]
+    began = time.monotonic()
+    result = DataProvider._fetch_latest_prices(symbols)
+    assert set(result) == set(symbols) and result[symbols[0]] == (100.0, "2023-06-30")
+    assert peak[0] > 1 and time.monotonic() - began < 0.35
+
+
+def test_deadline_returns_partial_results(monkeypatch):
+    def download(tickers, **kwargs):
+        if "__SLOW__.NS" in tickers:
+            time.sleep(1.0)
+        return _five_days(list(tickers))
+
+    monkeypatch.setattr(market_source.yf, "download", download)
+    began = time.monotonic()
+    result = DataProvider._fetch_latest_prices(["__FAST0__.NS", "__FAST1__.NS", "__SLOW__.NS"], deadline_sec=0.3)
+    assert time.monotonic() - began < 0.6
+    assert set(result) == {"__FAST0__.NS", "__FAST1__.NS"}
+
+
+def test_fallback_runs_rate_limited_per_symbol(monkeypatch):
+    class _Ticker:
+        calls = []
+
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, **kwargs):
+            _Ticker.calls.append(time.monotonic())
+            return _five_days([self.symbol], close=7.0)
+
+    def failing(tickers, **kwargs):
+        raise ConnectionError("bulk endpoint down")
+
+    monkeypatch.setattr(market_source.yf, "download", failing)
+    monkeypatch.setattr(market_source.yf, "Ticker", _Ticker)
+    monkeypatch.setattr(LatestPrices, "FALLBACK_RATE_PER_SEC", 20)
+    symbols = [f"__FB{i}__.NS" for i in range(4)]
+    result = DataProvider._fetch_latest_prices(symbols)
+    assert result == {s: (7.0, "2023-06-30") for s in symbols}
+    gaps = [b - a for a, b in zip(sorted(_Ticker.calls), sorted(_Ticker.calls)[1:])]
+    assert min(gaps) >= 0.04
+
+
+def test_rate_limiter_refuses_slots_past_deadline():
+    limiter = _RateLimiter(2)
+    deadline = time.monotonic() + 0.3
+    assert limiter.acquire(deadline)
+    assert not limiter.acquire(time.monotonic() + 0.1)
+
+
+def test_fetched_prices_use_configured_ttl(monkeypatch):
+    writes = {}
+    monkeypatch.setattr(CacheTTL, "LATEST_PRICE", 42)
+    monkeypatch.setattr(data_provider.cache, "set", lambda key, value, expire=None, **kw: writes.update({key: expire}))
+    monkeypatch.setattr(market_source.yf, "download", lambda tickers, **kwargs: _five_days(list(tickers)))
+    DataProvider._fetch_latest_prices(["__TTL0__.NS", "__TTL1__.NS"])
+    assert writes == {"__TTL0__.NS_latest_price": 42, "__TTL1__.NS_latest_price": 42}
@@ -155,11 +155,11 @@ class TestLatestPriceBatch:
     def test_get_latest_prices_batch_ohlcv_fallback(self):
         """When {sym}_latest_price is missing but OHLCV cache is fresh, fallback reads from it."""
         from backend.core.data_provider import DataProvider, cache
+        from backend.core.market_store import MarketStore
         sym = "__test_ohlcv_fallback__"
         cache_key = f"{sym}_latest_price"
         cache.delete(cache_key)
-        cache.delete(DataProvider._data_key(sym))
-        cache.delete(DataProvider._range_key(sym))
+        MarketStore.delete(sym)
 
         dates = pd.date_range(end=datetime.now(), periods=5, freq="B")
         df = pd.DataFrame({"Close": [100, 101, 102, 103, 104]}, index=dates)
@@ -182,11 +182,11 @@ class TestLatestPriceBatch:
     def test_get_latest_prices_batch_ohlcv_fallback_stale(self):
         """When OHLCV cache is stale (>3 days), fallback does NOT provide price."""
         from backend.core.data_provider import DataProvider, cache
+        from backend.core.market_store import MarketStore
         sym = "__test_ohlcv_stale__"
         cache_key = f"{sym}_latest_price"
         cache.delete(cache_key)
-        cache.delete(DataProvider._data_key(sym))
-        cache.delete(DataProvider._range_key(sym))
+        MarketStore.delete(sym)
 
         old_end = datetime.now() - timedelta(days=10)
         dates = pd.date_range(end=old_end, periods=5, freq="B")
@@ -0,0 +1,71 @@
+"""Tests for the background latest-price refresher."""
+import asyncio
+
+import pytest
+
+from backend.core import data_provider
+from backend.core.data_provider import DataProvider, cache
+from backend.core.latest_prices import LatestPriceRefresher
+
+
+@pytest.mark.asyncio
+async def test_lookup_misses_everything_until_started():
+    refresher = LatestPriceRefresher(lambda syms: {}, interval=60)
+    assert refresher.lookup(["A.NS"]) == ({}, ["A.NS"])
+    refresher.ingest({"A.NS": (1.0, "2023-06-30")})
+    assert refresher.snapshot()["priced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_refreshes_used_symbols_in_one_fetch():
+    calls = []
+    prices = {"A.NS": 10.0, "B.NS": 20.0}
+
+    def fetch(symbols):
+        calls.append(sorted(symbols))
+        return {s: (prices[s], "2023-06-30") for s in symbols}
+
+    refresher = LatestPriceRefresher(fetch, interval=0.05, max_age=60, active_window=60)
+    refresher.start()
+    try:
+        assert refresher.lookup(["A.NS", "B.NS"]) == ({}, ["A.NS", "B.NS"])
+        refresher.ingest({"A.NS": (9.0, "2023-06-29"), "B.NS": (None, None)})
+        assert refresher.lookup(["A.NS"])[0] == {"A.NS": (9.0, "2023-06-29")}
+
+        prices["A.NS"] = 11.0
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if calls:
+                break
+        assert calls[0] == ["A.NS", "B.NS"]
+        hits, misses = refresher.lookup(["A.NS", "B.NS", "C.NS"])
+        assert hits == {"A.NS": (11.0, "2023-06-30"), "B.NS": (20.0, "2023-06-30")} and misses == ["C.NS"]
+    finally:
+        await refresher.stop()
+    assert not refresher.running
+
+
+def test_idle_symbols_age_out():
+    refresher = LatestPriceRefresher(lambda syms: {s: (1.0, "2023-06-30") for s in syms},
+                                     active_window=0, max_symbols=10)
+    refresher._used["OLD.NS"] = 0.0
+    assert refresher.refresh_once() == 0 and refresher.snapshot()["symbols"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_reads_live_table_without_fetching(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(DataProvider, "_fetch_latest_prices",
+                        staticmethod(lambda syms: fetched.append(list(syms)) or {s: (5.0, "2023-06-30") for s in syms}))
+    refresher = LatestPriceRefresher(lambda syms: {}, interval=3600)
+    monkeypatch.setattr(data_provider, "latest_refresher", refresher)
+    cache.delete("__LIVE_A__.NS_latest_price")
+    refresher.start()
+    try:
+        first = await asyncio.to_thread(DataProvider.get_latest_prices_batch, ["__LIVE_A__.NS"])
+        cache.delete("__LIVE_A__.NS_latest_price")
+        second = await asyncio.to_thread(DataProvider.get_latest_prices_batch, ["__LIVE_A__.NS"])
+    finally:
+        await refresher.stop()
+    assert first == second == {"__LIVE_A__.NS": (5.0, "2023-06-30")}
+    assert fetched == [["__LIVE_A__.NS"]]
@@ -0,0 +1,88 @@
+"""Tests for the pluggable market data source and the offline local-file provider."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from backend.core import market_source
+from backend.core.data_provider import DataProvider, cache
+from backend.core.market_source import LocalFileSource, MarketDataSource, YFinanceSource, build_source
+from backend.core.symbol_master import symbol_master
+from conftest import symbol_bars
+
+
+@pytest.fixture
+def local_dir(tmp_path, monkeypatch):
+    root = tmp_path / "bars"
+    root.mkdir()
+    symbol_bars().to_csv(root / "__LOC_A__.NS.csv")
+    symbol_bars(base=200.0).reset_index().to_csv(root / "__LOC_B__.NS.csv", index=False)
+    (root / "info.json").write_text(json.dumps({"__LOC_A__.NS": {"sector": "Energy", "marketCap": 5}}))
+    monkeypatch.setattr(symbol_master, "_rows", {})
+    monkeypatch.setattr(symbol_master, "_loaded", True)
+    monkeypatch.setattr(symbol_master, "path", tmp_path / "symbol_master.csv")
+    source = LocalFileSource(str(root))
+    monkeypatch.setattr(market_source, "_source", source)
+    return root
+
+
+def test_local_source_windows_match_yfinance_semantics(local_dir):
+    source = market_source.get_source()
+    hist = source.history("__LOC_A__.NS", start="2023-01-03", end="2023-01-06")
+    assert list(hist.index) == list(pd.bdate_range("2023-01-03", "2023-01-05"))  # end exclusive
+
+    last = symbol_bars().index[-1]
+    assert source.history("__LOC_A__.NS", period="1d").index.tolist() == [last]
+    assert len(source.history("__LOC_A__.NS", period="5d")) == 5
+    assert source.history("__MISSING__.NS", period="5d").empty
+
+    df = source.download(["__LOC_A__.NS", "__LOC_B__.NS", "__MISSING__.NS"], start="2023-01-02", end="2023-02-01")
+    assert set(df.columns.get_level_values(0)) == {"__LOC_A__.NS", "__LOC_B__.NS"}
+    assert df["__LOC_B__.NS"]["Close"].iloc[0] == 200.0
+    single = source.download(["__LOC_A__.NS"], period="5d")
+    assert "Close" in single.columns and len(single) == 5
+
+    assert source.info("__LOC_A__.NS") == {"sector": "Energy", "marketCap": 5}
+    assert source.info("__LOC_B__.NS") == {}
+
+
+def test_data_provider_runs_offline_from_local_files(local_dir):
+    for sym in ("__LOC_A__.NS", "__LOC_B__.NS"):
+        cache.delete(f"{sym}_latest_price")
+        cache.delete(f"{sym}_info")
+
+    df = DataProvider.get_bulk_ticker_data(["__LOC_A__.NS", "__LOC_B__.NS"], "2023-01-02", "2023-02-01")
+    assert set(df.columns.get_level_values(0)) == {"__LOC_A__.NS", "__LOC_B__.NS"}
+    assert not DataProvider.get_ticker_data("__LOC_B__.NS", "2023-02-01", "2023-03-01").empty
+
+    prices = DataProvider.get_latest_prices_batch(["__LOC_A__.NS", "__LOC_B__.NS"])
+    assert prices["__LOC_B__.NS"] == (259.0, symbol_bars().index[-1].strftime("%Y-%m-%d"))
+    assert DataProvider.get_ticker_info("__LOC_A__.NS") == {"sector": "Energy", "marketCap": "Smallcap"}
+
+
+def test_local_source_rereads_changed_files(local_dir):
+    source = market_source.get_source()
+    assert source.history("__LOC_A__.NS", period="1d")["Close"].iloc[-1] == 159.0
+    path = local_dir / "__LOC_A__.NS.csv"
+    symbol_bars(base=500.0).to_csv(path)
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 5))
+    assert source.history("__LOC_A__.NS", period="1d")["Close"].iloc[-1] == 559.0
+
+
+def test_build_source(tmp_path):
+    assert isinstance(build_source("yfinance"), YFinanceSource)
+    assert isinstance(build_source("local", str(tmp_path)), LocalFileSource)
+    with pytest.raises(ValueError):
+        build_source("local", str(tmp_path / "nope"))
+    with pytest.raises(ValueError):
+        build_source("bloomberg")
+
+
+def test_source_must_implement_bars():
+    class InfoOnly(MarketDataSource):
+        def history(self, symbol, start=None, end=None, period=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        InfoOnly()
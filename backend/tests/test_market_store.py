@@ -0,0 +1,156 @@
+"""Tests for the columnar on-disk OHLCV store."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.config import Paths
+from backend.core.data_provider import DataProvider
+from backend.core.market_store import MarketStore
+
+
+def _frame(tz=None):
+    dates = pd.bdate_range("2023-01-02", "2023-06-30", tz=tz)
+    data = pd.DataFrame(index=dates)
+    data["Open"] = np.linspace(100, 150, len(dates))
+    data["High"] = data["Open"] + 2.25
+    data["Low"] = data["Open"] - 1.75
+    data["Close"] = data["Open"] + 0.123456789
+    data["Adj Close"] = data["Close"] * 0.98
+    data["Volume"] = np.arange(len(dates)) * 1000
+    data["Dividends"] = 0.0
+    return data
+
+
+def test_roundtrip_and_range_read():
+    frame = _frame()
+    MarketStore.write("M&M.NS", frame.iloc[::-1], expire=3600)
+
+    assert MarketStore.coverage("M&M.NS") == (frame.index[0], frame.index[-1])
+    got = MarketStore.read("M&M.NS", "2023-02-01", "2023-03-15")
+    expected = frame.loc["2023-02-01":"2023-03-15", ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+    pd.testing.assert_frame_equal(got, expected, check_freq=False, check_dtype=False)
+    assert got["Close"].tolist() == expected["Close"].tolist()  # float64, bit-exact
+
+
+def test_read_frame_is_zero_copy_view():
+    MarketStore.write("A.NS", _frame())
+    sf = MarketStore.read_frame("A.NS", "2023-03-01", "2023-03-31")
+    assert not sf.close.flags.owndata and not sf.calendar.dates.flags.owndata
+    assert not sf.close.flags.writeable  # slices of the read-only mapping
+    assert len(sf.calendar) == len(_frame().loc["2023-03-01":"2023-03-31"])
+
+
+def test_missing_columns_and_expiry(monkeypatch):
+    closes = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=pd.bdate_range("2023-01-02", periods=3))
+    MarketStore.write("C.NS", closes, expire=60)
+    assert list(MarketStore.read("C.NS").columns) == ["Close"]
+
+    import backend.core.market_store as market_store
+    now = market_store.time.time()
+    monkeypatch.setattr(market_store.time, "time", lambda: now + 120)
+    assert MarketStore.coverage("C.NS") is None
+    assert MarketStore.read("C.NS") is None
+    assert MarketStore.read("C.NS", include_expired=True) is not None
+
+
+def test_data_provider_serves_range_hits_from_store(monkeypatch):
+    frame = _frame(tz="Asia/Kolkata")
+    DataProvider.persist_symbol_data("B.NS", frame)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("store hit must not fetch")
+
+    monkeypatch.setattr("backend.core.market_source.yf.Ticker", no_network)
+    got = DataProvider.get_ticker_data("B.NS", "2023-04-03", "2023-04-28")
+    expected = frame.tz_localize(None).loc["2023-04-03":"2023-04-28"]
+    assert got.index.equals(expected.index)
+    assert got["Close"].tolist() == expected["Close"].tolist()
+
+    # A narrower persist must not shrink what is stored
+    DataProvider.persist_symbol_data("B.NS", frame.iloc[10:20])
+    assert MarketStore.coverage("B.NS")[1] == frame.tz_localize(None).index[-1]
+
+
+class _FakeTicker:
+    def __init__(self, frame, calls):
+        self.frame, self.calls = frame, calls
+
+    def history(self, start, end, auto_adjust):
+        self.calls.append((start, end))
+        return self.frame.loc[start:str((pd.Timestamp(end) - pd.Timedelta(days=1)).date())]
+
+
+def test_partial_coverage_fetches_only_gaps(monkeypatch):
+    full = _frame(tz="Asia/Kolkata")
+    naive = full.tz_localize(None)
+    calls = []
+    monkeypatch.setattr("backend.core.market_source.yf.Ticker", lambda symbol: _FakeTicker(full, calls))
+    DataProvider.persist_symbol_data("G.NS", full.loc["2023-02-01":"2023-04-28"])
+
+    got = DataProvider.get_ticker_data("G.NS", "2023-01-16", "2023-05-31")
+    assert calls == [("2023-01-16", "2023-02-01"), ("2023-04-29", "2023-05-31")]
+    expected = naive.loc["2023-01-16":"2023-05-30"]  # yfinance end is exclusive
+    assert got.index.equals(expected.index)
+    assert got["Close"].tolist() == expected["Close"].tolist()
+    assert MarketStore.coverage("G.NS") == (expected.index[0], expected.index[-1])
+
+    calls.clear()
+    DataProvider.get_ticker_data("G.NS", "2023-01-14", "2023-05-31")  # Saturday start: nothing to fetch
+    assert calls == []
+
+
+def test_gap_fetch_failure_serves_stored_rows(monkeypatch):
+    full = _frame()
+    DataProvider.persist_symbol_data("F.NS", full.loc[:"2023-03-31"])
+
+    def down(symbol):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr("backend.core.data_provider._RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr("backend.core.market_source.yf.Ticker", down)
+    got = DataProvider.get_ticker_data("F.NS", "2023-03-01", "2023-04-30")
+    assert got.index.equals(full.loc["2023-03-01":"2023-03-31"].index)
+
+
+def test_persist_extends_adjoining_slice():
+    full = _frame()
+    DataProvider.persist_symbol_data("E.NS", full.loc[:"2023-03-31"])
+    DataProvider.persist_symbol_data("E.NS", full.loc["2023-04-03":])
+    assert MarketStore.coverage("E.NS") == (full.index[0], full.index[-1])
+    assert len(MarketStore.read("E.NS")) == len(full)
+
+    DataProvider.persist_symbol_data("E.NS", _frame().set_axis(full.index + pd.DateOffset(years=2)))
+    assert MarketStore.coverage("E.NS")[0] == full.index[0] + pd.DateOffset(years=2)  # disjoint: replaced
+
+
+def test_concurrent_merges_keep_every_row():
+    from concurrent.futures import ThreadPoolExecutor
+
+    frame = _frame()
+    MarketStore.write("R.NS", frame.loc["2023-03-01":"2023-03-31"])
+    months = [frame.loc[f"2023-{m:02d}-01":f"2023-{m:02d}-28"] for m in (1, 2, 4, 5, 6)] * 4
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda part: MarketStore.merge("R.NS", part), months))
+
+    got = MarketStore.read("R.NS")
+    expected = pd.concat([frame.loc["2023-03-01":"2023-03-31"], *months[:5]]).sort_index()
+    assert got.index.equals(expected.index.unique())
+    assert not list(Path(Paths.MARKET_DIR).glob("*.tmp"))
+
+
+def test_torn_file_is_a_miss():
+    MarketStore.write("T.NS", _frame())
+    path = Path(Paths.MARKET_DIR) / "T.NS.ohlcv"
+    path.write_bytes(path.read_bytes()[:-8])
+    assert MarketStore.read("T.NS") is None and MarketStore.coverage("T.NS") is None
+
+
+def test_sweep_drops_expired_and_oldest_over_budget():
+    MarketStore.write("OLD.NS", _frame())
+    MarketStore.write("NEW.NS", _frame())
+    MarketStore.write("GONE.NS", _frame(), expire=-1)
+    size = (Path(Paths.MARKET_DIR) / "OLD.NS.ohlcv").stat().st_size
+    swept = MarketStore.sweep(max_bytes=size)
+    assert swept["expired"] == 1 and swept["evicted"] == 1
+    assert sorted(p.name for p in Path(Paths.MARKET_DIR).glob("*.ohlcv")) == ["NEW.NS.ohlcv"]
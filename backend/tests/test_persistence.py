@@ -43,6 +43,13 @@ class TestComputeRowHash:
         assert len(h) == 64
         int(h, 16)  # raises if not valid hex
 
+    def test_default_horizons_keep_legacy_hash(self):
+        a = compute_row_hash("RELIANCE.NS", "2026-01-15", "next_close", 90)
+        b = compute_row_hash("RELIANCE.NS", "2026-01-15", "next_close", 90, (7, 14, 30, 45, 60, 90))
+        c = compute_row_hash("RELIANCE.NS", "2026-01-15", "next_close", 90, (1, 3, 5))
+        assert a == b
+        assert a != c
+
 
 # ---------------------------------------------------------------------------
 # _build_results_json
@@ -111,6 +118,13 @@ class TestBuildResultsJson:
         assert "exit_price_7d" not in data
         assert "return_14d" in data
 
+    def test_custom_horizons_from_arrays(self):
+        t = make_trade(returns=[0.5, None, 31.2], exit_prices=[146.0, None, 190.2])
+        data = json.loads(_build_results_json(t, (1, 3, 120)))
+        assert data["return_1d"] == 0.5
+        assert data["exit_price_120d"] == 190.2
+        assert "return_3d" not in data and "return_7d" not in data
+
     def test_nan_max_high_omitted(self):
         t = make_trade(max_high_90d=float("nan"), max_low_90d=float("nan"))
         data = json.loads(_build_results_json(t))
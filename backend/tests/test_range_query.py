@@ -0,0 +1,35 @@
+"""Tests for SparseTable range argmax/argmin."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.utils.range_query import SparseTable
+
+
+@pytest.mark.parametrize("mode", ["max", "min"])
+def test_sparse_table_matches_pandas(mode):
+    rng = np.random.default_rng(7)
+    values = rng.integers(0, 20, size=300).astype(float)  # plenty of ties
+    values[rng.integers(0, 300, size=40)] = np.nan
+    series = pd.Series(values)
+    table = SparseTable(values, mode)
+
+    starts = rng.integers(0, 299, size=500)
+    stops = np.minimum(starts + rng.integers(1, 90, size=500), 300)
+    positions = table.query(starts, stops)
+
+    for s, e, pos in zip(starts, stops, positions):
+        window = series.iloc[s:e]
+        if window.isna().all():
+            assert np.isnan(values[pos])
+            continue
+        expected = window.idxmax() if mode == "max" else window.idxmin()
+        assert pos == expected
+
+
+def test_sparse_table_single_row_and_invalid_mode():
+    table = SparseTable(np.array([5.0]), "max")
+    assert table.query([0], [1]).tolist() == [0]
+    assert table.query([], []).tolist() == []
+    with pytest.raises(ValueError):
+        SparseTable(np.array([1.0]), "median")
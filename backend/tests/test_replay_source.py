@@ -0,0 +1,136 @@
+"""Tests for recording market data responses and replaying them offline."""
+import time
+
+import pandas as pd
+import pytest
+
+from backend.core import data_provider, market_source
+from backend.core.data_provider import DataProvider, yf_controller
+from backend.core.market_source import LocalFileSource
+from backend.core.replay_source import RecordingSource, ReplayMiss, ReplaySource
+from conftest import symbol_bars
+
+
+class _Flaky(LocalFileSource):
+    def info(self, symbol):
+        if symbol == "DOWN.NS":
+            raise ConnectionError("info endpoint down")
+        return {"sector": "Energy", "marketCap": 7}
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    root = tmp_path / "bars"
+    root.mkdir()
+    symbol_bars(periods=40).to_csv(root / "A.NS.csv")
+    symbol_bars(periods=40, base=300.0).to_csv(root / "B.NS.csv")
+    bundle_dir = tmp_path / "bundle"
+    rec = RecordingSource(_Flaky(str(root)), str(bundle_dir))
+    recorded = {
+        "download": rec.download(["B.NS", "A.NS"], start="2023-01-02", end="2023-02-01"),
+        "history": rec.history("A.NS", period="5d"),
+        "info": rec.info("A.NS"),
+    }
+    with pytest.raises(ConnectionError):
+        rec.info("DOWN.NS")
+    return bundle_dir, recorded
+
+
+def test_replay_serves_recorded_responses(bundle):
+    bundle_dir, recorded = bundle
+    replay = ReplaySource(str(bundle_dir), latency=0)
+    # Symbol order does not matter; dates are compared by day
+    pd.testing.assert_frame_equal(
+        replay.download(["A.NS", "B.NS"], start=pd.Timestamp("2023-01-02"), end="2023-02-01"), recorded["download"])
+    pd.testing.assert_frame_equal(replay.history("A.NS", period="5d"), recorded["history"])
+    assert replay.info("A.NS") == {"sector": "Energy", "marketCap": 7}
+    with pytest.raises(ConnectionError, match="recorded failure"):
+        replay.info("DOWN.NS")
+    with pytest.raises(ReplayMiss):
+        replay.history("A.NS", period="1mo")
+    assert replay.snapshot() == {"recorded_calls": 4, "calls": 5, "misses": 1, "assembled": 0,
+                                 "injected_failures": 0, "recorded_failures": 1}
+
+
+def test_injected_failures_are_deterministic_per_seed(bundle):
+    bundle_dir, _ = bundle
+
+    def outcomes(seed):
+        replay = ReplaySource(str(bundle_dir), latency=0, failure_rate=0.5, seed=seed)
+        out = []
+        for _ in range(20):
+            try:
+                replay.info("A.NS")
+                out.append(True)
+            except ConnectionError:
+                out.append(False)
+        return out
+
+    first = outcomes(7)
+    assert first == outcomes(7)
+    assert 0 < first.count(False) < 20
+
+
+def test_replay_latency(bundle):
+    bundle_dir, _ = bundle
+    replay = ReplaySource(str(bundle_dir), latency=0.05)
+    began = time.monotonic()
+    replay.info("A.NS")
+    assert time.monotonic() - began >= 0.05
+
+
+def test_backtest_fetches_replay_without_network(monkeypatch, bundle):
+    bundle_dir, recorded = bundle
+    monkeypatch.setattr(market_source, "_source", ReplaySource(str(bundle_dir), latency=0))
+    df = DataProvider.get_bulk_ticker_data(["A.NS", "B.NS"], "2023-01-02", "2023-02-01")
+    assert df["A.NS"]["Close"].tolist() == recorded["download"]["A.NS"]["Close"].tolist()
+    assert DataProvider.get_cache_stats()["market_source"] == "replay"
+
+
+def test_rebatched_requests_are_assembled_per_symbol(bundle):
+    bundle_dir, recorded = bundle
+    replay = ReplaySource(str(bundle_dir), latency=0)
+    a = replay.download(["A.NS"], start="2023-01-09", end="2023-01-20")
+    pd.testing.assert_frame_equal(a, recorded["download"]["A.NS"].loc["2023-01-09":"2023-01-19"])
+    b = replay.history("B.NS", start="2023-01-02", end="2023-02-01")
+    assert b["Close"].tolist() == recorded["download"]["B.NS"]["Close"].tolist()
+    with pytest.raises(ReplayMiss):
+        replay.download(["A.NS", "B.NS"], start="2023-01-02", end="2023-03-01")  # beyond the recorded window
+    assert replay.snapshot()["assembled"] == 2
+
+
+class _ChunkOutage(ReplaySource):
+    """Fails every attempt at the full recorded chunk, so the provider has to bisect it."""
+
+    def __init__(self, bundle_dir, chunk):
+        super().__init__(bundle_dir, latency=0)
+        self.chunk = sorted(chunk)
+
+    def download(self, symbols, start=None, end=None, period=None):
+        if sorted(symbols) == self.chunk:
+            raise ConnectionError("injected outage")
+        return super().download(symbols, start=start, end=end, period=period)
+
+
+def test_recorded_run_replays_through_bisection(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_provider, "_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(yf_controller, "enabled", False)
+    root = tmp_path / "bars"
+    root.mkdir()
+    symbols = [f"__RP{i}__.NS" for i in range(6)]
+    for i, sym in enumerate(symbols):
+        symbol_bars(periods=40, base=100.0 * (i + 1)).to_csv(root / f"{sym}.csv")
+
+    bundle_dir = str(tmp_path / "bundle")
+    monkeypatch.setattr(market_source, "_source", RecordingSource(LocalFileSource(str(root)), bundle_dir))
+    recorded = DataProvider.get_bulk_ticker_data(symbols, "2023-01-02", "2023-02-01")
+
+    replay = _ChunkOutage(bundle_dir, symbols)
+    monkeypatch.setattr(market_source, "_source", replay)
+    before = DataProvider.get_cache_stats()["bisected_chunks"]
+    replayed = DataProvider.get_bulk_ticker_data(symbols, "2023-01-02", "2023-02-01")
+
+    assert DataProvider.get_cache_stats()["bisected_chunks"] - before == 1
+    assert replay.snapshot()["misses"] == 0 and replay.snapshot()["assembled"] >= 2
+    for sym in symbols:
+        assert replayed[sym]["Close"].tolist() == recorded[sym]["Close"].tolist()
@@ -0,0 +1,71 @@
+"""Tests for the columnar Phase C result buffer."""
+import math
+
+from backend.core.result_buffer import ResultBuffer
+from backend.models.schemas import SignalResult
+
+
+def _row(i):
+    return {
+        "symbol": f"SYM{i % 7}.NS", "signal_date": "2023-01-02", "entry_date": "2023-01-03",
+        "entry_price": 100.0 + i, "entry_mode": "next_close", "status": "Success",
+        "return_7d": 1.25, "exit_price_7d": 101.5, "return_90d": -3.5 if i % 2 else None,
+        "max_high_90d": 120.0, "max_high_date": "2023-02-01", "sector": None,
+    }
+
+
+def _dump(row, horizons):
+    """model_dump() of a row, with the per-horizon arrays the buffer derives from named fields."""
+    d = SignalResult(**row).model_dump()
+    d["returns"] = [row.get(f"return_{h}d") for h in horizons]
+    d["exit_prices"] = [row.get(f"exit_price_{h}d") for h in horizons]
+    return d
+
+
+def test_round_trip_matches_model_dump():
+    buf = ResultBuffer(capacity=16)
+    rows = [_row(i) for i in range(50)]  # forces growth past initial capacity
+    rows.append({"symbol": "BAD", "signal_date": "2023-01-02", "entry_price": 0.0, "status": "Symbol Not Found"})
+    for r in rows:
+        buf.append(r)
+
+    assert len(buf) == 51
+    assert buf.to_dicts() == [_dump(r, buf.horizons) for r in rows]
+    assert buf.to_dicts([3, 50]) == [_dump(rows[3], buf.horizons), _dump(rows[50], buf.horizons)]
+    assert buf.to_models([1])[0] == SignalResult(**_dump(rows[1], buf.horizons))
+
+
+def test_set_get_and_nan_preserved():
+    buf = ResultBuffer()
+    i = buf.append({"symbol": "A.NS", "signal_date": "2023-01-02", "entry_price": 10.0,
+                    "signal_close_price": float("nan"), "status": "Success"})
+    buf.set(i, "latest_price", 12.5)
+    buf.set(i, "latest_price_date", "2023-07-01")
+    assert buf.get(i, "latest_price") == 12.5
+    assert buf.get(i, "latest_price_date") == "2023-07-01"
+    assert buf.get(i, "return_7d") is None
+    assert math.isnan(buf.get(i, "signal_close_price"))
+    buf.set(i, "latest_price", None)
+    assert buf.to_dicts()[0]["latest_price"] is None
+    assert buf.column("symbol") == ["A.NS"]
+
+
+def test_unknown_keys_and_horizons_ignored():
+    buf = ResultBuffer()
+    buf.append({"symbol": "A.NS", "signal_date": "d", "entry_price": 1.0, "status": "Success",
+                "return_120d": 5.0, "legacy_field": "x"})
+    d = buf.to_dicts()[0]
+    assert "return_120d" not in d and "legacy_field" not in d
+
+
+def test_custom_horizons_use_arrays():
+    buf = ResultBuffer(horizons=(1, 7, 120))
+    buf.append({"symbol": "A.NS", "signal_date": "d", "entry_price": 1.0, "status": "Success",
+                "returns": [0.5, float("nan"), 12.0], "exit_prices": [1.01, None, 1.12]})
+    d = buf.to_dicts()[0]
+    assert d["returns"] == [0.5, None, 12.0]
+    assert d["exit_prices"] == [1.01, None, 1.12]
+    assert d["return_7d"] is None and d["return_90d"] is None
+    assert buf.get(0, "returns") == [0.5, None, 12.0]
+    values, present = buf.horizon_matrix("return")
+    assert values.shape == (1, 3) and present.tolist() == [[True, False, True]]
@@ -0,0 +1,63 @@
+"""Tests for the mergeable per-horizon return sketches."""
+import numpy as np
+import pytest
+
+from backend.core.return_stats import HorizonSketches, ReturnSketch
+
+
+def _returns(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return np.round(rng.normal(2.0, 12.0, n), 2)
+
+
+def test_summary_matches_numpy_within_one_bin():
+    values = _returns(5000)
+    sketch = ReturnSketch()
+    sketch.add(values)
+    s = sketch.summary()
+
+    assert s["count"] == 5000
+    assert s["mean"] == pytest.approx(values.mean(), abs=0.01)
+    assert s["std"] == pytest.approx(values.std(ddof=1), abs=0.01)
+    assert s["min"] == values.min() and s["max"] == values.max()
+    for key, q in (("p10", 10), ("median", 50), ("p90", 90)):
+        assert s[key] == pytest.approx(np.percentile(values, q), abs=sketch.width + 0.01)
+
+
+def test_merge_equals_single_pass():
+    values = _returns(3000)
+    whole = ReturnSketch()
+    whole.add(values)
+
+    merged = ReturnSketch()
+    for part in np.array_split(values, 7):
+        shard = ReturnSketch()
+        shard.add(part)
+        merged.merge(ReturnSketch.from_dict(shard.to_dict()))
+
+    assert np.array_equal(merged.bins, whole.bins)
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean)
+    assert merged.std == pytest.approx(whole.std)
+    assert merged.summary() == whole.summary()
+
+
+def test_empty_and_incompatible():
+    sketch = ReturnSketch()
+    sketch.add([float("nan")])
+    assert sketch.summary() is None
+    with pytest.raises(ValueError):
+        sketch.merge(ReturnSketch(width=0.1))
+
+
+def test_horizon_sketches_from_matrix():
+    values = np.array([[1.0, 5.0], [np.nan, -3.0], [2.0, 7.0]])
+    present = ~np.isnan(values)
+    sketches = HorizonSketches((7, 120))
+    sketches.add_matrix(values, present)
+    restored = HorizonSketches.from_dict(sketches.to_dict())
+
+    stats = restored.summaries()
+    assert restored.horizons == (7, 120)
+    assert stats[0]["count"] == 2 and stats[0]["max"] == 2.0
+    assert stats[1]["count"] == 3 and stats[1]["min"] == -3.0
@@ -0,0 +1,146 @@
+"""Tests for cross-request single-flight coalescing of yfinance fetches."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from backend.config import Engine, Limits
+from backend.core import data_provider
+from backend.core.data_provider import DataProvider, cache
+from backend.utils.single_flight import InFlight
+from conftest import bars
+
+
+def test_claim_covers_only_wider_ranges():
+    inflight = InFlight()
+    owned, waiting = inflight.claim("bars", ["A", "B"], "2023-01-01", "2023-06-30")
+    assert set(owned) == {"A", "B"} and not waiting
+
+    inner_owned, inner_waiting = inflight.claim("bars", ["A", "C"], "2023-02-01", "2023-03-01")
+    assert set(inner_waiting) == {"A"} and set(inner_owned) == {"C"}
+    wider_owned, _ = inflight.claim("bars", ["B"], "2022-12-01", "2023-03-01")
+    assert set(wider_owned) == {"B"}
+
+    inflight.release("bars", owned, {"A": "a-frame"})
+    assert InFlight.wait(inner_waiting, timeout=1) == ({"A": "a-frame"}, [])
+    inflight.release("bars", inner_owned, {})
+    inflight.release("bars", wider_owned, {})
+    assert inflight.in_flight() == 0
+
+
+def test_concurrent_bulk_requests_download_shared_symbols_once(monkeypatch):
+    calls = []
+    entered = threading.Event()
+
+    def download(symbols, start, end):
+        calls.append(sorted(symbols))
+        entered.set()
+        time.sleep(0.2)
+        return bars(symbols, start, end)
+
+    monkeypatch.setattr(DataProvider, "_download_bars", staticmethod(download))
+    before = DataProvider.get_cache_stats()["coalesced_bars"]
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(DataProvider.get_bulk_ticker_data, ["A.NS", "B.NS"], "2023-01-02", "2023-06-30")
+        entered.wait(1)
+        second = pool.submit(DataProvider.get_bulk_ticker_data, ["B.NS", "C.NS"], "2023-02-01", "2023-03-01")
+        first_df, second_df = first.result(), second.result()
+
+    assert calls == [["A.NS", "B.NS"], ["C.NS"]]
+    assert set(second_df.columns.get_level_values(0)) == {"B.NS", "C.NS"}
+    b = second_df["B.NS"].dropna(how="all")
+    assert b.index[0] == pd.Timestamp("2023-02-01") and b.index[-1] < pd.Timestamp("2023-03-01")
+    assert DataProvider.get_cache_stats()["coalesced_bars"] - before == 1
+
+
+def test_concurrent_latest_price_requests_coalesce(monkeypatch):
+    calls = []
+    entered = threading.Event()
+
+    def fetch(symbols):
+        calls.append(sorted(symbols))
+        entered.set()
+        time.sleep(0.2)
+        return {s: (100.0, "2023-06-30") for s in symbols}
+
+    symbols = ["__SF_A__", "__SF_B__"]
+    for sym in symbols:
+        cache.delete(f"{sym}_latest_price")
+    monkeypatch.setattr(DataProvider, "_fetch_latest_prices", staticmethod(fetch))
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(DataProvider.get_latest_prices_batch, symbols)
+        entered.wait(1)
+        second = pool.submit(DataProvider.get_latest_prices_batch, symbols[1:])
+        assert second.result() == {"__SF_B__": (100.0, "2023-06-30")}
+        first.result()
+    assert calls == [symbols]
+
+
+def test_waiter_fetches_itself_after_timeout(monkeypatch):
+    monkeypatch.setattr(Limits, "SINGLE_FLIGHT_WAIT_SEC", 0.05)
+    owned, _ = data_provider._inflight.claim("bars", ["SLOW.NS"], "2023-01-01", "2023-12-31")
+    try:
+        monkeypatch.setattr(DataProvider, "_download_bars", staticmethod(bars))
+        df = DataProvider.get_bulk_ticker_data(["SLOW.NS"], "2023-02-01", "2023-03-01")
+        assert not df["SLOW.NS"].empty
+    finally:
+        data_provider._inflight.release("bars", owned, {})
+
+
+def test_wait_is_shorter_than_enclosing_timeouts():
+    enclosing = min(Limits.BULK_FETCH_TIMEOUT_SEC, Limits.SYMBOL_FETCH_TIMEOUT_SEC, Engine.SYMBOL_TIMEOUT_SEC)
+    assert Limits.SINGLE_FLIGHT_WAIT_SEC < enclosing
+
+
+@pytest.mark.asyncio
+async def test_stalled_leader_does_not_time_out_waiter(monkeypatch):
+    """A waiter behind a stalled leader gives up and fetches for itself inside the
+    engine's bulk-request timeout instead of being cancelled with nothing."""
+    monkeypatch.setattr(Limits, "BULK_FETCH_TIMEOUT_SEC", 1.0)
+    monkeypatch.setattr(Limits, "SINGLE_FLIGHT_WAIT_SEC", 0.5)
+    stalled, release = threading.Event(), threading.Event()
+    calls = []
+
+    def download(symbols, start, end):
+        calls.append(sorted(symbols))
+        if len(calls) == 1:
+            stalled.set()
+            release.wait(5)
+        return bars(symbols, start, end)
+
+    monkeypatch.setattr(DataProvider, "_download_bars", staticmethod(download))
+    leader = asyncio.create_task(asyncio.to_thread(
+        DataProvider.get_bulk_ticker_data, ["STALL.NS"], "2023-01-02", "2023-06-30"))
+    await asyncio.to_thread(stalled.wait, 1)
+    try:
+        df = await asyncio.wait_for(asyncio.to_thread(
+            DataProvider.get_bulk_ticker_data, ["STALL.NS"], "2023-02-01", "2023-03-01"),
+            timeout=Limits.BULK_FETCH_TIMEOUT_SEC)
+    finally:
+        release.set()
+        await leader
+    assert calls == [["STALL.NS"], ["STALL.NS"]]
+    assert not df["STALL.NS"].empty
+
+
+def test_waiter_fetches_itself_when_leader_has_nothing(monkeypatch):
+    owned, _ = data_provider._inflight.claim("bars", ["LOST.NS"], "2023-01-01", "2023-12-31")
+    fetched = []
+
+    def history(symbol, start, end):
+        fetched.append(symbol)
+        return bars([symbol], start, end)[symbol]
+
+    monkeypatch.setattr(DataProvider, "_fetch_history", staticmethod(history))
+    with ThreadPoolExecutor(1) as pool:
+        waiter = pool.submit(DataProvider.get_ticker_data, "LOST.NS", "2023-02-01", "2023-03-01")
+        time.sleep(0.05)
+        data_provider._inflight.release("bars", owned, {})      # leader failed: publishes None
+        df = waiter.result(timeout=5)
+    assert fetched == ["LOST.NS"]
+    assert not df.empty
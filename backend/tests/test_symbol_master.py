@@ -0,0 +1,93 @@
+"""Tests for the local symbol master behind get_ticker_info."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from backend.core import market_source
+from backend.core.backtester import Backtester
+from backend.core.data_provider import DataProvider, cache
+from backend.core.symbol_master import SymbolMaster, market_cap_bucket, symbol_master
+
+
+@pytest.fixture(autouse=True)
+def master(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbol_master, "path", tmp_path / "symbol_master.csv")
+    monkeypatch.setattr(symbol_master, "_rows", {})
+    monkeypatch.setattr(symbol_master, "_loaded", True)
+    monkeypatch.setattr(symbol_master, "_dirty", False)
+    return symbol_master
+
+
+def test_market_cap_buckets():
+    assert market_cap_bucket("smallcap") == "Smallcap" and market_cap_bucket("Large Cap") == "Largecap"
+    assert market_cap_bucket(3e11) == "Largecap"
+    assert market_cap_bucket("6e10") == "Midcap"
+    assert market_cap_bucket(1e9) == "Smallcap"
+    assert market_cap_bucket(None) is None and market_cap_bucket(float("nan")) is None
+
+
+def test_upsert_save_and_reload(master):
+    assert master.upsert({"ERIS.NS": {"sector": "Healthcare", "marketCap": "Midcap"},
+                          "NOTHING.NS": {"sector": None, "marketCap": None}}, source="upload") == 1
+    assert master.upsert({"ERIS.NS": {"sector": "Healthcare"}}, source="upload") == 0
+    assert master.upsert({"ERIS.NS": {"industry": "Pharma"}}, source="info") == 1
+    assert master.save() and not master.save()
+
+    reloaded = SymbolMaster(str(master.path))
+    assert reloaded.get("ERIS.NS") == {"sector": "Healthcare", "marketCap": "Midcap"}
+    row = reloaded.row("ERIS.NS")
+    assert row["exchange"] == "NSE" and row["industry"] == "Pharma" and row["source"] == "info"
+    assert reloaded.get("NOTHING.NS") is None
+
+
+def test_concurrent_saves_keep_every_row(master):
+    def add_and_save(i):
+        master.upsert({f"__SAVE{i}__.NS": {"sector": "IT", "marketCap": "Smallcap"}}, source="upload")
+        master.save()
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(add_and_save, range(40)))
+    assert len(SymbolMaster(str(master.path))) == 40
+    assert not list(master.path.parent.glob("*.tmp"))
+
+
+def test_get_ticker_info_is_a_dictionary_hit(master, monkeypatch):
+    master.upsert({"__SM_A__.NS": {"sector": "FMCG", "marketCap": "Smallcap"}}, source="upload")
+
+    def no_network(symbol):
+        raise AssertionError("master hit must not call .info")
+
+    monkeypatch.setattr(market_source.YFinanceSource, "info", lambda self, symbol: no_network(symbol))
+    assert DataProvider.get_ticker_info("__SM_A__.NS") == {"sector": "FMCG", "marketCap": "Smallcap"}
+
+
+def test_info_lookups_feed_the_master(master, monkeypatch):
+    cache.delete("__SM_B__.NS_info")
+    calls = []
+
+    def info(self, symbol):
+        calls.append(symbol)
+        return {"sector": "Energy", "industry": "Oil & Gas", "marketCap": 2.5e11}
+
+    monkeypatch.setattr(market_source.YFinanceSource, "info", info)
+    try:
+        assert DataProvider.get_ticker_info("__SM_B__.NS") == {"sector": "Energy", "marketCap": "Largecap"}
+        assert DataProvider.get_ticker_info("__SM_B__.NS") == {"sector": "Energy", "marketCap": "Largecap"}
+    finally:
+        cache.delete("__SM_B__.NS_info")
+    assert calls == ["__SM_B__.NS"]
+    assert master.row("__SM_B__.NS")["industry"] == "Oil & Gas"
+
+
+@pytest.mark.asyncio
+async def test_upload_metadata_feeds_the_master(master, monkeypatch, offline_engine):
+    dates = pd.bdate_range("2023-01-02", "2023-06-30")
+    frame = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5}, index=dates)
+    monkeypatch.setattr(DataProvider, "get_bulk_ticker_data",
+                        lambda symbols, start, end: pd.concat({s: frame.loc[start:end] for s in symbols}, axis=1))
+
+    signals = [{"symbol": "ERIS", "date": "2023-01-02", "Sector": "Healthcare", "Marketcapname": "Midcap"}]
+    await Backtester.run_backtest_async(signals)
+    assert master.get("ERIS.NS") == {"sector": "Healthcare", "marketCap": "Midcap"}
+    assert SymbolMaster(str(master.path)).get("ERIS.NS") is not None
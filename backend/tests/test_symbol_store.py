@@ -0,0 +1,94 @@
+"""Tests for the run-scoped symbol store."""
+from datetime import datetime
+
+import pandas as pd
+
+from backend.core.data_provider import DataProvider
+from backend.core.symbol_store import SymbolStore
+
+
+def _frame(tz=None):
+    dates = pd.bdate_range("2023-01-02", "2023-06-30", tz=tz)
+    data = pd.DataFrame(index=dates)
+    data["Open"] = range(len(dates))
+    data["High"] = data["Open"] + 2.0
+    data["Low"] = data["Open"] - 2.0
+    data["Close"] = data["Open"] + 0.5
+    return data
+
+
+def test_loads_each_symbol_once_and_slices_like_get_ticker_data(monkeypatch):
+    frame = _frame(tz="Asia/Kolkata")
+    calls = []
+
+    def get_ticker_data(symbol, start, end):
+        calls.append((symbol, start, end))
+        naive = frame.tz_localize(None)
+        return naive.loc[str(pd.to_datetime(start)):str(pd.to_datetime(end))]
+
+    monkeypatch.setattr(DataProvider, "get_ticker_data", get_ticker_data)
+    store = SymbolStore({"A.NS": (datetime(2023, 1, 2), datetime(2023, 5, 31))})
+
+    windows = [("2023-01-05", "2023-02-15"), ("2023-03-01", "2023-05-31"), ("2023-01-07", "2023-01-08")]
+    for start, end in windows:
+        got = store.window("A.NS", start, end)
+        expected = frame.tz_localize(None).loc[start:end]
+        assert got.index.tz is None
+        assert got.index.equals(expected.index)
+        assert got["Close"].tolist() == expected["Close"].tolist()
+
+    assert calls == [("A.NS", "2023-01-02", "2023-05-31")]
+    assert store.stats == {"loads": 1, "hits": 2, "evictions": 0}
+
+
+def test_evicts_least_recently_used_by_byte_budget(monkeypatch):
+    frame = _frame()
+    monkeypatch.setattr(DataProvider, "get_ticker_data", lambda symbol, start, end: frame)
+    span = (datetime(2023, 1, 2), datetime(2023, 6, 30))
+    one_frame = len(frame) * 8 * 5
+    store = SymbolStore({s: span for s in "ABC"}, max_bytes=2 * one_frame)
+
+    store.frame("A")
+    store.frame("B")
+    store.frame("A")        # A becomes most recently used
+    store.frame("C")        # over budget: B goes
+    assert list(store._frames) == ["A", "C"]
+    assert store.nbytes == 2 * one_frame
+    assert store.stats["evictions"] == 1
+
+
+def test_falls_back_to_signal_window_when_union_unavailable(monkeypatch):
+    frame = _frame()
+
+    def get_ticker_data(symbol, start, end):
+        if end > "2023-06-30":
+            return pd.DataFrame()  # e.g. union reaches past what the cache holds and the fetch fails
+        return frame.loc[start:end]
+
+    monkeypatch.setattr(DataProvider, "get_ticker_data", get_ticker_data)
+    store = SymbolStore({"A.NS": (datetime(2023, 1, 2), datetime(2023, 9, 30))})
+    assert len(store.window("A.NS", "2023-02-01", "2023-02-28")) == len(frame.loc["2023-02-01":"2023-02-28"])
+    assert store.window("A.NS", "2023-08-01", "2023-08-31").empty
+
+
+def test_range_tables_count_against_the_budget(monkeypatch):
+    frame = _frame()
+    monkeypatch.setattr(DataProvider, "get_ticker_data", lambda symbol, start, end: frame)
+    span = (datetime(2023, 1, 2), datetime(2023, 6, 30))
+    one_frame = len(frame) * 8 * 5
+    store = SymbolStore({s: span for s in "AB"}, max_bytes=2 * one_frame + 1)
+
+    a = store.frame("A")
+    store.frame("B")
+    assert store.nbytes == 2 * one_frame and store.stats["evictions"] == 0
+
+    a.high_max      # built after A was stored: grows A past what the budget can hold alongside B
+    assert a.nbytes > one_frame
+    assert list(store._frames) == ["A"]
+    assert store.nbytes == a.nbytes
+    assert store.stats["evictions"] == 1
+
+    store.frame("B").low_min
+    assert list(store._frames) == ["B"]
+    a.low_min       # evicted frames no longer report to the store
+    assert store.nbytes == store.frame("B").nbytes
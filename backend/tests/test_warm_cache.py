@@ -0,0 +1,115 @@
+"""Tests for the universe cache warmer CLI."""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from backend.core.data_provider import DataProvider
+from backend.core.market_store import MarketStore
+from backend.core.symbol_master import symbol_master
+from backend.core.symbol_resolver import SymbolResolver
+from backend import warm_cache
+from conftest import bars
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbol_master, "path", tmp_path / "symbol_master.csv")
+    monkeypatch.setattr(symbol_master, "_rows", {})
+    monkeypatch.setattr(symbol_master, "_loaded", True)
+    monkeypatch.setattr(SymbolResolver, "batch_resolve",
+                        staticmethod(lambda syms: {s: (None if s == "NOPE" else f"{s}.NS") for s in syms}))
+    latest_calls = []
+    monkeypatch.setattr(DataProvider, "get_latest_prices_batch",
+                        staticmethod(lambda syms: latest_calls.append(list(syms)) or {s: (1.5, "2023-06-30") for s in syms}))
+    return tmp_path, latest_calls
+
+
+def test_universe_sources(tmp_path):
+    chartink = tmp_path / "master.csv"
+    chartink.write_text("Date,Symbol,Marketcapname,Sector\n05-03-2021,abc,Smallcap,FMCG\n"
+                        "01-01-2020,ABC,Smallcap,FMCG\n02-01-2020,XYZ,Midcap,IT\n")
+    assert warm_cache.load_csv_universe([str(chartink)]) == {
+        "ABC": datetime(2020, 1, 1), "XYZ": datetime(2020, 1, 2)}
+
+    listing = tmp_path / "universe.txt"
+    listing.write_text("# nifty\nRELIANCE\n\ntcs.ns  # resolved already\n")
+    assert warm_cache.load_symbols_file(str(listing)) == {"RELIANCE": None, "TCS.NS": None}
+
+    with pytest.raises(SystemExit):
+        warm_cache._parse_args([])
+
+
+@pytest.mark.asyncio
+async def test_warm_backfills_store_and_resumes(offline, monkeypatch):
+    tmp_path, latest_calls = offline
+    state_file = str(tmp_path / "state.json")
+    downloads, failed = [], []
+
+    def flaky(symbols, start, end):
+        downloads.append(sorted(symbols))
+        if "B.NS" in symbols and not failed:
+            failed.append(symbols)
+            return pd.DataFrame()   # throttled
+        return bars(symbols, start, end)
+
+    seed = DataProvider.get_latest_prices_batch
+
+    def interrupted(symbols):
+        if "B.NS" in symbols:
+            raise RuntimeError("killed while seeding latest prices")
+        return seed(symbols)
+
+    monkeypatch.setattr(DataProvider, "_download_bars", staticmethod(flaky))
+    monkeypatch.setattr(DataProvider, "get_latest_prices_batch", staticmethod(interrupted))
+    monkeypatch.setattr(warm_cache.Limits, "BULK_FETCH_CHUNK", 1)
+    monkeypatch.setattr("backend.core.fetch_planner.yf_controller.chunk_size", lambda kind: 1)
+
+    universe = {"A": datetime(2023, 1, 2), "B": None, "NOPE": None}
+    start, end = datetime(2023, 3, 1), datetime(2023, 4, 1)
+    with pytest.raises(RuntimeError):
+        await warm_cache.warm(universe, start, end, concurrency=1, state_file=state_file)
+    assert MarketStore.coverage("A.NS")[0] == pd.Timestamp("2023-01-02")   # first signal, before --start
+    assert MarketStore.coverage("B.NS") is None                              # throttled: nothing came back
+    assert latest_calls == [["A.NS"]]
+
+    downloads.clear()
+    latest_calls.clear()
+    monkeypatch.setattr(DataProvider, "get_latest_prices_batch", staticmethod(seed))
+    summary = await warm_cache.warm(universe, start, end, concurrency=1, state_file=state_file, resume=True)
+    assert summary["symbols"] == 2 and summary["unresolved"] == 1
+    assert downloads == [["B.NS"]] and summary["slices_with_data"] == 1
+    assert MarketStore.coverage("B.NS")[0] == pd.Timestamp("2023-03-01")
+    assert latest_calls == [["B.NS"]]   # A was seeded before the interruption
+
+    # A finished run leaves nothing to resume: the next --resume is a full pass
+    assert not (tmp_path / "state.json").exists()
+    latest_calls.clear()
+    await warm_cache.warm(universe, start, end, concurrency=1, state_file=state_file, resume=True)
+    assert sorted(sum(latest_calls, [])) == ["A.NS", "B.NS"]
+
+
+@pytest.mark.asyncio
+async def test_resume_key_survives_a_day_change(tmp_path, monkeypatch):
+    listing = tmp_path / "universe.txt"
+    listing.write_text("RELIANCE\n")
+    keys, days = [], iter([datetime(2023, 6, 1), datetime(2023, 6, 2)])
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(days)
+
+    async def fake_warm(universe, start, end, **kwargs):
+        keys.append((kwargs["run_key"], start))
+        return {}
+
+    monkeypatch.setattr(warm_cache, "datetime", _Clock)
+    monkeypatch.setattr(warm_cache, "warm", fake_warm)
+    await warm_cache.main(["--symbols-file", str(listing), "--state-file", str(tmp_path / "s.json")])
+    await warm_cache.main(["--symbols-file", str(listing), "--resume", "--concurrency", "2"])
+    (first_key, first_start), (second_key, second_start) = keys
+    assert first_start != second_start and first_key == second_key
+
+    args = warm_cache._parse_args(["--symbols-file", str(listing), "--start", "2020-01-01"])
+    assert warm_cache._cli_run_key(args) != first_key
@@ -1,26 +1,89 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
 # Simple list of NSE holidays (can be expanded or fetched dynamically)
 # For MVP, we will rely on data availability to determine trading days
 # If data is missing for a date, we assume it's a holiday/weekend and look forward
 
-def get_next_trading_day(date: datetime, data: pd.DataFrame, max_lookahead: int = 5) -> datetime:
+_DAY = np.timedelta64(1, "D")
+_ZERO = np.timedelta64(0, "ns")
+
+
+class TradingCalendar:
+    """Sorted trading-day index for one symbol, queried by binary search.
+
+    Built once per symbol from its date array. Lookups take whole arrays of
+    dates and return row positions (-1 where no trading day qualifies), with
+    the same semantics as probing ``date + i days`` for ``i`` up to
+    ``max_lookahead``.
+    """
+
+    def __init__(self, dates: np.ndarray):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+
+    @classmethod
+    def from_index(cls, index) -> "TradingCalendar":
+        """Build from a DatetimeIndex (tz-aware indexes are made tz-naive)."""
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        if not index.is_monotonic_increasing:
+            raise ValueError("TradingCalendar requires a sorted date index")
+        return cls(index.to_numpy(dtype="datetime64[ns]"))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def lower_bound(self, dates) -> np.ndarray:
+        """Row position of the first trading day on or after each date (unbounded)."""
+        return np.searchsorted(self.dates, np.asarray(dates, dtype="datetime64[ns]"), side="left")
+
+    def upper_bound(self, dates) -> np.ndarray:
+        """Row position just past the last trading day on or before each date."""
+        return np.searchsorted(self.dates, np.asarray(dates, dtype="datetime64[ns]"), side="right")
+
+    def _resolve(self, targets: np.ndarray, idx: np.ndarray, max_lookahead: int, limit) -> np.ndarray:
+        n = len(self.dates)
+        ok = idx < (n if limit is None else np.minimum(limit, n))
+        if n == 0:
+            return np.full(len(targets), -1, dtype=np.int64)
+        delta = self.dates[np.minimum(idx, n - 1)] - targets
+        ok &= (delta <= max_lookahead * _DAY) & (delta % _DAY == _ZERO)
+        return np.where(ok, idx, -1)
+
+    def next_on_or_after(self, dates, max_lookahead: int = 5, limit=None) -> np.ndarray:
+        """Positions of the first trading day on/after each date, within ``max_lookahead`` days.
+
+        ``limit`` optionally caps each lookup to rows before that position.
+        """
+        targets = np.asarray(dates, dtype="datetime64[ns]")
+        idx = np.searchsorted(self.dates, targets, side="left")
+        return self._resolve(targets, idx, max_lookahead, limit)
+
+    def next_after(self, dates, max_lookahead: int = 5, limit=None) -> np.ndarray:
+        """Positions of the first trading day strictly after each date, within ``max_lookahead`` days."""
+        targets = np.asarray(dates, dtype="datetime64[ns]")
+        idx = np.searchsorted(self.dates, targets, side="right")
+        return self._resolve(targets, idx, max_lookahead, limit)
+
+    def date_at(self, pos: int) -> Optional[datetime]:
+        return pd.Timestamp(self.dates[pos]) if pos >= 0 else None
+
+
+def get_next_trading_day(date: datetime, calendar: TradingCalendar, max_lookahead: int = 5,
+                         limit: Optional[int] = None) -> Optional[datetime]:
     """
-    Finds the next available trading day in the data starting from 'date'.
+    Finds the next available trading day in the calendar starting from 'date'.
+    ``limit`` caps the search to rows before that position (the end of a signal's window).
     """
-    for i in range(max_lookahead + 1):
-        target_date = date + timedelta(days=i)
-        if target_date in data.index:
-            return target_date
-    return None
-
-def get_future_trading_day(date: datetime, data: pd.DataFrame, max_lookahead: int = 5) -> datetime | None:
-    for i in range(1, max_lookahead + 1):
-        target_date = date + timedelta(days=i)
-        if target_date in data.index:
-            return target_date
-    return None
+    return calendar.date_at(int(calendar.next_on_or_after([date], max_lookahead, limit)[0]))
+
+def get_future_trading_day(date: datetime, calendar: TradingCalendar, max_lookahead: int = 5,
+                           limit: Optional[int] = None) -> Optional[datetime]:
+    return calendar.date_at(int(calendar.next_after([date], max_lookahead, limit)[0]))
 
 def parse_date(date_str: str) -> datetime:
     """
@@ -0,0 +1,51 @@
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+from ..config import Horizons
+
+
+def normalize_horizons(horizons: Optional[Union[str, Iterable[int]]] = None) -> Tuple[int, ...]:
+    """Sorted, de-duplicated horizon tuple from a request value.
+
+    Accepts None (defaults), a comma-separated string ("1,3,5,120") or an
+    iterable of ints. Raises ValueError for anything outside 1..MAX_DAYS.
+    """
+    if horizons is None:
+        return Horizons.DEFAULT
+    if isinstance(horizons, str):
+        parts = [p.strip() for p in horizons.split(",") if p.strip()]
+        if not parts:
+            return Horizons.DEFAULT
+        try:
+            horizons = [int(p) for p in parts]
+        except ValueError:
+            raise ValueError(f"Invalid horizons: {horizons!r}")
+    out = tuple(sorted(set(int(h) for h in horizons)))
+    if not out:
+        return Horizons.DEFAULT
+    if out[0] < 1 or out[-1] > Horizons.MAX_DAYS:
+        raise ValueError(f"Horizons must be between 1 and {Horizons.MAX_DAYS} days")
+    if len(out) > Horizons.MAX_COUNT:
+        raise ValueError(f"At most {Horizons.MAX_COUNT} horizons are allowed")
+    return out
+
+
+def is_default(horizons: Sequence[int]) -> bool:
+    return tuple(horizons) == Horizons.DEFAULT
+
+
+def horizon_span(horizons: Sequence[int], duration: int) -> int:
+    """Longest horizon evaluated for a run.
+
+    The default set keeps the historical rule (horizons past ``duration`` are
+    left empty); an explicit set is evaluated in full.
+    """
+    if is_default(horizons):
+        return duration
+    return max(duration, max(horizons))
+
+
+def report_mode(entry_mode: str, horizons: Sequence[int]) -> str:
+    """Cache / lineage key for a report: the entry mode, suffixed with non-default horizons."""
+    if is_default(horizons):
+        return entry_mode
+    return f"{entry_mode}@{','.join(str(h) for h in horizons)}"
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class SparseTable:
+    """O(1) range argmax/argmin over a fixed array (sparse table, O(n log n) build).
+
+    Matches pandas ``idxmax``/``idxmin`` with ``skipna``: NaNs never win, ties
+    resolve to the first occurrence, and an all-NaN window returns a position
+    whose value is NaN.
+    """
+
+    def __init__(self, values: np.ndarray, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError(f"mode must be 'max' or 'min', got {mode!r}")
+        self.values = np.asarray(values, dtype=np.float64)
+        self._mode = mode
+        fill = -np.inf if mode == "max" else np.inf
+        self._keys = np.where(np.isnan(self.values), fill, self.values)
+
+        n = len(self.values)
+        levels = [np.arange(n, dtype=np.int32)]
+        span = 1
+        while span * 2 <= n:
+            prev = levels[-1]
+            left = prev[:n - span * 2 + 1]
+            right = prev[span:span + len(left)]
+            levels.append(self._pick(left, right))
+            span *= 2
+        self._levels = levels
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the table itself (the NaN-filled keys and every level)."""
+        return self._keys.nbytes + sum(level.nbytes for level in self._levels)
+
+    def _pick(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Choose the winning position per pair, preferring ``left`` on ties."""
+        lk = self._keys[left]
+        rk = self._keys[right]
+        better = rk > lk if self._mode == "max" else rk < lk
+        return np.where(better, right, left)
+
+    def query(self, starts, stops) -> np.ndarray:
+        """Winning row position for each half-open window ``[start, stop)``.
+
+        Every window must be non-empty and inside the array.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        if len(starts) == 0:
+            return np.empty(0, dtype=np.int64)
+        lengths = stops - starts
+        k = np.floor(np.log2(lengths)).astype(np.int64)
+        out = np.empty(len(starts), dtype=np.int64)
+        for level in np.unique(k):
+            mask = k == level
+            table = self._levels[level]
+            left = table[starts[mask]]
+            right = table[stops[mask] - (1 << int(level))]
+            out[mask] = self._pick(left, right)
+        return out
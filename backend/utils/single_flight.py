@@ -0,0 +1,78 @@
+"""Process-wide registry of in-progress fetches (single-flight).
+
+A caller claims the symbols it is about to fetch. Symbols another thread is
+already fetching — for a range that covers the caller's — come back as
+futures to wait on instead, so concurrent uploads sharing tickers hit Yahoo
+once. The claiming thread must release every symbol it owns, with its result
+or None, whatever happens to the fetch.
+"""
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+
+def _bound(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+class InFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, symbol) -> list of (start, end, future); start/end None for range-less fetches
+        self._entries: Dict[Tuple[str, Hashable], List[tuple]] = {}
+
+    def claim(self, kind: str, symbols: Iterable, start=None, end=None) -> Tuple[Dict, Dict]:
+        """Split ``symbols`` into ``(owned, waiting)``, both ``{symbol: Future}``.
+
+        ``waiting`` holds symbols already being fetched over a range covering
+        ``[start, end]``; ``owned`` are registered to the caller.
+        """
+        start, end = _bound(start), _bound(end)
+        owned, waiting = {}, {}
+        with self._lock:
+            for sym in symbols:
+                if sym in owned or sym in waiting:
+                    continue
+                entries = self._entries.setdefault((kind, sym), [])
+                for s, e, fut in entries:
+                    if (s is None or (start is not None and s <= start)) and \
+                            (e is None or (end is not None and e >= end)):
+                        waiting[sym] = fut
+                        break
+                else:
+                    fut = Future()
+                    entries.append((start, end, fut))
+                    owned[sym] = fut
+        return owned, waiting
+
+    def release(self, kind: str, owned: Dict, results: Dict):
+        """Publish ``results.get(symbol)`` to everyone waiting on ``owned`` and unregister them."""
+        with self._lock:
+            for sym, fut in owned.items():
+                entries = self._entries.get((kind, sym), [])
+                entries[:] = [entry for entry in entries if entry[2] is not fut]
+                if not entries:
+                    self._entries.pop((kind, sym), None)
+        for sym, fut in owned.items():
+            if not fut.done():
+                fut.set_result(results.get(sym))
+
+    @staticmethod
+    def wait(waiting: Dict, timeout: Optional[float]) -> Tuple[Dict, List]:
+        """Results of ``waiting`` as ``({symbol: value}, timed_out_symbols)``; ``timeout`` bounds the whole wait."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        values, timed_out = {}, []
+        for sym, fut in waiting.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                values[sym] = fut.result(timeout=remaining)
+            except FutureTimeout:
+                timed_out.append(sym)
+        return values, timed_out
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
@@ -0,0 +1,316 @@
+"""Prefetch bars and latest prices for a symbol universe (nightly cache warmer).
+
+    python -m backend.warm_cache --chartink --signal-results --symbols-file universe.txt
+
+Each symbol's window runs from ``--start`` (or its first known signal
+date, if earlier) to today. It is planned against the market store like Phase
+B, so stored history is skipped, stale tails are extended and cold symbols
+are backfilled. Slices are persisted with the same semantics as an upload,
+so the next day's uploads hit the cache. ChartInk sector/market-cap columns
+(and, with ``--metadata``, Yahoo lookups) refresh the local symbol master. Progress is saved after every
+request; ``--resume`` skips the symbols an interrupted run already finished.
+A run that reaches the end deletes its progress, so the next ``--resume``
+starts a full pass.
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.config import Limits, Paths, Warmer, DATABASE_URL
+from backend.core.data_provider import DataProvider
+from backend.core.fetch_planner import plan_fetches
+from backend.core.market_store import MarketStore
+from backend.core.symbol_master import symbol_master
+from backend.core.symbol_resolver import SymbolResolver
+from backend.utils.date_utils import parse_date
+
+logger = logging.getLogger(__name__)
+
+CHARTINK_GLOB = str(Path(__file__).parent.parent / "Data" / "ChartInk" / "master_*.csv")
+
+
+def _merge_first_dates(universe: Dict[str, Optional[datetime]], symbol: str, date: Optional[datetime]):
+    symbol = symbol.upper().strip()
+    if not symbol:
+        return
+    known = universe.get(symbol)
+    if symbol not in universe or (date is not None and (known is None or date < known)):
+        universe[symbol] = date
+
+
+def _parse_or_none(date_str) -> Optional[datetime]:
+    try:
+        return parse_date(str(date_str).strip())
+    except ValueError:
+        return None
+
+
+def load_csv_universe(paths: Iterable[str]) -> Dict[str, Optional[datetime]]:
+    """``{symbol: first signal date}`` from ChartInk-style CSVs (``Symbol`` and ``Date`` columns)."""
+    universe = {}
+    for path in paths:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                symbol = row.get("Symbol") or row.get("symbol") or ""
+                date = row.get("Date") or row.get("date")
+                _merge_first_dates(universe, symbol, _parse_or_none(date) if date else None)
+    return universe
+
+
+def load_csv_metadata(paths: Iterable[str]) -> Dict[str, dict]:
+    """``{symbol: {"sector", "marketCap"}}`` from ChartInk-style CSVs; later rows win."""
+    metadata = {}
+    for path in paths:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get("Symbol") or row.get("symbol") or "").upper().strip()
+                sector = (row.get("Sector") or "").strip()
+                cap = (row.get("Marketcapname") or row.get("MarketCap") or "").strip()
+                if symbol and (sector or cap):
+                    metadata[symbol] = {"sector": sector or None, "marketCap": cap or None}
+    return metadata
+
+
+def load_symbols_file(path: str) -> Dict[str, Optional[datetime]]:
+    """One symbol per line (``#`` comments allowed), or a CSV with a ``Symbol`` column."""
+    if path.endswith(".csv"):
+        return load_csv_universe([path])
+    universe = {}
+    for line in Path(path).read_text().splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            _merge_first_dates(universe, line, None)
+    return universe
+
+
+async def load_signal_results_universe() -> Dict[str, Optional[datetime]]:
+    if not DATABASE_URL:
+        logger.warning("Warm — --signal-results needs DATABASE_URL; skipping")
+        return {}
+    from backend.persistence import PostgresBackend
+    backend = await PostgresBackend.create(DATABASE_URL)
+    try:
+        rows = await backend.get_signal_universe()
+    finally:
+        await backend.close()
+    universe = {}
+    for symbol, first_date in rows.items():
+        _merge_first_dates(universe, symbol, _parse_or_none(first_date) if first_date else None)
+    return universe
+
+
+def _run_key(inputs) -> str:
+    raw = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _cli_run_key(args: argparse.Namespace) -> str:
+    """Identity of a CLI invocation as typed, not of the dates it resolves to, so
+    ``--resume`` the next day still picks up an interrupted run's progress."""
+    return _run_key({k: v for k, v in vars(args).items() if k not in ("resume", "state_file", "concurrency")})
+
+
+class WarmState:
+    """Symbols a run has finished, saved after every step so an interrupted run can resume.
+
+    The file only exists while a run is incomplete: ``finish`` removes it.
+    """
+
+    def __init__(self, path: str, key: str, resume: bool):
+        self.path = Path(path)
+        self.data = {"key": key, "bars_done": [], "latest_done": []}
+        if resume and self.path.is_file():
+            saved = json.loads(self.path.read_text())
+            if saved.get("key") == key:
+                self.data = saved
+            else:
+                logger.info("Warm — saved progress is for a different universe/window, starting over")
+
+    def done(self, phase: str) -> set:
+        return set(self.data[phase])
+
+    def mark(self, phase: str, symbols: Iterable[str]):
+        self.data[phase] = sorted(set(self.data[phase]) | set(symbols))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data))
+        os.replace(tmp, self.path)
+
+    def finish(self):
+        """The run reached its end: nothing is left to resume."""
+        self.path.unlink(missing_ok=True)
+
+
+async def warm(universe: Dict[str, Optional[datetime]], start: datetime, end: datetime,
+               concurrency: int = Limits.MAX_CONCURRENCY_BULK, latest: bool = True,
+               state_file: str = Warmer.STATE_FILE, resume: bool = False,
+               metadata: Optional[Dict[str, dict]] = None, fill_metadata: bool = False,
+               run_key: Optional[str] = None) -> dict:
+    """Backfill/extend stored bars and seed latest prices for ``universe`` (raw or resolved symbols).
+
+    ``metadata`` (keyed like ``universe``) is merged into the symbol master;
+    ``fill_metadata`` looks up symbols the master still lacks via ``get_ticker_info``.
+    ``run_key`` identifies the run for ``resume``; by default the universe, window
+    and ``latest`` flag.
+    """
+    began = time.monotonic()
+    resolved = await asyncio.to_thread(SymbolResolver.batch_resolve, list(universe))
+    ranges = {}
+    for raw, sym in resolved.items():
+        if not sym:
+            continue
+        first = universe.get(raw)
+        lo = min(first, start) if first else start
+        prev = ranges.get(sym)
+        ranges[sym] = (min(lo, prev[0]) if prev else lo, end)
+    unresolved = len(universe) - len(resolved) + sum(1 for sym in resolved.values() if not sym)
+    logger.info("Warm — %d symbols in universe, %d resolved, %d unresolved",
+                len(universe), len(ranges), unresolved)
+
+    if metadata:
+        learned = symbol_master.upsert(
+            {resolved[raw]: meta for raw, meta in metadata.items() if resolved.get(raw)}, source="chartink")
+        logger.info("Warm — symbol master: %d rows added/updated from CSV metadata", learned)
+
+    if run_key is None:
+        run_key = _run_key([sorted(universe), start, end, latest])
+    state = WarmState(state_file, run_key, resume)
+    bars_done = state.done("bars_done")
+    fetch_plan, plan_stats = await asyncio.to_thread(
+        plan_fetches, {sym: rng for sym, rng in ranges.items() if sym not in bars_done})
+    logger.info("Warm — %d symbols already stored, %d requests, %d symbol-days to fetch (resumed: %d done)",
+                plan_stats["symbols_stored"], len(fetch_plan), plan_stats["symbol_days_fetched"], len(bars_done))
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+    summary = {"symbols": len(ranges), "unresolved": unresolved, "requests": len(fetch_plan),
+               "requests_failed": 0, "slices_with_data": 0, "latest_prices": 0}
+    requests_done = 0
+
+    async def _fetch(idx, request):
+        nonlocal requests_done
+        got = set()
+        async with sem:
+            try:
+                df = await asyncio.to_thread(
+                    DataProvider.get_bulk_ticker_data, request.symbols,
+                    request.start.strftime("%Y-%m-%d"), request.end.strftime("%Y-%m-%d"))
+                if df is not None and not df.empty:
+                    await asyncio.to_thread(DataProvider.persist_bulk_slices, request.symbols, df,
+                                            f"warm request {idx + 1}")
+                    got = set(df.columns.get_level_values(0)) if df.columns.nlevels > 1 else set(request.symbols)
+                    summary["slices_with_data"] += len(got & set(request.symbols))
+            except Exception:
+                summary["requests_failed"] += 1
+                logger.warning("Warm — request %d failed for %d symbols", idx + 1, len(request.symbols), exc_info=True)
+                return
+        requests_done += 1
+        # A symbol is done once every request covering it has landed with data (or it is
+        # known bad); anything else reappears in the next run's plan
+        finished = [sym for sym in request.symbols
+                    if (sym in got or DataProvider.is_bad_symbol(sym))
+                    and all(req is request or sym not in req.symbols for req in pending)]
+        pending.remove(request)
+        state.mark("bars_done", finished)
+        logger.info("Warm — bars %d/%d (%d symbols)", requests_done, len(fetch_plan), len(request.symbols))
+
+    pending = list(fetch_plan)
+    stored = [sym for sym in ranges if sym not in bars_done and all(sym not in r.symbols for r in fetch_plan)]
+    state.mark("bars_done", stored)
+    await asyncio.gather(*(_fetch(i, r) for i, r in enumerate(fetch_plan)))
+
+    if latest:
+        todo = [sym for sym in ranges if sym not in state.done("latest_done")]
+        chunk = Limits.BULK_FETCH_CHUNK
+
+        async def _latest(symbols):
+            async with sem:
+                prices = await asyncio.to_thread(DataProvider.get_latest_prices_batch, symbols)
+            summary["latest_prices"] += sum(1 for price, _ in prices.values() if price is not None)
+            state.mark("latest_done", symbols)
+
+        await asyncio.gather(*(_latest(todo[i:i + chunk]) for i in range(0, len(todo), chunk)))
+
+    if fill_metadata:
+        missing = [sym for sym in ranges if symbol_master.get(sym) is None]
+        logger.info("Warm — looking up metadata for %d symbols missing from the symbol master", len(missing))
+
+        async def _info(sym):
+            async with sem:
+                await asyncio.to_thread(DataProvider.get_ticker_info, sym)
+
+        await asyncio.gather(*(_info(sym) for sym in missing))
+        summary["metadata_looked_up"] = len(missing)
+    symbol_master.save()
+    summary["store_sweep"] = MarketStore.sweep()
+    state.finish()
+
+    summary["elapsed_sec"] = round(time.monotonic() - began, 2)
+    logger.info("Warm — done: %s", summary)
+    return summary
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch bars and latest prices for a symbol universe.")
+    parser.add_argument("--chartink", nargs="*", metavar="CSV",
+                        help="ChartInk CSVs (default: Data/ChartInk/master_*.csv)")
+    parser.add_argument("--signal-results", action="store_true",
+                        help="symbols from historical signal_results (needs DATABASE_URL)")
+    parser.add_argument("--symbols-file", action="append", default=[], metavar="PATH",
+                        help="one symbol per line, or a CSV with a Symbol column (repeatable)")
+    parser.add_argument("--start", help="backfill at least back to this date (default: WARM_HISTORY_YEARS ago)")
+    parser.add_argument("--end", help="last date to fetch (default: today)")
+    parser.add_argument("--concurrency", type=int, default=Limits.MAX_CONCURRENCY_BULK)
+    parser.add_argument("--no-latest", action="store_true", help="skip seeding latest prices")
+    parser.add_argument("--metadata", action="store_true",
+                        help="fill symbol-master gaps (sector/market cap) with Yahoo .info lookups")
+    parser.add_argument("--resume", action="store_true", help="skip symbols an interrupted run finished")
+    parser.add_argument("--state-file", default=Warmer.STATE_FILE)
+    args = parser.parse_args(argv)
+    if args.chartink is None and not args.signal_results and not args.symbols_file:
+        parser.error("give at least one of --chartink, --signal-results, --symbols-file")
+    return args
+
+
+async def main(argv=None) -> dict:
+    args = _parse_args(argv)
+    Paths.ensure_dirs()
+    universe: Dict[str, Optional[datetime]] = {}
+    metadata: Dict[str, dict] = {}
+
+    def add(part):
+        for symbol, date in part.items():
+            _merge_first_dates(universe, symbol, date)
+
+    if args.chartink is not None:
+        chartink = args.chartink or sorted(glob.glob(CHARTINK_GLOB))
+        add(load_csv_universe(chartink))
+        metadata.update(load_csv_metadata(chartink))
+    for path in args.symbols_file:
+        add(load_symbols_file(path))
+    if args.signal_results:
+        add(await load_signal_results_universe())
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = parse_date(args.end) if args.end else today + timedelta(days=1)
+    start = parse_date(args.start) if args.start else today - timedelta(days=365 * Warmer.HISTORY_YEARS)
+    return await warm(universe, start, end, concurrency=args.concurrency, latest=not args.no_latest,
+                      state_file=args.state_file, resume=args.resume,
+                      metadata=metadata, fill_metadata=args.metadata, run_key=_cli_run_key(args))
+
+
+if __name__ == "__main__":
+    from backend.logging_config import setup_logging
+    setup_logging()
+    asyncio.run(main())